@@ -0,0 +1,421 @@
+import os
+import time
+import random
+import asyncio
+import queue
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, List, Any, Optional, Iterator, AsyncIterator
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class AIProviderError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class AIProvider(ABC):
+    name = 'provider'
+
+    @abstractmethod
+    def generate(self, prompt: str, timeout: float) -> str:
+        pass
+
+    @abstractmethod
+    async def agenerate(self, prompt: str, timeout: float) -> str:
+        pass
+
+    def stream(self, prompt: str, timeout: float) -> Iterator[str]:
+        yield self.generate(prompt, timeout)
+
+    async def astream(self, prompt: str, timeout: float) -> AsyncIterator[str]:
+        yield await self.agenerate(prompt, timeout)
+
+    def close(self) -> None:
+        pass
+
+class GeminiProvider(AIProvider):
+    name = 'gemini'
+
+    def __init__(self, model_name: str = 'gemini-2.5-flash', api_key: str = None):
+        import google.generativeai as genai
+        api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise EnvironmentError("Missing GEMINI_API_KEY or GOOGLE_API_KEY in .env file")
+        genai.configure(api_key=api_key)
+        try:
+            self.model = genai.GenerativeModel(model_name)
+        except:
+            self.model = genai.GenerativeModel('gemini-1.5-flash')
+
+    def wrap_error(self, error: Exception) -> AIProviderError:
+        status = getattr(error, 'code', None)
+        return AIProviderError(str(error), status if isinstance(status, int) else None)
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        try:
+            response = self.model.generate_content(prompt, request_options={'timeout': timeout})
+        except Exception as e:
+            raise self.wrap_error(e) from e
+        return response.text
+
+    async def agenerate(self, prompt: str, timeout: float) -> str:
+        try:
+            response = await self.model.generate_content_async(prompt, request_options={'timeout': timeout})
+        except Exception as e:
+            raise self.wrap_error(e) from e
+        return response.text
+
+    def chunk_text(self, chunk) -> str:
+        try:
+            return chunk.text
+        except:
+            return ''
+
+    def stream(self, prompt: str, timeout: float) -> Iterator[str]:
+        try:
+            response = self.model.generate_content(prompt, stream=True, request_options={'timeout': timeout})
+            for chunk in response:
+                text = self.chunk_text(chunk)
+                if text:
+                    yield text
+        except Exception as e:
+            raise self.wrap_error(e) from e
+
+    async def astream(self, prompt: str, timeout: float) -> AsyncIterator[str]:
+        try:
+            response = await self.model.generate_content_async(prompt, stream=True, request_options={'timeout': timeout})
+            async for chunk in response:
+                text = self.chunk_text(chunk)
+                if text:
+                    yield text
+        except Exception as e:
+            raise self.wrap_error(e) from e
+
+class HTTPProvider(AIProvider):
+    name = 'http'
+
+    def __init__(self, base_url: str, max_connections: int = 16):
+        self.base_url = base_url.rstrip('/')
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.Client(base_url=self.base_url, limits=self.limits)
+        self.async_clients = weakref.WeakKeyDictionary()
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self.async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(base_url=self.base_url, limits=self.limits)
+            self.async_clients[loop] = client
+        return client
+
+    def parse_response(self, response: httpx.Response) -> str:
+        if response.status_code >= 400:
+            raise AIProviderError(f'{response.status_code} {response.text[:200]}', response.status_code)
+        return response.json()['text']
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        try:
+            response = self.client.post('/generate', json={'prompt': prompt}, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise AIProviderError(f'Timed out after {timeout}s', 504) from e
+        except httpx.TransportError as e:
+            raise AIProviderError(str(e), 503) from e
+        return self.parse_response(response)
+
+    async def agenerate(self, prompt: str, timeout: float) -> str:
+        try:
+            response = await self.get_async_client().post('/generate', json={'prompt': prompt}, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise AIProviderError(f'Timed out after {timeout}s', 504) from e
+        except httpx.TransportError as e:
+            raise AIProviderError(str(e), 503) from e
+        return self.parse_response(response)
+
+    def stream(self, prompt: str, timeout: float) -> Iterator[str]:
+        try:
+            with self.client.stream('POST', '/stream', json={'prompt': prompt}, timeout=timeout) as response:
+                if response.status_code >= 400:
+                    response.read()
+                    self.parse_response(response)
+                for text in response.iter_text():
+                    yield text
+        except httpx.TimeoutException as e:
+            raise AIProviderError(f'Timed out after {timeout}s', 504) from e
+        except httpx.TransportError as e:
+            raise AIProviderError(str(e), 503) from e
+
+    async def astream(self, prompt: str, timeout: float) -> AsyncIterator[str]:
+        try:
+            async with self.get_async_client().stream('POST', '/stream', json={'prompt': prompt}, timeout=timeout) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    self.parse_response(response)
+                async for text in response.aiter_text():
+                    yield text
+        except httpx.TimeoutException as e:
+            raise AIProviderError(f'Timed out after {timeout}s', 504) from e
+        except httpx.TransportError as e:
+            raise AIProviderError(str(e), 503) from e
+
+    def close(self) -> None:
+        self.client.close()
+        self.async_clients.clear()
+
+class ConcurrencyLimiter:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return True
+        return False
+
+    def acquire(self) -> None:
+        with self.lock:
+            if self.try_acquire():
+                return
+            event = threading.Event()
+            self.waiters.append(event)
+        event.wait()
+
+    async def aacquire(self) -> None:
+        with self.lock:
+            if self.try_acquire():
+                return
+            future = asyncio.get_running_loop().create_future()
+            self.waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self.lock:
+                if future in self.waiters:
+                    self.waiters.remove(future)
+                    raise
+            self.release()
+            raise
+
+    def release(self) -> None:
+        with self.lock:
+            while self.waiters:
+                waiter = self.waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                try:
+                    waiter.get_loop().call_soon_threadsafe(self.wake, waiter)
+                    return
+                except RuntimeError:
+                    continue
+            self.active -= 1
+
+    def wake(self, future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(None)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    async def __aenter__(self):
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    return isinstance(error, AIProviderError) and error.status in RETRYABLE_STATUS
+
+class AIClient:
+    def __init__(self, provider: AIProvider, max_concurrency: int = 4, timeout: float = 60.0, max_retries: int = 3, backoff: float = 1.0, max_backoff: float = 20.0):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = ConcurrencyLimiter(max_concurrency)
+        self.lock = threading.Lock()
+        self.loop = None
+        self.loop_thread = None
+        self.metrics = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def record(self, key: str) -> None:
+        with self.lock:
+            self.metrics[key] += 1
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+                self.loop_thread.start()
+            return self.loop
+
+    def run(self, coroutine) -> Any:
+        loop = self.get_loop()
+        if threading.current_thread() is self.loop_thread:
+            coroutine.close()
+            raise RuntimeError('AIClient.run called from its own event loop thread; await the coroutine instead')
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def generate(self, prompt: str, timeout: float = None) -> str:
+        timeout = timeout or self.timeout
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.limiter:
+                    self.record('requests')
+                    return self.provider.generate(prompt, timeout)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.record('failures')
+                    raise
+                delay = self.backoff_delay(attempt)
+                self.record('retries')
+                print(f'   🔁 AI request failed ({str(e) or type(e).__name__}), retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})')
+                time.sleep(delay)
+
+    async def agenerate(self, prompt: str, timeout: float = None) -> str:
+        timeout = timeout or self.timeout
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.limiter:
+                    self.record('requests')
+                    return await asyncio.wait_for(self.provider.agenerate(prompt, timeout), timeout)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.record('failures')
+                    raise
+                delay = self.backoff_delay(attempt)
+                self.record('retries')
+                print(f'   🔁 AI request failed ({str(e) or type(e).__name__}), retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})')
+                await asyncio.sleep(delay)
+
+    def stream(self, prompt: str, timeout: float = None) -> Iterator[str]:
+        timeout = timeout or self.timeout
+        for attempt in range(self.max_retries + 1):
+            received = False
+            try:
+                with self.limiter:
+                    self.record('requests')
+                    for text in self.provider.stream(prompt, timeout):
+                        received = True
+                        yield text
+                return
+            except Exception as e:
+                if received or attempt >= self.max_retries or not is_retryable(e):
+                    self.record('failures')
+                    raise
+                delay = self.backoff_delay(attempt)
+                self.record('retries')
+                print(f'   🔁 AI stream failed ({str(e) or type(e).__name__}), retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})')
+                time.sleep(delay)
+
+    async def astream(self, prompt: str, timeout: float = None) -> AsyncIterator[str]:
+        timeout = timeout or self.timeout
+        for attempt in range(self.max_retries + 1):
+            received = False
+            try:
+                async with self.limiter:
+                    self.record('requests')
+                    async for text in self.provider.astream(prompt, timeout):
+                        received = True
+                        yield text
+                return
+            except Exception as e:
+                if received or attempt >= self.max_retries or not is_retryable(e):
+                    self.record('failures')
+                    raise
+                delay = self.backoff_delay(attempt)
+                self.record('retries')
+                print(f'   🔁 AI stream failed ({str(e) or type(e).__name__}), retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})')
+                await asyncio.sleep(delay)
+
+    async def agenerate_many(self, prompts: List[str], timeout: float = None, return_exceptions: bool = False) -> List[Any]:
+        return await asyncio.gather(*(self.agenerate(prompt, timeout) for prompt in prompts), return_exceptions=return_exceptions)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.metrics, provider=self.provider.name, max_concurrency=self.max_concurrency)
+
+    def close(self) -> None:
+        self.provider.close()
+        with self.lock:
+            loop, self.loop = self.loop, None
+            self.loop_thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+
+def iterate_in_background(iterator: Iterator[Any], maxsize: int = 0) -> Iterator[Any]:
+    items = queue.Queue(maxsize)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterator:
+                items.put(item)
+        except Exception as e:
+            items.put(e)
+        items.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item = items.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+AI_CLIENT = None
+AI_CLIENT_LOCK = threading.Lock()
+
+def create_default_provider() -> AIProvider:
+    provider_url = os.getenv('AI_PROVIDER_URL')
+    if provider_url:
+        return HTTPProvider(provider_url)
+    return GeminiProvider(os.getenv('GEMINI_MODEL', 'gemini-2.5-flash'))
+
+def get_ai_client() -> AIClient:
+    global AI_CLIENT
+    if AI_CLIENT is None:
+        with AI_CLIENT_LOCK:
+            if AI_CLIENT is None:
+                AI_CLIENT = AIClient(
+                    create_default_provider(),
+                    max_concurrency=int(os.getenv('AI_MAX_CONCURRENCY', '4')),
+                    timeout=float(os.getenv('AI_TIMEOUT', '60')),
+                    max_retries=int(os.getenv('AI_MAX_RETRIES', '3')),
+                )
+    return AI_CLIENT
+
+def set_ai_client(client: Optional[AIClient]) -> Optional[AIClient]:
+    global AI_CLIENT
+    with AI_CLIENT_LOCK:
+        previous = AI_CLIENT
+        AI_CLIENT = client
+    return previous
+
+def set_ai_provider(provider: AIProvider, **client_options) -> AIClient:
+    client = AIClient(provider, **client_options)
+    set_ai_client(client)
+    return client
@@ -1,94 +1,48 @@
 import os
 import json
 import re
-from typing import Dict, List, Any, Optional
-from bs4 import BeautifulSoup
-import google.generativeai as genai
+import time
+from typing import Dict, List, Any, Optional, Iterator, Union
+import asyncio
 from dotenv import load_dotenv
+from ai_client import get_ai_client
+from form_schema import build_form_context, estimate_tokens, extract_form_schema, chunk_schema, schema_to_prompt
+from form_cache import FormStructureCache, form_structure_key
+from option_matcher import best_option, CONFIDENCE_THRESHOLD
+from json_stream import JSONArrayStreamParser
+from clean_document import CleanDocument
+from download_cache import PROFILE_FILE_KEYS
 
 load_dotenv()
 
-def get_gemini_model():
-    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise EnvironmentError("Missing GEMINI_API_KEY or GOOGLE_API_KEY in .env file")
-    
-    genai.configure(api_key=api_key)
-    
-    models_to_try = ['gemini-2.5-flash']
-    for model_name in models_to_try:
-        try:
-            model = genai.GenerativeModel(model_name)
-            return model
-        except:
-            continue
-    
-    return genai.GenerativeModel('gemini-1.5-flash')
+SCHEMA_FORM_LABEL = 'FORM SCHEMA (one JSON object per control; "options": "@id" refers to the section with that id)'
 
-def parse_html_structure(html: str) -> Dict[str, Any]:
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    base_html = None
-    sections = {}
-    
-    body = soup.find('body')
-    if not body:
-        return {'base_html': html, 'sections': {}}
-    
-    current_section = None
-    base_parts = []
-    
-    for element in body.descendants:
-        if isinstance(element, str):
-            continue
-        
-        if element.name == 'section':
-            section_text = element.get_text(strip=True)
-            if section_text and 'id:' in section_text:
-                current_section = section_text.replace('id:', '').strip()
-                sections[current_section] = {'html': '', 'options': []}
-                continue
-        
-        if current_section:
-            if element.name == 'body':
-                parent = element.parent
-                if parent and parent.name == 'body':
-                    section_soup = BeautifulSoup(str(element), 'html.parser')
-                    sections[current_section]['html'] = str(element)
-                    
-                    options = []
-                    for option_elem in section_soup.find_all(True):
-                        role = option_elem.get('role', '')
-                        if role == 'option':
-                            option_text = option_elem.get_text(strip=True)
-                            if option_text and len(option_text) < 200:
-                                options.append(option_text)
-                    
-                    sections[current_section]['options'] = list(set(options))
-                    current_section = None
-                    continue
-        else:
-            if element.name == 'body' and not base_html:
-                parent = element.parent
-                if parent and parent.name == 'body':
-                    base_html = str(element)
-    
-    if base_html is None:
-        bodies = body.find_all('body', recursive=False)
-        if bodies:
-            base_html = str(bodies[0])
-        else:
-            base_html = str(body)
-    
-    return {'base_html': base_html, 'sections': sections}
+FORM_CACHE = None
 
-def identify_form_fields(html: str, profile_dict: Dict[str, Any], use_cache: bool = False) -> List[Dict[str, Any]]:  
-    print('🔍 Identifying form fields using AI...')
+def get_form_cache() -> FormStructureCache:
+    global FORM_CACHE
+    if FORM_CACHE is None:
+        FORM_CACHE = FormStructureCache()
+    return FORM_CACHE
+
+def parse_json_response(response_text: str) -> Any:
+    response_text = response_text.strip()
     
-    structure = parse_html_structure(html)
-    base_html = structure['base_html']
-    sections = structure['sections']
+    if response_text.startswith('```json'):
+        response_text = response_text[7:]
+    if response_text.startswith('```'):
+        response_text = response_text[3:]
+    if response_text.endswith('```'):
+        response_text = response_text[:-3]
+    response_text = response_text.strip()
     
+    return json.loads(response_text)
+
+def parse_html_structure(html: Union[str, CleanDocument]) -> Dict[str, Any]:
+    document = html if isinstance(html, CleanDocument) else CleanDocument(html=html)
+    return document.get_structure()
+
+def build_identify_prompt(form_label: str, content: str, sections: Dict[str, Any], profile_dict: Dict[str, Any]) -> str:
     section_info = ""
     for section_id, section_data in sections.items():
         if section_data['options']:
@@ -97,10 +51,10 @@ def identify_form_fields(html: str, profile_dict: Dict[str, Any], use_cache: boo
     
     profile_context = json.dumps(profile_dict, indent=2)
     
-    prompt = f"""Analyze this HTML form structure and identify all form fields.
+    return f"""Analyze this HTML form structure and identify all form fields.
 
-    BASE HTML (contains the form structure):
-    {base_html}
+    {form_label}:
+    {content}
 
     SECTIONS (contain expanded dropdown options):
     {section_info if section_info else "No sections with options found."}
@@ -145,7 +99,7 @@ def identify_form_fields(html: str, profile_dict: Dict[str, Any], use_cache: boo
     - Mark as checkbox-group type
 
     IMPORTANT:
-    - Extract selectors from BASE HTML only
+    - Extract selectors from the {form_label.split(' (')[0]} only
     - If a field has dropdown options, look for the related section (sections marked with id:field_id)
     - Some sections may be empty or have errors - handle gracefully
     - For generic fields, include suggestedValue based on profile context
@@ -168,40 +122,145 @@ def identify_form_fields(html: str, profile_dict: Dict[str, Any], use_cache: boo
 
     Return ONLY valid JSON, no markdown, no explanations."""
 
+def prepare_identify_request(html: Union[str, CleanDocument], profile_dict: Dict[str, Any], use_cache: bool = False, compact: bool = True, include_section: bool = False) -> Dict[str, Any]:
+    structure = parse_html_structure(html)
+    base = structure['base']
+    base_html = structure['base_html']
+    sections = structure['sections']
+    request = {'sections': sections, 'cache_key': None, 'cached_fields': None, 'prompt': None, 'mode': 'html', 'schema': None, 'form_label': None, 'local_fields': []}
+    
+    schema = extract_form_schema(base, sections, include_section) if (compact or use_cache) else None
+    if use_cache:
+        cache = get_form_cache()
+        cache_key = form_structure_key(base_html, sections, schema)
+        request['cache_key'] = cache_key
+        cached_fields = cache.get(cache_key)
+        if cached_fields is not None:
+            print(f'   ♻️  Form structure cache hit ({cache_key[:12]}), hit rate {cache.hit_rate():.0%}')
+            suggest_field_answers(cached_fields, profile_dict)
+            request['cached_fields'] = cached_fields
+            return request
+        print(f'   🆕 Form structure cache miss ({cache_key[:12]})')
+    
+    if compact:
+        form_context = build_form_context(base_html, sections, schema=schema)
+        if form_context['mode'] == 'schema':
+            local_fields, residual, _ = classify_schema_locally(schema, sections)
+            request['local_fields'] = local_fields
+            form_context = build_form_context(base_html, sections, min_controls=0, schema=residual)
+    else:
+        form_context = {'mode': 'html', 'content': base_html, 'raw_tokens': estimate_tokens(base_html), 'tokens': estimate_tokens(base_html)}
+    if form_context['mode'] == 'schema':
+        form_label = SCHEMA_FORM_LABEL
+        print(f"   📉 Form schema: {len(form_context['schema'])} control(s), ~{form_context['tokens']} tokens "
+              f"vs ~{form_context['raw_tokens']} for raw HTML ({1 - form_context['tokens'] / max(form_context['raw_tokens'], 1):.0%} smaller)")
+    else:
+        form_label = 'BASE HTML (contains the form structure)'
+        if compact:
+            print(f"   ⚠️  Only {len(form_context['schema'])} control(s) extracted, sending raw HTML (~{form_context['raw_tokens']} tokens)")
+    
+    request['mode'] = form_context['mode']
+    request['schema'] = form_context.get('schema')
+    request['form_label'] = form_label
+    if form_context['content']:
+        request['prompt'] = build_identify_prompt(form_label, form_context['content'], sections, profile_dict)
+    return request
+
+def attach_section_options(field: Dict[str, Any], sections: Dict[str, Any]) -> Dict[str, Any]:
+    field_id = field.get('id', '')
+    
+    if field_id and field_id in sections:
+        section_options = sections[field_id]['options']
+        if section_options:
+            field['options'] = section_options
+    
+    if not field.get('options') and field.get('fieldType') == 'checkbox-group':
+        if field.get('label', '').lower().find('click all that apply') != -1:
+            field['category'] = 'generic-referral'
+    return field
+
+def report_identified_fields(fields: List[Dict[str, Any]], cache_key: Optional[str]) -> None:
+    print(f'✅ Identified {len(fields)} form fields')
+    mapped_count = sum(1 for f in fields if f.get('options'))
+    if mapped_count > 0:
+        print(f'   📋 {mapped_count} field(s) have dropdown options from sections')
+    
+    if cache_key and fields:
+        get_form_cache().put(cache_key, fields)
+
+def build_shard_prompts(request: Dict[str, Any], profile_dict: Dict[str, Any], shard_size: int) -> List[str]:
+    prompts = []
+    for chunk in chunk_schema(request['schema'], shard_size):
+        referenced = {entry['options'][1:] for entry in chunk if isinstance(entry.get('options'), str) and entry['options'].startswith('@')}
+        chunk_sections = {section_id: data for section_id, data in request['sections'].items() if section_id in referenced}
+        prompts.append(build_identify_prompt(request['form_label'], schema_to_prompt(chunk), chunk_sections, profile_dict))
+    return prompts
+
+async def generate_shards_async(prompts: List[str], concurrency: int) -> List[Any]:
+    client = get_ai_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run(prompt):
+        async with semaphore:
+            return await client.agenerate(prompt)
+    
+    return await asyncio.gather(*(run(prompt) for prompt in prompts), return_exceptions=True)
+
+def merge_shard_fields(responses: List[Any], sections: Dict[str, Any]) -> (List[Dict[str, Any]], int):
+    fields = []
+    seen = set()
+    failed = 0
+    for idx, response in enumerate(responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            shard_fields = parse_json_response(response)
+        except Exception as e:
+            failed += 1
+            print(f'   ⚠️  Shard {idx + 1}/{len(responses)} failed: {e}')
+            continue
+        for field in shard_fields:
+            key = field.get('selector') or field.get('id') or field.get('name')
+            if key and key in seen:
+                continue
+            if key:
+                seen.add(key)
+            fields.append(attach_section_options(field, sections))
+    return fields, failed
+
+def identify_form_fields_sharded(request: Dict[str, Any], profile_dict: Dict[str, Any], shard_size: int, shard_concurrency: int) -> List[Dict[str, Any]]:
+    prompts = build_shard_prompts(request, profile_dict, shard_size)
+    print(f"   🧩 Sharded {len(request['schema'])} control(s) into {len(prompts)} request(s) of ≤{shard_size}, concurrency {shard_concurrency}")
+    started = time.perf_counter()
+    responses = get_ai_client().run(generate_shards_async(prompts, shard_concurrency))
+    fields, failed = merge_shard_fields(responses, request['sections'])
+    fields = request['local_fields'] + fields
+    print(f'   ⏱️  Shards finished after {time.perf_counter() - started:.2f}s')
+    report_identified_fields(fields, request['cache_key'] if not failed else None)
+    return fields
+
+def identify_form_fields(html: Union[str, CleanDocument], profile_dict: Dict[str, Any], use_cache: bool = False, compact: bool = True, shard_size: int = None, shard_concurrency: int = 4) -> List[Dict[str, Any]]:  
+    print('🔍 Identifying form fields using AI...')
+    
+    request = prepare_identify_request(html, profile_dict, use_cache, compact, include_section=bool(shard_size))
+    if request['cached_fields'] is not None:
+        print(f"✅ Identified {len(request['cached_fields'])} form fields (cached structure)")
+        return request['cached_fields']
+    
+    if request['prompt'] is None:
+        report_identified_fields(request['local_fields'], request['cache_key'])
+        return request['local_fields']
+    
+    if shard_size and request['mode'] == 'schema' and len(request['schema']) > shard_size:
+        return identify_form_fields_sharded(request, profile_dict, shard_size, shard_concurrency)
+    
     try:
-        model = get_gemini_model()
-        response = model.generate_content(prompt)
-        
-        response_text = response.text.strip()
-        
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
-        
-        fields = json.loads(response_text)
+        fields = parse_json_response(get_ai_client().generate(request['prompt']))
         for field in fields:
-            field_id = field.get('id', '')
-            field_name = field.get('name', '')
-            field_category = field.get('category', 'custom')
-            
-            if field_id and field_id in sections:
-                section_options = sections[field_id]['options']
-                if section_options:
-                    field['options'] = section_options
-            
-            if not field.get('options') and field.get('fieldType') == 'checkbox-group':
-                if field.get('label', '').lower().find('click all that apply') != -1:
-                    field['category'] = 'generic-referral'
-        
-        print(f'✅ Identified {len(fields)} form fields')
-        mapped_count = sum(1 for f in fields if f.get('options'))
-        if mapped_count > 0:
-            print(f'   📋 {mapped_count} field(s) have dropdown options from sections')
+            attach_section_options(field, request['sections'])
+        fields = request['local_fields'] + fields
         
+        report_identified_fields(fields, request['cache_key'])
         return fields
         
     except Exception as e:
@@ -210,9 +269,86 @@ def identify_form_fields(html: str, profile_dict: Dict[str, Any], use_cache: boo
         traceback.print_exc()
         return []
 
-def match_profile_to_dropdown_options(profile_value: str, options: List[str], field_label: str = "") -> Optional[str]:
+def identify_form_fields_stream(html: Union[str, CleanDocument], profile_dict: Dict[str, Any], use_cache: bool = False, compact: bool = True) -> Iterator[Dict[str, Any]]:
+    print('🔍 Identifying form fields using AI (streaming)...')
+    started = time.perf_counter()
+    
+    request = prepare_identify_request(html, profile_dict, use_cache, compact)
+    if request['cached_fields'] is not None:
+        print(f"✅ Identified {len(request['cached_fields'])} form fields (cached structure)")
+        yield from request['cached_fields']
+        return
+    
+    fields = list(request['local_fields'])
+    yield from fields
+    if request['prompt'] is None:
+        report_identified_fields(fields, request['cache_key'])
+        return
+    
+    parser = JSONArrayStreamParser()
+    try:
+        for chunk in get_ai_client().stream(request['prompt']):
+            for field in parser.feed(chunk):
+                if len(fields) == len(request['local_fields']):
+                    print(f'   ⚡ First field parsed after {time.perf_counter() - started:.2f}s')
+                fields.append(attach_section_options(field, request['sections']))
+                yield field
+            if parser.finished:
+                break
+    except Exception as e:
+        print(f'❌ Error identifying fields: {e}')
+        import traceback
+        traceback.print_exc()
+        return
+    
+    if parser.errors:
+        print(f'   ⚠️  Skipped {parser.errors} malformed field object(s)')
+    print(f'   ⏱️  Stream finished after {time.perf_counter() - started:.2f}s')
+    report_identified_fields(fields, request['cache_key'] if parser.finished and not parser.errors else None)
+
+def suggest_field_answers(fields: List[Dict[str, Any]], profile_dict: Dict[str, Any]) -> int:
+    pending = [idx for idx, field in enumerate(fields) if field.get('category', 'custom') == 'custom']
+    if not pending:
+        return 0
+    
+    questions = []
+    for idx in pending:
+        field = fields[idx]
+        question = {'index': idx, 'label': field.get('label'), 'fieldType': field.get('fieldType'), 'required': field.get('required', False)}
+        if field.get('options'):
+            question['options'] = field['options']
+        questions.append(question)
+    
+    prompt = f"""Answer these job application form questions for the candidate below.
+
+    QUESTIONS:
+    {json.dumps(questions, indent=2)}
+
+    PROFILE DATA:
+    {json.dumps(profile_dict, indent=2)}
+
+    - If a question has options, answer with one of the exact option texts
+    - Leave out questions that cannot be answered from the profile
+    - Return ONLY a JSON object mapping each question index to its answer, e.g. {{"3": "Yes"}}"""
+    
+    try:
+        answers = parse_json_response(get_ai_client().generate(prompt))
+    except Exception as e:
+        print(f'   ⚠️  Could not generate answers for cached fields: {e}')
+        return 0
+    
+    answered = 0
+    for idx in pending:
+        answer = answers.get(str(idx))
+        if answer is not None and answer != '':
+            fields[idx]['suggestedValue'] = answer
+            answered += 1
+    print(f'   💬 Generated {answered}/{len(pending)} profile-specific answer(s)')
+    return answered
+
+def match_option_locally(profile_value: str, options: List[str], field_label: str = "") -> (Optional[str], bool):
     if not profile_value or not options:
-        return None
+        return None, True
     
     profile_value_clean = str(profile_value).strip().lower()
     field_label_lower = str(field_label).lower()
@@ -221,22 +357,27 @@ def match_profile_to_dropdown_options(profile_value: str, options: List[str], fi
         for option in options:
             option_clean = str(option).strip().lower()
             if profile_value_clean == option_clean:
-                return option
-        return None
+                return option, True
+        return None, True
     
+    option, score = best_option(profile_value, options, field_label)
+    if option is not None and score >= CONFIDENCE_THRESHOLD:
+        return option, True
+    
+    return None, False
+
+def resolve_option_text(matched: str, options: List[str]) -> Optional[str]:
+    if matched in options:
+        return matched
+    
+    matched_lower = matched.lower()
     for option in options:
-        option_clean = str(option).strip().lower()
-        
-        if profile_value_clean == option_clean:
+        if option.lower() == matched_lower or matched_lower in option.lower() or option.lower() in matched_lower:
             return option
-        
-        if profile_value_clean in option_clean or option_clean in profile_value_clean:
-            return option
-    
-    try:
-        model = get_gemini_model()
-        
-        prompt = f"""Match this profile value to the best dropdown option.
+    return None
+
+def build_option_match_prompt(profile_value: str, options: List[str], field_label: str = "") -> str:
+    return f"""Match this profile value to the best dropdown option.
 
         Profile Value: "{profile_value}"
         Field Label: "{field_label}"
@@ -251,27 +392,100 @@ def match_profile_to_dropdown_options(profile_value: str, options: List[str], fi
 
         Return ONLY the exact option text that best matches, nothing else."""
 
-        response = model.generate_content(prompt)
-        matched = response.text.strip()
-        
-        if matched in options:
-            return matched
-        
-        matched_lower = matched.lower()
-        for option in options:
-            if option.lower() == matched_lower or matched_lower in option.lower() or option.lower() in matched_lower:
-                return option
+def resolve_option_answer(answer: str, options: List[str]) -> Optional[str]:
+    matched = resolve_option_text(answer.strip(), options)
+    if matched:
+        return matched
+    
+    if len(options) > 0:
+        return options[0]
+    
+    return None
+
+def match_profile_to_dropdown_options(profile_value: str, options: List[str], field_label: str = "") -> Optional[str]:
+    matched, resolved = match_option_locally(profile_value, options, field_label)
+    if resolved:
+        return matched
+    
+    try:
+        answer = get_ai_client().generate(build_option_match_prompt(profile_value, options, field_label))
+        return resolve_option_answer(answer, options)
         
-        if len(options) > 0:
+    except Exception as e:
+        if options:
             return options[0]
-        
         return None
+
+async def match_profile_to_dropdown_options_async(profile_value: str, options: List[str], field_label: str = "") -> Optional[str]:
+    matched, resolved = match_option_locally(profile_value, options, field_label)
+    if resolved:
+        return matched
+    
+    try:
+        answer = await get_ai_client().agenerate(build_option_match_prompt(profile_value, options, field_label))
+        return resolve_option_answer(answer, options)
         
     except Exception as e:
         if options:
             return options[0]
         return None
 
+async def match_many_dropdown_options_async(items: List[Dict[str, Any]]) -> List[Optional[str]]:
+    return await asyncio.gather(*(
+        match_profile_to_dropdown_options_async(str(item['value']), item['options'], item.get('label', ''))
+        for item in items
+    ))
+
+def batch_match_dropdown_options(items: List[Dict[str, Any]]) -> List[Optional[str]]:
+    results = [None] * len(items)
+    unresolved = []
+    for idx, item in enumerate(items):
+        matched, resolved = match_option_locally(item['value'], item['options'], item.get('label', ''))
+        if resolved:
+            results[idx] = matched
+        else:
+            unresolved.append(idx)
+    
+    if not unresolved:
+        return results
+    
+    print(f'   🧮 Matching {len(unresolved)} dropdown value(s) in one AI request ({len(items) - len(unresolved)} resolved locally)')
+    requests = [
+        {'index': idx, 'value': str(items[idx]['value']), 'label': items[idx].get('label', ''), 'options': items[idx]['options']}
+        for idx in unresolved
+    ]
+    prompt = f"""Match each profile value to the best option of its dropdown.
+
+    ITEMS:
+    {json.dumps(requests, indent=2)}
+
+    Examples:
+    - "Bachelor of Science" should match "Bachelor's Degree"
+    - "BS" should match "Bachelor's Degree"
+    - "USA" should match "United States"
+
+    Return ONLY a JSON object mapping each item index to the exact option text that best matches, e.g. {{"0": "United States"}}"""
+    
+    answers = {}
+    try:
+        answers = parse_json_response(get_ai_client().generate(prompt))
+    except Exception as e:
+        print(f'   ⚠️  Batched option matching failed: {e}')
+    
+    retry = []
+    for idx in unresolved:
+        item = items[idx]
+        answer = answers.get(str(idx)) if isinstance(answers, dict) else None
+        results[idx] = resolve_option_text(str(answer), item['options']) if answer else None
+        if results[idx] is None:
+            retry.append(idx)
+    
+    if retry:
+        matches = get_ai_client().run(match_many_dropdown_options_async([items[idx] for idx in retry]))
+        for idx, matched in zip(retry, matches):
+            results[idx] = matched
+    return results
+
 def generate_referral_answer(field: Dict[str, Any], profile_dict: Dict[str, Any], options: List[str]) -> Optional[str]:
     label = (field.get('label') or '').lower()
     
@@ -296,82 +510,205 @@ def generate_referral_answer(field: Dict[str, Any], profile_dict: Dict[str, Any]
     
     return None
 
-def map_fields_to_profile(fields: List[Dict[str, Any]], profile_dict: Dict[str, Any]) -> Dict[str, Any]:
-    print('🎯 Mapping profile data to fields...')
-    
-    field_values = {}
-    field_mapping = {
-        'firstName': 'firstName',
-        'lastName': 'lastName',
-        'email': 'email',
-        'phone': 'phone',
-        'address': 'address',
-        'city': 'city',
-        'state': 'state',
-        'zipCode': 'zipCode',
-        'country': 'country',
-        'currentCompany': 'currentCompany',
-        'currentJobTitle': 'currentJobTitle',
-        'yearsOfExperience': 'yearsOfExperience',
-        'linkedinUrl': 'linkedinUrl',
-        'githubUrl': 'githubUrl',
-        'portfolioUrl': 'portfolioUrl',
-        'highestDegree': 'highestDegree',
-        'university': 'university',
-        'graduationYear': 'graduationYear',
-        'fieldOfStudy': 'fieldOfStudy',
-        'gpa': 'gpa',
-        'expectedSalary': 'expectedSalary',
-        'workAuthorization': 'workAuthorization',
-        'requiresSponsorship': 'requiresSponsorship',
-        'willingToRelocate': 'willingToRelocate',
-        'availableStartDate': 'availableStartDate',
-        'technicalSkills': 'technicalSkills',
-        'resumeUrl': 'resumeUrl',
-        'coverLetterUrl': 'coverLetterUrl',
-        'whyThisCompany': 'whyThisCompany',
-        'gender': 'gender',
-        'veteranStatus': 'veteranStatus',
-        'disabilityStatus': 'disabilityStatus',
-        'race': 'race'
+LABEL_PATTERNS = [
+    (r'first[\s_-]?name|fname|first$', 'firstName'),
+    (r'last[\s_-]?name|lname|last$|surname', 'lastName'),
+    (r'^email$|e-?mail', 'email'),
+    (r'^phone$|telephone|mobile|tel', 'phone'),
+    (r'^address$|street[\s_-]?address', 'address'),
+    (r'^city$|town', 'city'),
+    (r'^state$|province|region', 'state'),
+    (r'zip|postal[\s_-]?code|postcode', 'zipCode'),
+    (r'^country$|nation', 'country'),
+    (r'current[\s_-]?company|current[\s_-]?employer|^company$|^employer$', 'currentCompany'),
+    (r'current[\s_-]?job[\s_-]?title|^job[\s_-]?title$|^title$|^position$|^role$', 'currentJobTitle'),
+    (r'years?[\s_-]?(of[\s_-]?)?experience|experience[\s_-]?years?', 'yearsOfExperience'),
+    (r'linkedin|linked[\s_-]?in', 'linkedinUrl'),
+    (r'github|git[\s_-]?hub', 'githubUrl'),
+    (r'portfolio|personal[\s_-]?website|^website$', 'portfolioUrl'),
+    (r'^degree$|education[\s_-]?level|highest[\s_-]?degree|qualification', 'highestDegree'),
+    (r'university|college|school|institution', 'university'),
+    (r'graduation[\s_-]?year|year[\s_-]?(of[\s_-]?)?graduation', 'graduationYear'),
+    (r'field[\s_-]?of[\s_-]?study|major|specialization', 'fieldOfStudy'),
+    (r'gpa|grade[\s_-]?point', 'gpa'),
+    (r'expected[\s_-]?salary|desired[\s_-]?salary', 'expectedSalary'),
+    (r'work[\s_-]?authorization|legally[\s_-]?authorized', 'workAuthorization'),
+    (r'require.*sponsor|visa[\s_-]?sponsor|need.*sponsor', 'requiresSponsorship'),
+    (r'willing[\s_-]?to[\s_-]?relocate|able[\s_-]?to[\s_-]?relocate', 'willingToRelocate'),
+    (r'available|start[\s_-]?date|notice[\s_-]?period|joining[\s_-]?date', 'availableStartDate'),
+    (r'technical[\s_-]?skills|skills|technologies', 'technicalSkills'),
+    (r'resume|cv|resume/cv', 'resumeUrl'),
+    (r'cover[\s_-]?letter', 'coverLetterUrl'),
+    (r'why|interest|motivated|excited', 'whyThisCompany'),
+    (r'gender|\bsex\b', 'gender'),
+    (r'veteran|military', 'veteranStatus'),
+    (r'disability|disabled', 'disabilityStatus'),
+    (r'race|racial|ethnicity|ethnic', 'race'),
+]
+
+def split_top_level_branches(pattern: str) -> List[str]:
+    branches = []
+    depth = 0
+    current = ''
+    for char in pattern:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if char == '|' and depth == 0:
+            branches.append(current)
+            current = ''
+        else:
+            current += char
+    branches.append(current)
+    return branches
+
+def required_literal(branch: str) -> Optional[str]:
+    stripped = re.sub(r'\([^)]*\)\?|\[[^\]]*\]\??|\.\*|\\[a-zA-Z]|[\^$]', ' ', branch)
+    stripped = re.sub(r'.\?', ' ', stripped)
+    runs = re.findall(r'[a-z/-]+', stripped)
+    return max(runs, key=len) if runs else None
+
+def build_label_rules(patterns: List[tuple]) -> List[tuple]:
+    rules = []
+    for pattern, key in patterns:
+        keywords = [required_literal(branch) for branch in split_top_level_branches(pattern)]
+        keywords = None if None in keywords else tuple(dict.fromkeys(keywords))
+        rules.append((re.compile(pattern).search, keywords, key))
+    return rules
+
+LABEL_RULES = build_label_rules(LABEL_PATTERNS)
+
+def classify_field_identifier(field_identifier: str) -> Optional[str]:
+    for search, keywords, key in LABEL_RULES:
+        if keywords is not None and not any(keyword in field_identifier for keyword in keywords):
+            continue
+        if search(field_identifier):
+            return key
+    return None
+
+def classify_field_identifiers(field_identifiers: List[str]) -> List[Optional[str]]:
+    classified = {identifier: classify_field_identifier(identifier) for identifier in dict.fromkeys(field_identifiers)}
+    return [classified[identifier] for identifier in field_identifiers]
+
+LOCAL_LABEL_MAX_WORDS = 5
+TEXT_INPUT_TYPES = {'', 'text', 'email', 'tel', 'url', 'number', 'search'}
+CONSENT_PATTERN = re.compile(r'consent|demographic')
+ACKNOWLEDGMENT_PATTERN = re.compile(r'privacy|acknowledg|terms (of|and)|\bpolicy\b|i have read|i agree|i understand|i certify')
+REFERRAL_PATTERN = re.compile(r'how did you (hear|find|learn)|where did you (hear|find|learn|see)|referral source|source of (referral|application)|how were you referred')
+CLASSIFICATION_STATS: List[Dict[str, Any]] = []
+
+def group_choice_entries(schema: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    groups = {}
+    for idx, entry in enumerate(schema):
+        if entry.get('type') in ('radio', 'checkbox') and entry.get('name'):
+            key = (entry['type'], entry['name'])
+        else:
+            key = ('control', idx)
+        groups.setdefault(key, []).append(entry)
+    return list(groups.values())
+
+def resolve_entry_options(entry: Dict[str, Any], sections: Dict[str, Any]) -> List[str]:
+    options = entry.get('options')
+    if isinstance(options, str) and options.startswith('@'):
+        return sections.get(options[1:], {}).get('options') or []
+    return options or []
+
+def build_local_field(entry: Dict[str, Any], field_type: str, category: str, label: str, options: List[str] = None) -> Dict[str, Any]:
+    field = {
+        'selector': f"#{entry['id']}" if entry.get('id') else f"[name='{entry.get('name')}']",
+        'id': entry.get('id', ''),
+        'name': entry.get('name', ''),
+        'fieldType': field_type,
+        'label': label,
+        'required': bool(entry.get('required')),
+        'category': category,
     }
+    if entry.get('placeholder'):
+        field['placeholder'] = entry['placeholder']
+    if options:
+        field['options'] = options
+    return field
+
+def classify_entry_locally(group: List[Dict[str, Any]], sections: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    entry = group[0]
+    control_type = entry.get('type', '')
+    label = entry.get('label', '')
+    question = entry.get('group') or label
     
-    label_mapping = {
-        r'first[\s_-]?name|fname|first$': 'firstName',
-        r'last[\s_-]?name|lname|last$|surname': 'lastName',
-        r'^email$|e-?mail': 'email',
-        r'^phone$|telephone|mobile|tel': 'phone',
-        r'^address$|street[\s_-]?address': 'address',
-        r'^city$|town': 'city',
-        r'^state$|province|region': 'state',
-        r'zip|postal[\s_-]?code|postcode': 'zipCode',
-        r'^country$|nation': 'country',
-        r'current[\s_-]?company|current[\s_-]?employer|^company$|^employer$': 'currentCompany',
-        r'current[\s_-]?job[\s_-]?title|^job[\s_-]?title$|^title$|^position$|^role$': 'currentJobTitle',
-        r'years?[\s_-]?(of[\s_-]?)?experience|experience[\s_-]?years?': 'yearsOfExperience',
-        r'linkedin|linked[\s_-]?in': 'linkedinUrl',
-        r'github|git[\s_-]?hub': 'githubUrl',
-        r'portfolio|personal[\s_-]?website|^website$': 'portfolioUrl',
-        r'^degree$|education[\s_-]?level|highest[\s_-]?degree|qualification': 'highestDegree',
-        r'university|college|school|institution': 'university',
-        r'graduation[\s_-]?year|year[\s_-]?(of[\s_-]?)?graduation': 'graduationYear',
-        r'field[\s_-]?of[\s_-]?study|major|specialization': 'fieldOfStudy',
-        r'gpa|grade[\s_-]?point': 'gpa',
-        r'expected[\s_-]?salary|desired[\s_-]?salary': 'expectedSalary',
-        r'work[\s_-]?authorization|legally[\s_-]?authorized': 'workAuthorization',
-        r'require.*sponsor|visa[\s_-]?sponsor|need.*sponsor': 'requiresSponsorship',
-        r'willing[\s_-]?to[\s_-]?relocate|able[\s_-]?to[\s_-]?relocate': 'willingToRelocate',
-        r'available|start[\s_-]?date|notice[\s_-]?period|joining[\s_-]?date': 'availableStartDate',
-        r'technical[\s_-]?skills|skills|technologies': 'technicalSkills',
-        r'resume|cv|resume/cv': 'resumeUrl',
-        r'cover[\s_-]?letter': 'coverLetterUrl',
-        r'why|interest|motivated|excited': 'whyThisCompany',
-        r'gender|\bsex\b': 'gender',
-        r'veteran|military': 'veteranStatus',
-        r'disability|disabled': 'disabilityStatus',
-        r'race|racial|ethnicity|ethnic': 'race'
-    }
+    if control_type == 'radio':
+        return None
+    
+    if control_type == 'checkbox':
+        if len(group) > 1:
+            if REFERRAL_PATTERN.search(question.lower()):
+                options = [e.get('label') or e.get('value') for e in group if e.get('label') or e.get('value')]
+                return build_local_field(entry, 'checkbox-group', 'generic-referral', question, options)
+            return None
+        text = f'{question} {label}'.lower()
+        if CONSENT_PATTERN.search(text):
+            return build_local_field(entry, 'checkbox', 'consent', question)
+        if ACKNOWLEDGMENT_PATTERN.search(text):
+            return build_local_field(entry, 'checkbox', 'acknowledgment', question)
+        return None
+    
+    if entry['tag'] == 'select' or entry.get('role') == 'combobox':
+        field_type = 'select' if entry['tag'] == 'select' else 'autocomplete'
+        options = resolve_entry_options(entry, sections)
+        if options and REFERRAL_PATTERN.search(label.lower()):
+            return build_local_field(entry, field_type, 'generic-referral', label, options)
+    elif entry['tag'] == 'input' and control_type in TEXT_INPUT_TYPES | {'file'}:
+        field_type = control_type if control_type in ('email', 'tel', 'file') else 'text'
+        options = None
+    else:
+        return None
+    
+    if not label or label.endswith('?') or len(label.split()) > LOCAL_LABEL_MAX_WORDS:
+        return None
+    profile_key = classify_field_identifier(f"{label} {entry.get('id', '')} {entry.get('name', '')}".lower())
+    if not profile_key or (profile_key in PROFILE_FILE_KEYS) != (field_type == 'file'):
+        return None
+    return build_local_field(entry, field_type, 'direct-mapping', label, options)
+
+def classify_schema_locally(schema: List[Dict[str, Any]], sections: Dict[str, Any]) -> (List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]):
+    local_fields = []
+    residual = []
+    rules = {}
+    groups = group_choice_entries(schema)
+    for group in groups:
+        field = classify_entry_locally(group, sections)
+        if field is None:
+            residual.extend(group)
+            continue
+        local_fields.append(field)
+        rules[field['category']] = rules.get(field['category'], 0) + 1
     
+    stats = {'controls': len(groups), 'local': len(local_fields), 'llm': len(groups) - len(local_fields), 'rules': rules}
+    stats['avoidance'] = stats['local'] / stats['controls'] if stats['controls'] else 0.0
+    CLASSIFICATION_STATS.append(stats)
+    print(f"   🧮 Rules resolved {stats['local']}/{stats['controls']} control(s) locally ({stats['avoidance']:.0%} kept out of the LLM)"
+          + (': ' + ', '.join(f'{n} {rule}' for rule, n in rules.items()) if rules else ''))
+    return local_fields, residual, stats
+
+def get_classification_stats() -> Dict[str, Any]:
+    controls = sum(s['controls'] for s in CLASSIFICATION_STATS)
+    local = sum(s['local'] for s in CLASSIFICATION_STATS)
+    return {'forms': len(CLASSIFICATION_STATS), 'controls': controls, 'local': local, 'llm': controls - local, 'avoidance': local / controls if controls else 0.0}
+
+def print_classification_stats() -> None:
+    s = get_classification_stats()
+    print(f"   🧮 {s['forms']} form pass(es): {s['local']}/{s['controls']} control(s) resolved by rules, "
+          f"{s['llm']} sent to the LLM (avoidance {s['avoidance']:.0%})")
+
+def reset_classification_stats() -> None:
+    CLASSIFICATION_STATS.clear()
+
+def map_fields_to_profile(fields: List[Dict[str, Any]], profile_dict: Dict[str, Any], verbose: bool = True) -> Dict[str, Any]:
+    if verbose:
+        print('🎯 Mapping profile data to fields...')
+    
+    field_values = {}
+    pending_matches = []
     for field in fields:
         label = (field.get('label') or '').lower()
         field_id = (field.get('id') or '').lower()
@@ -410,27 +747,14 @@ def map_fields_to_profile(fields: List[Dict[str, Any]], profile_dict: Dict[str,
         
         if suggested_value is not None and suggested_value != '':
             if options and field_type in ['select', 'autocomplete']:
-                matched_value = match_profile_to_dropdown_options(
-                    str(suggested_value), options, field.get('label', '')
-                )
-                if matched_value:
-                    field_values[field_label] = matched_value
-                    print(f'  ✅ {field_label}: {suggested_value} → {matched_value} (AI suggested, matched)')
-                else:
-                    field_values[field_label] = suggested_value
-                    print(f'  ✅ {field_label}: {suggested_value} (AI suggested)')
+                pending_matches.append({'field_label': field_label, 'value': suggested_value, 'options': options, 'label': field.get('label', ''), 'source': 'suggested'})
             else:
                 field_values[field_label] = suggested_value
                 print(f'  ✅ {field_label}: {suggested_value} (AI suggested)')
             continue
         
-        profile_key = None
         field_identifier = f"{label} {field_id} {field_name}".lower()
-        
-        for pattern, key in label_mapping.items():
-            if re.search(pattern, field_identifier):
-                profile_key = key
-                break
+        profile_key = classify_field_identifier(field_identifier)
         
         if profile_key and profile_key in profile_dict:
             value = profile_dict[profile_key]
@@ -439,16 +763,7 @@ def map_fields_to_profile(fields: List[Dict[str, Any]], profile_dict: Dict[str,
                 continue
             
             if options and field_type in ['select', 'autocomplete']:
-                matched_value = match_profile_to_dropdown_options(
-                    str(value), options, field.get('label', '')
-                )
-                if matched_value:
-                    field_values[field_label] = matched_value
-                    print(f'  ✅ {field_label}: "{value}" → "{matched_value}"')
-                else:
-                    if options:
-                        field_values[field_label] = value
-                        print(f'  ⚠️  {field_label}: "{value}" (no match found in {len(options)} options)')
+                pending_matches.append({'field_label': field_label, 'value': value, 'options': options, 'label': field.get('label', ''), 'source': 'profile'})
             else:
                 if profile_key == 'requiresSponsorship':
                     value = 'Yes' if value else 'No'
@@ -458,5 +773,50 @@ def map_fields_to_profile(fields: List[Dict[str, Any]], profile_dict: Dict[str,
                 field_values[field_label] = value
                 print(f'  ✅ {field_label}: {value}')
     
-    print(f'✅ Mapped {len(field_values)} field(s)')
-    return field_values
\ No newline at end of file
+    matches = batch_match_dropdown_options(pending_matches)
+    for item, matched_value in zip(pending_matches, matches):
+        field_label = item['field_label']
+        value = item['value']
+        if item['source'] == 'suggested':
+            if matched_value:
+                field_values[field_label] = matched_value
+                print(f'  ✅ {field_label}: {value} → {matched_value} (AI suggested, matched)')
+            else:
+                field_values[field_label] = value
+                print(f'  ✅ {field_label}: {value} (AI suggested)')
+        else:
+            if matched_value:
+                field_values[field_label] = matched_value
+                print(f'  ✅ {field_label}: "{value}" → "{matched_value}"')
+            else:
+                field_values[field_label] = value
+                print(f'  ⚠️  {field_label}: "{value}" (no match found in {len(item["options"])} options)')
+    
+    if verbose:
+        print(f'✅ Mapped {len(field_values)} field(s)')
+    return field_values
+
+def fill_remaining_fields(pending: List[Dict[str, Any]], sections: Dict[str, Any], profile_dict: Dict[str, Any]) -> (List[Dict[str, Any]], Dict[str, Any]):
+    if not pending:
+        return [], {}
+    
+    reasons = {}
+    for entry in pending:
+        reasons[entry.get('reason', 'empty')] = reasons.get(entry.get('reason', 'empty'), 0) + 1
+    schema = [{k: v for k, v in entry.items() if k != 'reason'} for entry in pending]
+    print(f"🔍 Identifying {len(schema)} remaining control(s) ({', '.join(f'{n} {r}' for r, n in reasons.items())})")
+    local_fields, residual, _ = classify_schema_locally(schema, sections)
+    
+    fields = []
+    if residual:
+        prompt = build_identify_prompt(SCHEMA_FORM_LABEL, schema_to_prompt(residual), sections, profile_dict)
+        print(f'   📉 Sending {len(residual)} control(s) to the LLM, ~{estimate_tokens(prompt)} prompt tokens')
+        try:
+            fields = parse_json_response(get_ai_client().generate(prompt))
+        except Exception as e:
+            print(f'❌ Error identifying remaining fields: {e}')
+        for field in fields:
+            attach_section_options(field, sections)
+    fields = local_fields + fields
+    print(f'✅ Identified {len(fields)} remaining field(s)')
+    return fields, map_fields_to_profile(fields, profile_dict)
@@ -0,0 +1,159 @@
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from form_schema import estimate_tokens
+
+def schema_entries(prompt: str):
+    entries = []
+    for line in prompt.splitlines():
+        line = line.strip()
+        if not (line.startswith('{') and line.endswith('}')):
+            continue
+        try:
+            entry = json.loads(line)
+        except:
+            continue
+        if isinstance(entry, dict) and 'tag' in entry:
+            entries.append(entry)
+    return entries
+
+def entry_to_field(entry):
+    selector = f"#{entry['id']}" if entry.get('id') else f"[name='{entry.get('name')}']"
+    if entry['tag'] == 'select':
+        field_type = 'select'
+    elif entry.get('role') == 'combobox':
+        field_type = 'autocomplete'
+    elif entry['tag'] == 'textarea':
+        field_type = 'text'
+    else:
+        field_type = entry.get('type') or 'text'
+    field = {
+        'selector': selector,
+        'id': entry.get('id', ''),
+        'name': entry.get('name', ''),
+        'fieldType': field_type,
+        'label': entry.get('label') or entry.get('group') or entry.get('name') or entry.get('id'),
+        'required': bool(entry.get('required')),
+        'category': 'custom' if entry['tag'] == 'textarea' else 'direct-mapping',
+    }
+    if isinstance(entry.get('options'), list):
+        field['options'] = entry['options']
+    if entry.get('placeholder'):
+        field['placeholder'] = entry['placeholder']
+    return field
+
+def answer_prompt(prompt: str) -> str:
+    if 'identify all form fields' in prompt:
+        return json.dumps([entry_to_field(entry) for entry in schema_entries(prompt)], indent=2)
+    if 'Match this profile value to the best dropdown option' in prompt:
+        options = re.findall(r'^\s*\d+\. (.+)$', prompt, re.MULTILINE)
+        return options[0] if options else ''
+    return '{}'
+
+class StubState:
+    def __init__(self, latency: float = 0.2, token_delay: float = 0.0, fail_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.active = 0
+        self.peak_active = 0
+
+def make_handler(state: StubState):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_stream(self, text, piece_size=64):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            time.sleep(state.latency)
+            for start in range(0, len(text), piece_size):
+                piece = text[start:start + piece_size]
+                time.sleep(state.token_delay * estimate_tokens(piece))
+                data = piece.encode('utf-8')
+                self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            prompt = json.loads(self.rfile.read(length) or b'{}').get('prompt', '')
+            with state.lock:
+                state.requests += 1
+                state.active += 1
+                state.peak_active = max(state.peak_active, state.active)
+                fail = state.random.random() < state.fail_rate
+                if fail:
+                    state.failures += 1
+            try:
+                if fail:
+                    self.send_json(state.random.choice([429, 503]), {'error': 'stub failure'})
+                    return
+                text = answer_prompt(prompt)
+                if self.path == '/stream':
+                    self.send_stream(text)
+                    return
+                time.sleep(state.latency + state.token_delay * estimate_tokens(text))
+                self.send_json(200, {'text': text})
+            finally:
+                with state.lock:
+                    state.active -= 1
+
+    return StubHandler
+
+class StubServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+def start_stub_server(port: int = 0, **state_options):
+    state = StubState(**state_options)
+    server = StubServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the AI provider (set AI_PROVIDER_URL to its address)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, latency=args.latency, token_delay=args.token_delay, fail_rate=args.fail_rate)
+    print(f'🤖 AI stub listening on {url}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ai_client import AIClient, HTTPProvider, set_ai_client
+from ai_stub_server import start_stub_server
+from ai_service import batch_match_dropdown_options
+
+REQUESTS = 24
+LATENCY = 0.25
+CONCURRENCY = 6
+
+def option_prompt(i):
+    return f"Match this profile value to the best dropdown option.\n\n        Profile Value: \"value {i}\"\n        Available Options:\n        1. Option A\n        2. Option B"
+
+def bench_sync_vs_async(url):
+    client = AIClient(HTTPProvider(url), max_concurrency=CONCURRENCY, backoff=0.05)
+    prompts = [option_prompt(i) for i in range(REQUESTS)]
+
+    start = time.perf_counter()
+    for prompt in prompts:
+        client.generate(prompt)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    answers = asyncio.run(client.agenerate_many(prompts))
+    concurrent = time.perf_counter() - start
+
+    assert answers == ['Option A'] * REQUESTS
+    print(f"   Sequential sync:   {sequential:.2f}s for {REQUESTS} request(s)")
+    print(f"   Async (limit {CONCURRENCY}):   {concurrent:.2f}s ({sequential / concurrent:.1f}x)")
+    client.close()
+
+def bench_mixed_limit():
+    server, url = start_stub_server(latency=0.05)
+    client = AIClient(HTTPProvider(url), max_concurrency=CONCURRENCY)
+    prompts = [option_prompt(i) for i in range(REQUESTS)]
+    workers = [threading.Thread(target=lambda: [client.generate(prompt) for prompt in prompts[:4]]) for _ in range(CONCURRENCY)]
+    for worker in workers:
+        worker.start()
+    client.run(client.agenerate_many(prompts))
+    for worker in workers:
+        worker.join()
+    print(f"   Sync threads + async batch together: peak {server.state.peak_active} concurrent (limit {CONCURRENCY})")
+    assert server.state.peak_active <= CONCURRENCY
+    client.close()
+    server.shutdown()
+
+def bench_retries():
+    server, url = start_stub_server(latency=0.01, fail_rate=0.3, seed=3)
+    client = AIClient(HTTPProvider(url), max_concurrency=CONCURRENCY, max_retries=6, backoff=0.02, max_backoff=0.2)
+    answers = asyncio.run(client.agenerate_many([option_prompt(i) for i in range(REQUESTS)]))
+    metrics = client.get_metrics()
+    assert answers == ['Option A'] * REQUESTS
+    print(f"   {server.state.failures} injected 429/503 response(s) absorbed by {metrics['retries']} retr(ies), "
+          f"{metrics['failures']} request(s) failed")
+    client.close()
+    server.shutdown()
+
+def bench_dropdown_fallback(url):
+    previous = set_ai_client(AIClient(HTTPProvider(url), max_concurrency=CONCURRENCY))
+    items = [{'value': f'Unusual answer {i}', 'options': ['Alpha', 'Beta', 'Gamma'], 'label': f'Question {i}'} for i in range(12)]
+    start = time.perf_counter()
+    matches = batch_match_dropdown_options(items)
+    elapsed = time.perf_counter() - start
+    print(f"   Batched dropdown fallback for {len(items)} field(s): {elapsed:.2f}s -> {matches[:3]}...")
+    set_ai_client(previous)
+
+def main():
+    server, url = start_stub_server(latency=LATENCY)
+    print(f"🤖 Stub provider at {url} ({LATENCY * 1000:.0f} ms per request)")
+    bench_sync_vs_async(url)
+    print(f"   Peak concurrent requests at stub: {server.state.peak_active}")
+    assert server.state.peak_active <= CONCURRENCY
+    bench_mixed_limit()
+    bench_retries()
+    bench_dropdown_fallback(url)
+    server.shutdown()
+    print("✅ AI client benchmark complete")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import re
+import sys
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from form_analyzer import build_clean_document
+from form_schema import extract_form_schema
+from ai_service import parse_html_structure
+
+FIXTURE = Path(__file__).resolve().parent / 'saved_html.html'
+DROPDOWNS = 12
+OPTIONS = 40
+ROUNDS = 5
+
+def parse_html_structure_reference(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    base_html = None
+    sections = {}
+    body = soup.find('body')
+    if not body:
+        return {'base_html': html, 'sections': {}}
+    current_section = None
+    for element in body.descendants:
+        if isinstance(element, str):
+            continue
+        if element.name == 'section':
+            section_text = element.get_text(strip=True)
+            if section_text and 'id:' in section_text:
+                current_section = section_text.replace('id:', '').strip()
+                sections[current_section] = {'html': '', 'options': []}
+                continue
+        if current_section:
+            if element.name == 'body':
+                parent = element.parent
+                if parent and parent.name == 'body':
+                    section_soup = BeautifulSoup(str(element), 'html.parser')
+                    sections[current_section]['html'] = str(element)
+                    options = []
+                    for option_elem in section_soup.find_all(True):
+                        if option_elem.get('role', '') == 'option':
+                            option_text = option_elem.get_text(strip=True)
+                            if option_text and len(option_text) < 200:
+                                options.append(option_text)
+                    sections[current_section]['options'] = list(set(options))
+                    current_section = None
+                    continue
+        else:
+            if element.name == 'body' and not base_html:
+                parent = element.parent
+                if parent and parent.name == 'body':
+                    base_html = str(element)
+    if base_html is None:
+        bodies = body.find_all('body', recursive=False)
+        base_html = str(bodies[0]) if bodies else str(body)
+    return {'base_html': base_html, 'sections': sections}
+
+def collapse_whitespace(html):
+    return re.sub(r'\s+', ' ', html)
+
+def build_snapshots():
+    snapshots = [FIXTURE.read_text(encoding='utf-8')]
+    names = ['Base HTML']
+    for idx in range(DROPDOWNS):
+        options = ''.join(f'<div role="option" id="opt-{idx}-{o}">Choice {o} for question {idx}</div>' for o in range(OPTIONS))
+        snapshots.append(f'<body><div role="listbox" id="listbox-{idx}">{options}</div></body>')
+        names.append(f'id:question_{idx}')
+    return snapshots, names
+
+def run_reference(snapshots, names):
+    html = str(build_clean_document(snapshots, names))
+    structure = parse_html_structure_reference(html)
+    schema = extract_form_schema(structure['base_html'], structure['sections'])
+    return structure, schema
+
+def run_document(snapshots, names):
+    document = build_clean_document(snapshots, names)
+    structure = parse_html_structure(document)
+    schema = extract_form_schema(structure['base'], structure['sections'])
+    return structure, schema, document
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / ROUNDS
+
+def main():
+    snapshots, names = build_snapshots()
+    (reference, reference_schema), reference_time = timed(run_reference, snapshots, names)
+    (structure, schema, document), document_time = timed(run_document, snapshots, names)
+
+    assert collapse_whitespace(structure['base_html']) == collapse_whitespace(reference['base_html']), 'base HTML differs'
+    assert schema == reference_schema, 'form schema differs'
+    assert {k: sorted(v['options']) for k, v in structure['sections'].items()} == {k: sorted(v['options']) for k, v in reference['sections'].items()}, 'section options differ'
+
+    print(f"🔍 Fixture + {DROPDOWNS} dropdown section(s) x {OPTIONS} option(s), {len(schema)} schema control(s)")
+    print(f"   Serialize + re-parse: {reference_time * 1000:.0f} ms")
+    print(f"   Shared tree:          {document_time * 1000:.0f} ms ({reference_time / document_time:.1f}x), "
+          f"{document.stats['parses']} re-parse(s), {document.stats['serializations']} serialization(s)")
+    print("✅ Identical base HTML (up to whitespace-only text runs), options and schema")
+
+if __name__ == '__main__':
+    main()
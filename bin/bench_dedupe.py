@@ -0,0 +1,96 @@
+import sys
+import time
+import hashlib
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from page_processor import dedupe_html, save_all_dropdowns_in_one_html
+
+SNAPSHOTS = 30
+FIXTURE = Path(__file__).resolve().parent / 'saved_html.html'
+ATTRIBUTE_ORDER_HTML = (
+    '<div class="row"><span data-a="1" data-b="2">x</span></div>'
+    '<div class="row"><span data-b="2" data-a="1">x</span></div>'
+    '<div class="row"><span data-a="1" data-b="2">x</span></div>'
+)
+
+def has_meaningful_content_reference(tag):
+    if tag.name == 'input':
+        return tag.get('value', '').strip() != ''
+    elif tag.name == 'textarea':
+        return tag.text.strip() != ''
+    elif tag.name == 'select':
+        options = tag.find_all('option')
+        return any(opt.get('value', '').strip() not in ('', 'placeholder') for opt in options)
+    else:
+        return tag.decode_contents().strip() != ''
+
+def dedupe_html_reference(soup):
+    seen = {}
+    for tag in soup.find_all(True, recursive=True):
+        if tag.decomposed or not tag.name:
+            continue
+
+        classes = tag.get('class', [])
+        if classes is None:
+            classes = []
+
+        content_hash = hashlib.md5(tag.decode_contents().encode('utf-8')).hexdigest()
+        key = (tag.name, tuple(classes), tag.get('id'), content_hash)
+
+        if key not in seen:
+            seen[key] = tag
+        else:
+            existing_tag = seen[key]
+            if not has_meaningful_content_reference(existing_tag) and has_meaningful_content_reference(tag):
+                existing_tag.replace_with(tag)
+                seen[key] = tag
+            else:
+                tag.decompose()
+    return soup
+
+def build_merged_document(snapshots: int) -> str:
+    fixture = BeautifulSoup(FIXTURE.read_text(encoding='utf-8'), 'html.parser')
+    base_body = fixture.find('body').find('body', recursive=False)
+    base_html = f"<html>{base_body}</html>"
+    html_snapshots = [base_html]
+    dropdown_names = ['Base HTML']
+    for idx in range(1, snapshots):
+        options = ''.join(f'<div role="option">Option {idx}-{n}</div>' for n in range(20))
+        portal = f'<div id="react-select-{idx}-listbox" role="listbox">{options}</div>'
+        html_snapshots.append(base_html.replace('<div id="react-portal-mount-point"></div>', f'<div id="react-portal-mount-point">{portal}</div>'))
+        dropdown_names.append(f'id:dropdown_{idx}')
+    return str(save_all_dropdowns_in_one_html(html_snapshots, dropdown_names))
+
+def bench(fn, html: str, runs: int = 3) -> (float, str):
+    best = None
+    output = None
+    for _ in range(runs):
+        soup = BeautifulSoup(html, 'html.parser')
+        start = time.perf_counter()
+        output = str(fn(soup))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def main():
+    merged = build_merged_document(SNAPSHOTS)
+    tag_count = len(BeautifulSoup(merged, 'html.parser').find_all(True))
+    print(f'📄 {SNAPSHOTS}-snapshot merged document: {len(merged)} characters, {tag_count} tags')
+
+    reference_time, reference_output = bench(dedupe_html_reference, merged)
+    merkle_time, merkle_output = bench(dedupe_html, merged)
+
+    print(f'   decode_contents + md5: {reference_time:.3f}s')
+    print(f'   merkle hash:           {merkle_time:.3f}s ({reference_time / merkle_time:.1f}x)')
+    print(f'   identical output:      {reference_output == merkle_output} ({len(merkle_output)} characters)')
+
+    _, reference_output = bench(dedupe_html_reference, ATTRIBUTE_ORDER_HTML, runs=1)
+    _, merkle_output = bench(dedupe_html, ATTRIBUTE_ORDER_HTML, runs=1)
+    print(f'   reordered attributes:  {reference_output == merkle_output} ({merkle_output.count("<div")} of 3 rows kept, bs4 serializes attributes sorted)')
+    assert reference_output == merkle_output
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from download_cache import DownloadCache, prefetch_profile_files
+import download_cache
+
+LATENCY = 0.3
+FILES = {
+    '/files/resume-sample.pdf': b'%PDF-1.4 resume ' * 4096,
+    '/files/Cover-Letter-Samples.pdf': b'%PDF-1.4 cover letter ' * 4096,
+}
+
+def make_handler(state):
+    class FileHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            body = FILES.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            time.sleep(LATENCY)
+            if self.headers.get('If-None-Match') == etag:
+                state['not_modified'] += 1
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            state['full'] += 1
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FileHandler
+
+def download_inline(url, filename, directory):
+    path = directory / filename
+    with httpx.Client(timeout=30.0) as client:
+        response = client.get(url, follow_redirects=True)
+        response.raise_for_status()
+        path.write_bytes(response.content)
+    return str(path)
+
+def main():
+    state = {'full': 0, 'not_modified': 0}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    profile = {'resumeUrl': base + '/files/resume-sample.pdf', 'coverLetterUrl': base + '/files/Cover-Letter-Samples.pdf'}
+    work_dir = Path(tempfile.mkdtemp())
+
+    started = time.perf_counter()
+    inline_paths = [download_inline(url, 'resume.pdf', work_dir) for url in profile.values()]
+    inline_time = time.perf_counter() - started
+
+    download_cache.DOWNLOAD_CACHE = DownloadCache(work_dir / 'cache')
+    started = time.perf_counter()
+    futures = prefetch_profile_files(profile)
+    prefetch_return = time.perf_counter() - started
+    time.sleep(LATENCY * 2)
+    started = time.perf_counter()
+    cold_paths = [download_cache.DOWNLOAD_CACHE.get_path(url) for url in profile.values()]
+    upload_wait = time.perf_counter() - started
+    download_cache.DOWNLOAD_CACHE.close()
+
+    download_cache.DOWNLOAD_CACHE = DownloadCache(work_dir / 'cache')
+    warm_paths = [future.result() for future in prefetch_profile_files(profile).values()]
+    stats = download_cache.DOWNLOAD_CACHE.stats
+    download_cache.DOWNLOAD_CACHE.close()
+
+    assert len(set(inline_paths)) == 1, 'inline download should collide on resume.pdf'
+    assert len(set(cold_paths)) == 2, 'cached files must not overwrite each other'
+    assert cold_paths == warm_paths, 'revalidated paths differ'
+    assert [Path(p).read_bytes() for p in cold_paths] == list(FILES.values())
+    assert stats['revalidated'] == 2 and stats['downloaded'] == 0
+
+    print(f"\n⏱️  2 files, {LATENCY * 1000:.0f} ms server latency")
+    print(f"   Inline, new client per file: {inline_time:.2f}s blocking the filler, both saved as resume.pdf")
+    print(f"   Prefetch: returned in {prefetch_return * 1000:.1f} ms, upload step waited {upload_wait * 1000:.1f} ms")
+    print(f"   Second run: {stats['revalidated']} ETag revalidation(s) (304), {stats['downloaded']} re-download(s)")
+    print(f"   Server saw {state['full']} full and {state['not_modified']} not-modified response(s)")
+    print("✅ Distinct cached files, revalidated on reuse")
+    server.shutdown()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
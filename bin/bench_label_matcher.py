@@ -0,0 +1,91 @@
+import re
+import sys
+import time
+import random
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai_service import LABEL_PATTERNS, classify_field_identifiers
+
+IDENTIFIERS = 5000
+ROUNDS = 5
+
+LABEL_MAPPING = dict(LABEL_PATTERNS)
+
+LABELS = ['First Name', 'Last Name', 'Email', 'Phone', 'Mobile number', 'Street Address', 'City', 'State/Province',
+          'Zip code', 'Country', 'Current Company', 'Job title', 'Years of experience', 'LinkedIn Profile',
+          'GitHub', 'Portfolio', 'Highest degree', 'University', 'Graduation year', 'Major', 'GPA',
+          'Expected salary', 'Are you legally authorized to work?', 'Will you require visa sponsorship?',
+          'Willing to relocate', 'Start date', 'Skills', 'Resume/CV', 'Cover Letter', 'Why do you want to join us?',
+          'Gender', 'Veteran status', 'Disability status', 'Race / Ethnicity', 'How did you hear about us?',
+          'Pronouns', 'Preferred name', 'Anything else?', 'Website', 'Title', 'Region', 'Sex', 'E-mail address']
+IDS = ['', 'first_name', 'lname', 'input-12', 'question_3049', 'job_application[email]', 'cf_118', 'react-select-4-input',
+       'education_school_name', 'phone_number', 'location', 'salary_expectation']
+
+def reference_classify_one(field_identifier):
+    for pattern, key in LABEL_MAPPING.items():
+        if re.search(pattern, field_identifier):
+            return key
+    return None
+
+def reference_classify(field_identifiers):
+    classified = {identifier: reference_classify_one(identifier) for identifier in dict.fromkeys(field_identifiers)}
+    return [classified[identifier] for identifier in field_identifiers]
+
+def build_identifiers(count, seed=7):
+    rng = random.Random(seed)
+    identifiers = []
+    for _ in range(count):
+        label = rng.choice(LABELS)
+        field_id = rng.choice(IDS)
+        field_name = rng.choice(IDS)
+        identifiers.append(f"{label} {field_id} {field_name}".lower())
+    return identifiers
+
+def build_fuzz_identifiers(count, seed=11):
+    rng = random.Random(seed)
+    fragments = re.findall(r'[a-z/]+', ' '.join(pattern for pattern, _ in LABEL_PATTERNS)) + ['', 'x', 'of', 'your']
+    separators = [' ', '_', '-', '', '  ']
+    identifiers = []
+    for _ in range(count):
+        parts = [rng.choice(fragments) for _ in range(rng.randint(1, 5))]
+        identifiers.append(rng.choice(separators).join(parts))
+    return identifiers
+
+def timed(func, identifiers):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = func(identifiers)
+    return result, (time.perf_counter() - start) / ROUNDS
+
+def main():
+    identifiers = build_identifiers(IDENTIFIERS)
+    fuzz = build_fuzz_identifiers(IDENTIFIERS)
+    fuzz_mismatches = [i for i, r, c in zip(fuzz, reference_classify(fuzz), classify_field_identifiers(fuzz)) if r != c]
+    unique = list(dict.fromkeys(identifiers + fuzz))
+    reference, reference_time = timed(reference_classify, identifiers)
+    compiled, compiled_time = timed(classify_field_identifiers, identifiers)
+    _, unique_reference_time = timed(reference_classify, unique)
+    _, unique_compiled_time = timed(classify_field_identifiers, unique)
+
+    mismatches = [(i, r, c) for i, r, c in zip(identifiers, reference, compiled) if r != c]
+    print(f"🔍 Classified identifiers against {len(LABEL_PATTERNS)} patterns, both sides deduplicating repeats")
+    print(f"   {len(identifiers)} identifiers ({len(set(identifiers))} distinct):")
+    print(f"      Loop of re.search:  {reference_time * 1000:.1f} ms ({reference_time / len(identifiers) * 1e6:.2f} µs/field)")
+    print(f"      Compiled matcher:   {compiled_time * 1000:.1f} ms ({compiled_time / len(identifiers) * 1e6:.2f} µs/field)")
+    print(f"      Speedup:            {reference_time / compiled_time:.1f}x")
+    print(f"   {len(unique)} unique identifiers:")
+    print(f"      Loop of re.search:  {unique_reference_time * 1000:.1f} ms ({unique_reference_time / len(unique) * 1e6:.2f} µs/field)")
+    print(f"      Compiled matcher:   {unique_compiled_time * 1000:.1f} ms ({unique_compiled_time / len(unique) * 1e6:.2f} µs/field)")
+    print(f"      Speedup:            {unique_reference_time / unique_compiled_time:.1f}x")
+    for identifier, expected, actual in mismatches[:10]:
+        print(f"   ❌ {identifier!r}: {expected} != {actual}")
+    for identifier in fuzz_mismatches[:10]:
+        print(f"   ❌ fuzz {identifier!r}")
+    assert not fuzz_mismatches, f"{len(fuzz_mismatches)} fuzzed identifier(s) classified differently"
+    assert not mismatches, f"{len(mismatches)} identifier(s) classified differently"
+    print("✅ Identical classification")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import sys
+import time
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from option_matcher import best_option, score_options, CONFIDENCE_THRESHOLD, index_options, concepts_for, concept_tokens, normalize, domains_for_label, char_ngrams
+from ai_service import match_option_locally
+
+ROUNDS = 200
+BUDGET_MS = 1.0
+COLD_BUDGET_MS = 2.0
+
+COUNTRIES = """Afghanistan|Åland Islands|Albania|Algeria|American Samoa|Andorra|Angola|Anguilla|Antarctica|Antigua and Barbuda|
+Argentina|Armenia|Aruba|Australia|Austria|Azerbaijan|Bahamas|Bahrain|Bangladesh|Barbados|Belarus|Belgium|Belize|Benin|Bermuda|
+Bhutan|Bolivia|Bonaire, Sint Eustatius and Saba|Bosnia and Herzegovina|Botswana|Bouvet Island|Brazil|British Indian Ocean Territory|
+Brunei Darussalam|Bulgaria|Burkina Faso|Burundi|Cabo Verde|Cambodia|Cameroon|Canada|Cayman Islands|Central African Republic|Chad|
+Chile|China|Christmas Island|Cocos (Keeling) Islands|Colombia|Comoros|Congo|Congo, Democratic Republic of the|Cook Islands|
+Costa Rica|Côte d'Ivoire|Croatia|Cuba|Curaçao|Cyprus|Czechia|Denmark|Djibouti|Dominica|Dominican Republic|Ecuador|Egypt|
+El Salvador|Equatorial Guinea|Eritrea|Estonia|Eswatini|Ethiopia|Falkland Islands (Malvinas)|Faroe Islands|Fiji|Finland|France|
+French Guiana|French Polynesia|French Southern Territories|Gabon|Gambia|Georgia|Germany|Ghana|Gibraltar|Greece|Greenland|Grenada|
+Guadeloupe|Guam|Guatemala|Guernsey|Guinea|Guinea-Bissau|Guyana|Haiti|Heard Island and McDonald Islands|Holy See|Honduras|
+Hong Kong|Hungary|Iceland|India|Indonesia|Iran|Iraq|Ireland|Isle of Man|Israel|Italy|Jamaica|Japan|Jersey|Jordan|Kazakhstan|
+Kenya|Kiribati|Korea, Democratic People's Republic of|Korea, Republic of|Kuwait|Kyrgyzstan|Lao People's Democratic Republic|
+Latvia|Lebanon|Lesotho|Liberia|Libya|Liechtenstein|Lithuania|Luxembourg|Macao|Madagascar|Malawi|Malaysia|Maldives|Mali|Malta|
+Marshall Islands|Martinique|Mauritania|Mauritius|Mayotte|Mexico|Micronesia|Moldova|Monaco|Mongolia|Montenegro|Montserrat|
+Morocco|Mozambique|Myanmar|Namibia|Nauru|Nepal|Netherlands|New Caledonia|New Zealand|Nicaragua|Niger|Nigeria|Niue|
+Norfolk Island|North Macedonia|Northern Mariana Islands|Norway|Oman|Pakistan|Palau|Palestine, State of|Panama|
+Papua New Guinea|Paraguay|Peru|Philippines|Pitcairn|Poland|Portugal|Puerto Rico|Qatar|Réunion|Romania|Russian Federation|
+Rwanda|Saint Barthélemy|Saint Helena, Ascension and Tristan da Cunha|Saint Kitts and Nevis|Saint Lucia|Saint Martin (French part)|
+Saint Pierre and Miquelon|Saint Vincent and the Grenadines|Samoa|San Marino|Sao Tome and Principe|Saudi Arabia|Senegal|Serbia|
+Seychelles|Sierra Leone|Singapore|Sint Maarten (Dutch part)|Slovakia|Slovenia|Solomon Islands|Somalia|South Africa|
+South Georgia and the South Sandwich Islands|South Sudan|Spain|Sri Lanka|Sudan|Suriname|Svalbard and Jan Mayen|Sweden|
+Switzerland|Syrian Arab Republic|Taiwan|Tajikistan|Tanzania, United Republic of|Thailand|Timor-Leste|Togo|Tokelau|Tonga|
+Trinidad and Tobago|Tunisia|Türkiye|Turkmenistan|Turks and Caicos Islands|Tuvalu|Uganda|Ukraine|United Arab Emirates|
+United Kingdom|United States|United States Minor Outlying Islands|Uruguay|Uzbekistan|Vanuatu|Venezuela|Viet Nam|
+Virgin Islands (British)|Virgin Islands (U.S.)|Wallis and Futuna|Western Sahara|Yemen|Zambia|Zimbabwe"""
+
+COUNTRY_OPTIONS = [c.strip() for c in COUNTRIES.replace('\n', '').split('|') if c.strip()]
+
+SCHOOL_PLACES = ['California', 'Texas', 'Michigan', 'Washington', 'Florida', 'Illinois', 'Virginia', 'Oregon', 'Arizona',
+                 'Colorado', 'Toronto', 'British Columbia', 'Edinburgh', 'Manchester', 'Melbourne', 'Sydney', 'Tokyo',
+                 'Lahore', 'Karachi', 'Delhi', 'Bombay', 'Madras', 'Chicago', 'Pennsylvania', 'Wisconsin']
+SCHOOL_FORMS = ['University of {}', '{} State University', '{} Institute of Technology', '{} Community College',
+                '{} College of Engineering', 'Northern {} University', 'Southern {} University', '{} Polytechnic',
+                '{} School of Business', '{} Technical University']
+SCHOOL_OPTIONS = [form.format(place) for place in SCHOOL_PLACES for form in SCHOOL_FORMS] + ['Stanford University', 'Other']
+
+DEGREE_OPTIONS = ['High School Diploma', "Associate's Degree", "Bachelor's Degree", "Master's Degree", 'Doctorate', 'Other']
+VETERAN_OPTIONS = ['I identify as one or more of the classifications of protected veteran', 'I am not a protected veteran',
+                   "I don't wish to answer"]
+
+CASES = [
+    ('Country', 'USA', COUNTRY_OPTIONS, 'United States'),
+    ('Country', 'United States of America', COUNTRY_OPTIONS, 'United States'),
+    ('Country of residence', 'UK', COUNTRY_OPTIONS, 'United Kingdom'),
+    ('Country', 'Pakistan', COUNTRY_OPTIONS, 'Pakistan'),
+    ('Country', 'Vietnam', COUNTRY_OPTIONS, 'Viet Nam'),
+    ('Country', 'South Korea', COUNTRY_OPTIONS, 'Korea, Republic of'),
+    ('School', 'University of Michigan', SCHOOL_OPTIONS, 'University of Michigan'),
+    ('School', 'Stanford', SCHOOL_OPTIONS, 'Stanford University'),
+    ('School', 'Texas State Univ', SCHOOL_OPTIONS, 'Texas State University'),
+    ('Highest degree', 'BS', DEGREE_OPTIONS, "Bachelor's Degree"),
+    ('Highest degree', 'Bachelor of Science', DEGREE_OPTIONS, "Bachelor's Degree"),
+    ('Education', 'MS', DEGREE_OPTIONS, "Master's Degree"),
+    ('Education', 'PhD', DEGREE_OPTIONS, 'Doctorate'),
+    ('Veteran status', 'No', VETERAN_OPTIONS, 'I am not a protected veteran'),
+    ('Veteran status', 'Prefer not to say', VETERAN_OPTIONS, "I don't wish to answer"),
+    ('Are you authorized to work in the US?', 'Yes', ['Yes', 'No'], 'Yes'),
+    ('Gender', 'Male', ['Male', 'Female', 'Decline to self-identify'], 'Male'),
+    ('Gender', 'M', ['Male', 'Female', 'Decline to self-identify'], None),
+]
+
+def reference_score_options(profile_value, options, field_label=''):
+    domains = domains_for_label(field_label)
+    value = normalize(profile_value)
+    value_grams = char_ngrams(value)
+    value_tokens = frozenset(value.split())
+    value_concepts = concepts_for(value, domains)
+    scored = []
+    for option in options:
+        norm = normalize(option)
+        grams, tokens, concepts = char_ngrams(norm), frozenset(norm.split()), concepts_for(norm, domains)
+        if not norm:
+            scored.append((option, 0.0))
+            continue
+        gram_score = 2 * len(value_grams & grams) / (len(value_grams) + len(grams))
+        token_score = len(value_tokens & tokens) / len(value_tokens | tokens) if value_tokens or tokens else 0.0
+        fuzzy = 0.6 * gram_score + 0.4 * token_score
+        if norm == value:
+            score = 1.0
+        elif value_concepts and value_concepts & concepts:
+            score = 0.8 + 0.19 * fuzzy
+        elif value and (f' {value} ' in f' {norm} ' or f' {norm} ' in f' {value} '):
+            score = 0.75 + 0.2 * min(len(value), len(norm)) / max(len(value), len(norm))
+        else:
+            score = fuzzy * 0.9
+        scored.append((option, score))
+    return scored
+
+def check_equivalence():
+    mismatches = 0
+    option_lists = [COUNTRY_OPTIONS, SCHOOL_OPTIONS, DEGREE_OPTIONS, VETERAN_OPTIONS, ['Yes', 'No'], ['', 'A', '!!', 'Univ of X', 'naïve café', 'uni uni', '']]
+    values = [value for _, value, _, _ in CASES] + ['', 'a', 'United', 'not a veteran', 'I am not', 'univ', 'New York', 'NY']
+    for options in option_lists:
+        for label in ('Country', 'School', 'Highest degree', 'Veteran status', 'State', ''):
+            for value in values + options[::25]:
+                if score_options(value, options, label) != reference_score_options(value, options, label):
+                    mismatches += 1
+                    print(f"   ❌ {label!r}: {value!r} scored differently from the per-option reference")
+    return mismatches
+
+def check_accuracy():
+    failures = 0
+    for label, value, options, expected in CASES:
+        matched, resolved = match_option_locally(value, options, label)
+        score = best_option(value, options, label)[1]
+        status = '✅' if matched == expected else '❌'
+        if matched != expected:
+            failures += 1
+        route = 'local' if resolved else 'AI'
+        print(f"   {status} {label!r}: {value!r} -> {matched!r} (score {score:.2f}, {route})")
+    return failures
+
+def time_case(value, options, label, cold, scorer=best_option):
+    timings = []
+    for _ in range(ROUNDS):
+        if cold:
+            index_options.cache_clear()
+            concepts_for.cache_clear()
+            concept_tokens.cache_clear()
+        start = time.perf_counter()
+        scorer(value, options, label)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main():
+    print(f"🔍 Accuracy (threshold {CONFIDENCE_THRESHOLD})")
+    failures = check_accuracy()
+    mismatches = check_equivalence()
+    print(f"   {'✅' if not mismatches else '❌'} Vectorized scores equal the per-option reference ({mismatches} mismatch(es))")
+
+    print(f"\n⏱️ Median per-field latency over {ROUNDS} rounds (cold clears every cache first)")
+    worst = 0.0
+    worst_cold = 0.0
+    for label, value, options in [('Country', 'USA', COUNTRY_OPTIONS), ('Country', 'Pakistan', COUNTRY_OPTIONS),
+                                  ('School', 'Texas State Univ', SCHOOL_OPTIONS)]:
+        warm = time_case(value, options, label, cold=False)
+        cold = time_case(value, options, label, cold=True)
+        reference = time_case(value, options, label, cold=True, scorer=reference_score_options)
+        worst = max(worst, warm)
+        worst_cold = max(worst_cold, cold)
+        print(f"   {label} ({len(options)} options) {value!r}: warm {warm:.3f} ms, cold {cold:.3f} ms, per-option reference {reference:.3f} ms")
+
+    assert failures == 0, f"{failures} case(s) matched the wrong option"
+    assert mismatches == 0, f"{mismatches} case(s) scored differently from the reference"
+    assert worst < BUDGET_MS, f"warm matching took {worst:.3f} ms per field"
+    assert worst_cold < COLD_BUDGET_MS, f"cold matching took {worst_cold:.3f} ms per field"
+    print("\n✅ All cases matched within budget")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ai_client import AIClient, HTTPProvider, set_ai_client
+from ai_stub_server import start_stub_server
+from ai_service import identify_form_fields
+
+FIELD_COUNTS = [20, 60, 150]
+LATENCY = 0.4
+TOKEN_DELAY = 0.001
+PROFILE = {'firstName': 'John', 'lastName': 'Doe', 'email': 'john.doe@example.com'}
+
+def build_control(index):
+    kind = index % 5
+    label = f'Question {index}: tell us about item {index}'
+    if kind == 0:
+        return f'<label for="q{index}">{label}</label><select id="q{index}" name="q{index}"><option value="">Select</option><option value="a">Alpha</option><option value="b">Beta</option></select>'
+    if kind == 1:
+        return f'<label for="q{index}">{label}</label><textarea id="q{index}" name="q{index}" required></textarea>'
+    if kind == 2:
+        radios = ''.join(f'<label><input type="radio" name="q{index}" value="{v}" id="q{index}_{v}"> {v}</label>' for v in ('Yes', 'No'))
+        return f'<fieldset><legend>{label}</legend>{radios}</fieldset>'
+    return f'<label for="q{index}">{label}</label><input type="text" id="q{index}" name="q{index}" placeholder="Answer {index}">'
+
+def build_form_html(field_count, section_size=8):
+    parts = ['<html><body><body><form>']
+    for index in range(field_count):
+        if index % section_size == 0:
+            parts.append(f'<h3>Section {index // section_size + 1}</h3>')
+        parts.append(f'<div>{build_control(index)}</div>')
+    parts.append('</form></body></body></html>')
+    return ''.join(parts)
+
+def timed_identify(html, **options):
+    started = time.perf_counter()
+    fields = identify_form_fields(html, PROFILE, **options)
+    return fields, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shard-size', type=int, default=25)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=LATENCY, token_delay=TOKEN_DELAY)
+    previous = set_ai_client(AIClient(HTTPProvider(url), max_concurrency=args.concurrency))
+    results = []
+    for count in FIELD_COUNTS:
+        html = build_form_html(count)
+        single, single_time = timed_identify(html)
+        sharded, sharded_time = timed_identify(html, shard_size=args.shard_size, shard_concurrency=args.concurrency)
+        assert [f['selector'] for f in single] == [f['selector'] for f in sharded], 'sharded fields differ from single-shot'
+        results.append((count, len(single), single_time, sharded_time))
+
+    print(f"\n⏱️  Stub: {LATENCY * 1000:.0f} ms to first token, {TOKEN_DELAY * 1000:.1f} ms/token; shard size {args.shard_size}, concurrency {args.concurrency}")
+    for count, fields, single_time, sharded_time in results:
+        print(f"   {count:>3} questions ({fields} controls): single-shot {single_time:.2f}s, sharded {sharded_time:.2f}s ({single_time / sharded_time:.1f}x)")
+    set_ai_client(previous)
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import sys
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from page_processor import save_all_dropdowns_in_one_html
+from snapshot_parser import available_parsers
+
+FIXTURE = Path(__file__).resolve().parent / 'saved_html.html'
+NOISE = '<svg><path d="M0 0"/></svg><img src="logo.png"><noscript><div>Enable JavaScript</div></noscript><script>window.x = "<div>";</script>'
+
+def save_all_dropdowns_in_one_html_reference(html_snapshots: list, dropdown_names: list):
+    base_soup = BeautifulSoup("<html><head><meta charset='utf-8'></head><body></body></html>", "html.parser")
+    body = base_soup.find('body')
+    for idx, html in enumerate(html_snapshots):
+        name = dropdown_names[idx] if idx < len(dropdown_names) else f"Dropdown_{idx+1}"
+        section_tag = base_soup.new_tag("section")
+        section_tag.string = name
+        body.append(section_tag)
+        snapshot_soup = BeautifulSoup(html, 'html.parser')
+        snapshot_body = snapshot_soup.find('body') or snapshot_soup
+        for tag_name in ['script', 'style', 'noscript', 'iframe', 'img', 'meta', 'link', 'head', 'path', 'svg']:
+            for tag in snapshot_body.find_all(tag_name):
+                tag.decompose()
+        for tag in snapshot_body.find_all(True):
+            for attr in list(tag.attrs):
+                if attr not in ['id','name','type','value','for','aria-label','aria-labelledby','aria-required','role','placeholder','style']:
+                    del tag[attr]
+        body.append(snapshot_body)
+    return base_soup
+
+def load_fixture_snapshots() -> (list, list):
+    fixture = BeautifulSoup(FIXTURE.read_text(encoding='utf-8'), 'html.parser')
+    html_snapshots = []
+    dropdown_names = []
+    for section in fixture.find('body').find_all('section', recursive=False):
+        snapshot_body = section.find_next_sibling()
+        if snapshot_body is None or snapshot_body.name != 'body':
+            continue
+        snapshot_body['class'] = 'application'
+        snapshot_body['data-testid'] = 'page'
+        snapshot_body.insert(0, BeautifulSoup(NOISE, 'html.parser'))
+        html_snapshots.append(f"<!DOCTYPE html><html><head><title>Job</title><link rel='stylesheet' href='a.css'></head>{snapshot_body}</html>")
+        dropdown_names.append(section.get_text())
+    return html_snapshots, dropdown_names
+
+def delta_fragments(html_snapshots: list) -> list:
+    fragments = []
+    for html in html_snapshots[1:4]:
+        listbox = BeautifulSoup(html, 'html.parser').find(attrs={'role': 'listbox'})
+        if listbox is not None:
+            fragments.append(f'{NOISE}{listbox.decode_contents()}')
+    fragments.append(f'{NOISE}<div role="option" class="select__option">Yes</div><div role="option" class="select__option">No</div>')
+    return fragments
+
+def bench(fn, runs: int = 5) -> (float, str):
+    best = None
+    output = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = str(fn())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def main():
+    html_snapshots, dropdown_names = load_fixture_snapshots()
+    fragments = delta_fragments(html_snapshots)
+    html_snapshots += fragments
+    dropdown_names += [f'Delta_{idx + 1}' for idx in range(len(fragments))]
+    print(f'📄 {len(html_snapshots)} fixture snapshot(s) ({len(fragments)} body-less delta fragment(s)), {sum(len(h) for h in html_snapshots)} characters')
+
+    reference_time, reference_output = bench(lambda: save_all_dropdowns_in_one_html_reference(html_snapshots, dropdown_names))
+    print(f'   html.parser + two tree walks: {reference_time:.3f}s')
+    mismatched = []
+    for parser in available_parsers():
+        elapsed, output = bench(lambda: save_all_dropdowns_in_one_html(html_snapshots, dropdown_names, parser=parser))
+        print(f'   {parser} strip-on-parse: {elapsed:.3f}s ({reference_time / elapsed:.1f}x), identical output: {output == reference_output}')
+        if output != reference_output:
+            mismatched.append(parser)
+    assert not mismatched, f'{", ".join(mismatched)} output differs from the reference'
+    print('✅ Every available parser matches the reference')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ai_client import AIClient, HTTPProvider, set_ai_client, iterate_in_background
+from ai_stub_server import start_stub_server
+from ai_service import identify_form_fields, identify_form_fields_stream, map_fields_to_profile
+from form_filler import map_field_stream, needs_option_match
+
+FIXTURE = Path(__file__).resolve().parent / 'saved_html.html'
+LATENCY = 0.4
+TOKEN_DELAY = 0.004
+FILL_SECONDS = 0.15
+PROFILE = {'firstName': 'John', 'lastName': 'Doe', 'email': 'john.doe@example.com', 'phone': '+1-555-123-4567', 'country': 'United States'}
+
+def simulated_fill(field, value):
+    time.sleep(FILL_SECONDS)
+
+def run_batch(html):
+    started = time.perf_counter()
+    fields = identify_form_fields(html, PROFILE)
+    identified = time.perf_counter() - started
+    values = map_fields_to_profile(fields, PROFILE, verbose=False)
+    first_filled = None
+    for field in fields:
+        simulated_fill(field, values.get(field.get('label', '')))
+        if first_filled is None:
+            first_filled = time.perf_counter() - started
+    return {'fields': len(fields), 'identified': identified, 'first_filled': first_filled, 'total': time.perf_counter() - started}
+
+def run_streaming(html):
+    started = time.perf_counter()
+    count = 0
+    first_filled = None
+    map_calls = []
+    
+    def map_values(batch):
+        if any(needs_option_match(f) for f in batch):
+            map_calls.append(len(batch))
+        return map_fields_to_profile(batch, PROFILE, verbose=False)
+    
+    stream = iterate_in_background(identify_form_fields_stream(html, PROFILE))
+    for field, values in map_field_stream(stream, map_values):
+        simulated_fill(field, values.get(field.get('label', '')))
+        count += 1
+        if first_filled is None:
+            first_filled = time.perf_counter() - started
+    return {'fields': count, 'identified': None, 'first_filled': first_filled, 'total': time.perf_counter() - started, 'dropdown_batches': map_calls}
+
+def main():
+    html = FIXTURE.read_text(encoding='utf-8')
+    server, url = start_stub_server(latency=LATENCY, token_delay=TOKEN_DELAY)
+    previous = set_ai_client(AIClient(HTTPProvider(url)))
+
+    batch = run_batch(html)
+    streaming = run_streaming(html)
+
+    print(f"\n⏱️  {batch['fields']} field(s), {LATENCY * 1000:.0f} ms to first token, {TOKEN_DELAY * 1000:.0f} ms/token, {FILL_SECONDS * 1000:.0f} ms per fill")
+    print(f"   Batch:     first filled {batch['first_filled']:.2f}s, total {batch['total']:.2f}s (model done at {batch['identified']:.2f}s)")
+    print(f"   Streaming: first filled {streaming['first_filled']:.2f}s, total {streaming['total']:.2f}s")
+    print(f"   Streaming dropdown mapping: {len(streaming['dropdown_batches'])} batch(es) of {streaming['dropdown_batches']} field(s)")
+    assert streaming['fields'] == batch['fields']
+    assert streaming['first_filled'] < batch['first_filled']
+    assert all(size > 1 for size in streaming['dropdown_batches'][:-1])
+    set_ai_client(previous)
+    server.shutdown()
+    print("✅ Streaming fills fields before generation finishes")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ai_client import AIClient, AIProvider, GeminiProvider, set_ai_client
+from ai_stub_server import answer_prompt
+from ai_service import batch_match_dropdown_options, match_many_dropdown_options_async, identify_form_fields
+from bench_sharding import build_form_html
+
+PROFILE = {'firstName': 'John', 'lastName': 'Doe', 'email': 'john.doe@example.com'}
+ITEMS = [
+    {'value': 'Zeta Quadrant', 'options': ['Alpha', 'Beta', 'Gamma'], 'label': 'Preferred office'},
+    {'value': 'Omega Sector', 'options': ['North', 'South', 'East'], 'label': 'Region'},
+]
+
+class LoopBoundProvider(AIProvider):
+    name = 'loop-bound'
+
+    def __init__(self):
+        self.loop = None
+        self.calls = 0
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        return '{}'
+
+    async def agenerate(self, prompt: str, timeout: float) -> str:
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        if loop is not self.loop:
+            raise RuntimeError('Task got Future attached to a different loop')
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return answer_prompt(prompt)
+
+def build_client():
+    if os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY'):
+        return AIClient(GeminiProvider(os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')), max_retries=1)
+    print('ℹ️  No Gemini key, using a provider that binds its async client to the first loop like grpc-aio does')
+    return AIClient(LoopBoundProvider(), max_retries=0)
+
+def main():
+    client = build_client()
+    previous = set_ai_client(client)
+
+    if isinstance(client.provider, LoopBoundProvider):
+        asyncio.run(client.agenerate('warm up'))
+        try:
+            asyncio.run(client.agenerate('second loop'))
+            raise AssertionError('provider should reject a second asyncio.run loop')
+        except RuntimeError:
+            print('   asyncio.run twice: second call fails, as it does with Gemini')
+        client.provider.loop = None
+    baseline = client.get_metrics()
+
+    for attempt in (1, 2):
+        matches = client.run(match_many_dropdown_options_async(ITEMS))
+        assert all(m in item['options'] for m, item in zip(matches, ITEMS)), matches
+        batch_match_dropdown_options(ITEMS)
+        print(f'   Dropdown fallback call {attempt}: {matches}')
+
+    html = build_form_html(30)
+    for attempt in (1, 2):
+        fields = identify_form_fields(html, PROFILE, shard_size=10, shard_concurrency=3)
+        assert fields, f'sharded call {attempt} returned no fields'
+        print(f'   Sharded identify call {attempt}: {len(fields)} field(s)')
+
+    metrics = client.get_metrics()
+    metrics = dict(metrics, requests=metrics['requests'] - baseline['requests'], failures=metrics['failures'] - baseline['failures'])
+    assert metrics['failures'] == 0, metrics
+    set_ai_client(previous)
+    client.close()
+    print(f"✅ Consecutive async calls share one loop ({metrics['requests']} request(s), no failures)")
+
+if __name__ == '__main__':
+    main()
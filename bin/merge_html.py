@@ -1,4 +1,4 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 import hashlib
 
 def has_meaningful_content(tag):
@@ -10,20 +10,46 @@ def has_meaningful_content(tag):
         options = tag.find_all('option')
         return any(opt.get('value', '').strip() not in ('', 'placeholder') for opt in options)
     else:
-        return tag.decode_contents().strip() != ''
+        return any(isinstance(child, Tag) or child.output_ready().strip() != '' for child in tag.contents)
+
+def compute_content_hashes(tags) -> dict:
+    content_hashes = {}
+    outer_hashes = {}
+    for tag in reversed(tags):
+        digest = hashlib.md5()
+        text = []
+        for child in tag.contents:
+            if isinstance(child, Tag):
+                if text:
+                    encoded = ''.join(text).encode('utf-8')
+                    digest.update(b'T%d:' % len(encoded) + encoded)
+                    text = []
+                digest.update(b'E' + outer_hashes[id(child)])
+            else:
+                text.append(child.output_ready())
+        if text:
+            encoded = ''.join(text).encode('utf-8')
+            digest.update(b'T%d:' % len(encoded) + encoded)
+        content_hash = digest.digest()
+        attrs = sorted((k, ' '.join(v) if isinstance(v, list) else v) for k, v in tag.attrs.items())
+        opening = repr((tag.name, attrs)).encode('utf-8')
+        content_hashes[id(tag)] = content_hash
+        outer_hashes[id(tag)] = hashlib.md5(b'%d:' % len(opening) + opening + content_hash).digest()
+    return content_hashes
 
 def dedupe_html(soup):
     seen = {}
-    for tag in soup.find_all(True, recursive=True):
-        if not hasattr(tag, 'name') or tag.name is None:
+    tags = soup.find_all(True, recursive=True)
+    content_hashes = compute_content_hashes(tags)
+    for tag in tags:
+        if tag.decomposed or not tag.name:
             continue
 
         classes = tag.get('class', [])
         if classes is None:
             classes = []
 
-        content_hash = hashlib.md5(tag.decode_contents().encode('utf-8')).hexdigest()
-        key = (tag.name, tuple(classes), tag.get('id'), content_hash)
+        key = (tag.name, tuple(classes), tag.get('id'), content_hashes[id(tag)])
 
         if key not in seen:
             seen[key] = tag
@@ -1,4 +1,5 @@
 import re
+import sys
 import time
 import hashlib
 from typing import List
@@ -15,6 +16,10 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from browser_pool import BrowserPool
+
 def has_meaningful_content(tag):
     if tag.name == 'input':
         return tag.get('value', '').strip() != ''
@@ -24,20 +29,46 @@ def has_meaningful_content(tag):
         options = tag.find_all('option')
         return any(opt.get('value', '').strip() not in ('', 'placeholder') for opt in options)
     else:
-        return tag.decode_contents().strip() != ''
+        return any(isinstance(child, Tag) or child.output_ready().strip() != '' for child in tag.contents)
+
+def compute_content_hashes(tags) -> dict:
+    content_hashes = {}
+    outer_hashes = {}
+    for tag in reversed(tags):
+        digest = hashlib.md5()
+        text = []
+        for child in tag.contents:
+            if isinstance(child, Tag):
+                if text:
+                    encoded = ''.join(text).encode('utf-8')
+                    digest.update(b'T%d:' % len(encoded) + encoded)
+                    text = []
+                digest.update(b'E' + outer_hashes[id(child)])
+            else:
+                text.append(child.output_ready())
+        if text:
+            encoded = ''.join(text).encode('utf-8')
+            digest.update(b'T%d:' % len(encoded) + encoded)
+        content_hash = digest.digest()
+        attrs = sorted((k, ' '.join(v) if isinstance(v, list) else v) for k, v in tag.attrs.items())
+        opening = repr((tag.name, attrs)).encode('utf-8')
+        content_hashes[id(tag)] = content_hash
+        outer_hashes[id(tag)] = hashlib.md5(b'%d:' % len(opening) + opening + content_hash).digest()
+    return content_hashes
 
 def dedupe_html(soup):
     seen = {}
-    for tag in soup.find_all(True, recursive=True):
-        if not hasattr(tag, 'name') or tag.name is None:
+    tags = soup.find_all(True, recursive=True)
+    content_hashes = compute_content_hashes(tags)
+    for tag in tags:
+        if tag.decomposed or not tag.name:
             continue
 
         classes = tag.get('class', [])
         if classes is None:
             classes = []
 
-        content_hash = hashlib.md5(tag.decode_contents().encode('utf-8')).hexdigest()
-        key = (tag.name, tuple(classes), tag.get('id'), content_hash)
+        key = (tag.name, tuple(classes), tag.get('id'), content_hashes[id(tag)])
 
         if key not in seen:
             seen[key] = tag
@@ -198,22 +229,17 @@ def process_page(driver: WebDriver, url: str, output_path: str = "all_dropdowns.
     print(len(str(merged_soup)))
     
 def main():
-    # url = 'https://job-boards.greenhouse.io/twilio/jobs/7394811'
-    # url = 'https://job-boards.greenhouse.io/fixify/jobs/4985488008'
-    url = 'https://job-boards.greenhouse.io/renttherunway/jobs/7395001'
-    # url = 'https://job-boards.greenhouse.io/twilio/jobs/7394811'
+    urls = [
+        'https://job-boards.greenhouse.io/renttherunway/jobs/7395001',
+        'https://job-boards.greenhouse.io/twilio/jobs/7394811',
+        'https://job-boards.greenhouse.io/fixify/jobs/4985488008',
+    ]
     
-    chrome_options = Options()
-    chrome_options.add_argument('--start-maximized')
-    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.set_window_size(1366,768)
-    
-    try:
-        process_page(driver, url)
-    finally:
-        driver.quit()
+    with BrowserPool(size=2) as pool:
+        for url in urls:
+            with pool.lease() as driver:
+                process_page(driver, url)
+        print(pool.get_metrics())
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
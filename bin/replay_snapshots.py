@@ -0,0 +1,42 @@
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from snapshot_store import SnapshotStore
+from form_analyzer import replay_clean_html
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay stored page snapshots through the parsing/prompting pipeline without a browser')
+    parser.add_argument('url', nargs='?', help='URL of the stored page (omit to list stored pages)')
+    parser.add_argument('--page-hash', help='Stored page hash or a unique prefix of it (defaults to the most recent)')
+    parser.add_argument('--store', help='Snapshot store directory (defaults to ./snapshot_store)')
+    parser.add_argument('--output', help='Write the deduped HTML to this file')
+    parser.add_argument('--identify', action='store_true', help='Also run identify_form_fields on the replayed HTML')
+    parser.add_argument('--profile', help='Profile JSON file used with --identify')
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store)
+    if not args.url:
+        for page in store.list_pages():
+            print(f"{page['page_hash'][:12]}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(page['created']))}  "
+                  f"{len(page['snapshots'])} snapshot(s)  {page['mode']}  {page['url']}")
+        return
+
+    start = time.perf_counter()
+    clean_html = replay_clean_html(args.url, store, args.page_hash)
+    print(f'   ⏱️  Parsed and deduped in {(time.perf_counter() - start) * 1000:.1f} ms')
+    if args.output:
+        Path(args.output).write_text(clean_html, encoding='utf-8')
+
+    if args.identify:
+        from ai_service import identify_form_fields
+        profile_dict = json.loads(Path(args.profile).read_text(encoding='utf-8')) if args.profile else {}
+        fields = identify_form_fields(clean_html, profile_dict)
+        print(json.dumps(fields, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webdriver import WebDriver
+from load_profile import LoadProfile, apply_load_profile_options, apply_load_profile, pop_seen_origins, url_origin, SEEN_ORIGINS
+
+def build_chrome_options() -> Options:
+    chrome_options = Options()
+    chrome_options.add_argument('--start-maximized')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    return chrome_options
+
+def create_driver(options_factory: Callable[[], Options] = build_chrome_options, load_profile: LoadProfile = None) -> WebDriver:
+    chrome_options = options_factory()
+    if load_profile is not None:
+        apply_load_profile_options(chrome_options, load_profile)
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.set_window_size(1366, 768)
+    if load_profile is not None:
+        apply_load_profile(driver, load_profile)
+    return driver
+
+class BrowserPool:
+    def __init__(self, size: int = 2, max_uses: int = 25, options_factory: Callable[[], Options] = build_chrome_options, load_profile: LoadProfile = None):
+        self.size = size
+        self.max_uses = max_uses
+        self.options_factory = options_factory
+        self.load_profile = load_profile
+        self.idle = queue.Queue()
+        self.uses: Dict[int, int] = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        self.metrics = {'leases': 0, 'created': 0, 'recycled': 0, 'crashed': 0, 'lease_waits': []}
+        for _ in range(size):
+            self.idle.put(self.spawn())
+
+    def spawn(self) -> WebDriver:
+        driver = create_driver(self.options_factory, self.load_profile)
+        with self.lock:
+            self.uses[id(driver)] = 0
+            self.metrics['created'] += 1
+        return driver
+
+    def respawn(self) -> WebDriver:
+        try:
+            return self.spawn()
+        except:
+            self.idle.put(None)
+            raise
+
+    def discard(self, driver: WebDriver) -> None:
+        with self.lock:
+            self.uses.pop(id(driver), None)
+            SEEN_ORIGINS.pop(id(driver), None)
+        try:
+            driver.quit()
+        except:
+            pass
+
+    def is_healthy(self, driver: WebDriver) -> bool:
+        try:
+            return driver.execute_script('return 1') == 1 and len(driver.window_handles) > 0
+        except:
+            return False
+
+    def visited_origins(self, driver: WebDriver) -> set:
+        origins = set()
+        for entry in driver.execute_cdp_cmd('Page.getNavigationHistory', {}).get('entries', []):
+            origin = url_origin(entry.get('url'))
+            if origin:
+                origins.add(origin)
+        frames = [driver.execute_cdp_cmd('Page.getFrameTree', {})['frameTree']]
+        while frames:
+            node = frames.pop()
+            origin = url_origin(node['frame'].get('url'))
+            if origin:
+                origins.add(origin)
+            frames.extend(node.get('childFrames', []))
+        return origins
+
+    def reset(self, driver: WebDriver) -> None:
+        stale_handles = driver.window_handles
+        origins = pop_seen_origins(driver) if self.load_profile is not None else set()
+        for handle in stale_handles:
+            driver.switch_to.window(handle)
+            origins |= self.visited_origins(driver)
+        for origin in sorted(origins):
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        except:
+            driver.delete_all_cookies()
+        driver.switch_to.new_window('tab')
+        fresh_handle = driver.current_window_handle
+        for handle in stale_handles:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(fresh_handle)
+        driver.get('about:blank')
+        if self.load_profile is not None:
+            apply_load_profile(driver, self.load_profile)
+
+    def acquire(self, timeout: float = None) -> WebDriver:
+        if self.closed:
+            raise RuntimeError('BrowserPool is closed')
+        start = time.perf_counter()
+        driver = self.idle.get(timeout=timeout)
+        if driver is not None and not self.is_healthy(driver):
+            with self.lock:
+                self.metrics['crashed'] += 1
+            self.discard(driver)
+            driver = None
+        if driver is None:
+            driver = self.respawn()
+        with self.lock:
+            self.metrics['lease_waits'].append(time.perf_counter() - start)
+            self.metrics['leases'] += 1
+            self.uses[id(driver)] = self.uses.get(id(driver), 0) + 1
+        return driver
+
+    def release(self, driver: WebDriver, failed: bool = False) -> None:
+        if self.closed:
+            self.discard(driver)
+            return
+        recycle = failed or self.uses.get(id(driver), 0) >= self.max_uses
+        if not recycle:
+            try:
+                self.reset(driver)
+            except:
+                recycle = True
+        if recycle:
+            with self.lock:
+                self.metrics['recycled'] += 1
+            self.discard(driver)
+            try:
+                driver = self.respawn()
+            except Exception as e:
+                print(f'   ⚠️  Could not replace recycled browser: {e}')
+                return
+        self.idle.put(driver)
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        driver = self.acquire(timeout)
+        failed = False
+        try:
+            yield driver
+        except:
+            failed = not self.is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, failed=failed)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            waits: List[float] = sorted(self.metrics['lease_waits'])
+            metrics = {k: v for k, v in self.metrics.items() if k != 'lease_waits'}
+        metrics['idle'] = self.idle.qsize()
+        metrics['lease_wait_mean'] = sum(waits) / len(waits) if waits else 0.0
+        metrics['lease_wait_max'] = waits[-1] if waits else 0.0
+        return metrics
+
+    def close(self) -> None:
+        self.closed = True
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                self.discard(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,89 @@
+from typing import Dict, Any
+from bs4 import BeautifulSoup, Tag
+
+def extract_section_options(element: Tag) -> list:
+    options = []
+    for option_elem in element.find_all(attrs={'role': 'option'}):
+        option_text = option_elem.get_text(strip=True)
+        if option_text and len(option_text) < 200:
+            options.append(option_text)
+    return list(set(options))
+
+def split_structure(soup) -> Dict[str, Any]:
+    base = None
+    sections = {}
+
+    body = soup.find('body')
+    if not body:
+        return {'base': soup, 'sections': {}}
+
+    current_section = None
+
+    for element in body.descendants:
+        if isinstance(element, str):
+            continue
+
+        if element.name == 'section':
+            section_text = element.get_text(strip=True)
+            if section_text and 'id:' in section_text:
+                current_section = section_text.replace('id:', '').strip()
+                sections[current_section] = {'element': None, 'options': []}
+                continue
+
+        if current_section:
+            if element.name == 'body':
+                parent = element.parent
+                if parent and parent.name == 'body':
+                    sections[current_section]['element'] = element
+                    sections[current_section]['options'] = extract_section_options(element)
+                    current_section = None
+                    continue
+        else:
+            if element.name == 'body' and base is None:
+                parent = element.parent
+                if parent and parent.name == 'body':
+                    base = element
+
+    if base is None:
+        bodies = body.find_all('body', recursive=False)
+        base = bodies[0] if bodies else body
+
+    return {'base': base, 'sections': sections}
+
+class CleanDocument:
+    def __init__(self, soup: BeautifulSoup = None, html: str = None):
+        if soup is None and html is None:
+            raise ValueError('CleanDocument needs a parsed tree or an HTML string')
+        self.soup = soup
+        self.html = html
+        self.structure = None
+        self.stats = {'parses': 0, 'serializations': 0}
+
+    def get_soup(self) -> BeautifulSoup:
+        if self.soup is None:
+            self.soup = BeautifulSoup(self.html, 'html.parser')
+            self.stats['parses'] += 1
+        return self.soup
+
+    def get_html(self) -> str:
+        if self.html is None:
+            self.html = str(self.soup)
+            self.stats['serializations'] += 1
+        return self.html
+
+    def get_structure(self) -> Dict[str, Any]:
+        if self.structure is None:
+            structure = split_structure(self.get_soup())
+            if structure['base'] is self.soup and self.html is not None:
+                structure['base_html'] = self.html
+            else:
+                structure['base_html'] = str(structure['base'])
+                self.stats['serializations'] += 1
+            self.structure = structure
+        return self.structure
+
+    def __str__(self) -> str:
+        return self.get_html()
+
+    def __len__(self) -> int:
+        return len(self.get_html())
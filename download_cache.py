@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import asyncio
+import hashlib
+import mimetypes
+import threading
+from pathlib import Path
+from urllib.parse import urlparse, unquote
+from concurrent.futures import Future
+from typing import Dict, Any, Optional
+import httpx
+
+PROFILE_FILE_KEYS = ('resumeUrl', 'coverLetterUrl')
+DEFAULT_EXTENSION = '.pdf'
+
+def filename_for_url(url: str, content_type: str = '') -> str:
+    name = re.sub(r'[^\w.\-]+', '_', unquote(Path(urlparse(url).path).name)).strip('._') or 'download'
+    if not Path(name).suffix:
+        name += mimetypes.guess_extension(content_type.split(';')[0].strip()) or DEFAULT_EXTENSION
+    return name
+
+class DownloadCache:
+    def __init__(self, directory: str = None, max_connections: int = 8, timeout: float = 30.0):
+        self.directory = Path(directory) if directory else Path.cwd() / 'cache' / 'downloads'
+        self.index_path = self.directory / 'index.json'
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.pending: Dict[str, Future] = {}
+        self.loop = None
+        self.client = None
+        self.stats = {'downloaded': 0, 'revalidated': 0, 'stale': 0, 'bytes': 0}
+
+    def load_index(self) -> Dict[str, Any]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            return json.loads(self.index_path.read_text(encoding='utf-8'))
+        except:
+            return {}
+
+    def save_index(self, index: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(f'{self.index_path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(index, indent=2), encoding='utf-8')
+        os.replace(tmp_path, self.index_path)
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, daemon=True).start()
+            return self.loop
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, follow_redirects=True)
+        return self.client
+
+    def cached_path(self, entry: Optional[Dict[str, Any]]) -> Optional[Path]:
+        if not entry:
+            return None
+        path = self.directory / entry['sha256'][:16] / entry['filename']
+        return path if path.exists() else None
+
+    def store(self, url: str, response: httpx.Response) -> Path:
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        filename = filename_for_url(url, response.headers.get('content-type', ''))
+        path = self.directory / digest[:16] / filename
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+        with self.lock:
+            index = self.load_index()
+            index[url] = {
+                'sha256': digest,
+                'filename': filename,
+                'etag': response.headers.get('etag'),
+                'last_modified': response.headers.get('last-modified'),
+                'size': len(content),
+            }
+            self.save_index(index)
+            self.stats['downloaded'] += 1
+            self.stats['bytes'] += len(content)
+        return path
+
+    def lookup(self, url: str) -> (Optional[Dict[str, Any]], Optional[Path]):
+        with self.lock:
+            entry = self.load_index().get(url)
+        return entry, self.cached_path(entry)
+
+    def record(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    async def fetch(self, url: str) -> str:
+        loop = asyncio.get_running_loop()
+        entry, cached = await loop.run_in_executor(None, self.lookup, url)
+        headers = {}
+        if cached is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            response = await self.get_client().get(url, headers=headers)
+            if response.status_code == 304 and cached is not None:
+                self.record('revalidated')
+                return str(cached.absolute())
+            response.raise_for_status()
+        except httpx.HTTPError:
+            if cached is None:
+                raise
+            self.record('stale')
+            return str(cached.absolute())
+        path = await loop.run_in_executor(None, self.store, url, response)
+        return str(path.absolute())
+
+    def prefetch(self, url: str) -> Future:
+        loop = self.get_loop()
+        with self.lock:
+            future = self.pending.get(url)
+            if future is None or (future.done() and future.exception() is not None):
+                future = asyncio.run_coroutine_threadsafe(self.fetch(url), loop)
+                self.pending[url] = future
+            return future
+
+    def get_path(self, url: str, timeout: float = None) -> str:
+        return self.prefetch(url).result(timeout or self.timeout * 2)
+
+    def close(self) -> None:
+        if self.loop is None:
+            return
+        if self.client is not None:
+            asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result(self.timeout)
+            self.client = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop = None
+
+DOWNLOAD_CACHE = None
+
+def get_download_cache() -> DownloadCache:
+    global DOWNLOAD_CACHE
+    if DOWNLOAD_CACHE is None:
+        DOWNLOAD_CACHE = DownloadCache()
+    return DOWNLOAD_CACHE
+
+def prefetch_profile_files(profile_dict: Dict[str, Any]) -> Dict[str, Future]:
+    cache = get_download_cache()
+    futures = {}
+    for key in PROFILE_FILE_KEYS:
+        url = profile_dict.get(key)
+        if isinstance(url, str) and url.startswith('http'):
+            futures[key] = cache.prefetch(url)
+    if futures:
+        print(f"📥 Prefetching {len(futures)} profile file(s) in the background: {', '.join(futures)}")
+    return futures
@@ -2,7 +2,9 @@ import re
 from typing import Dict, List, Any
 from dataclasses import dataclass
 from bs4 import BeautifulSoup
-from page_processor import expand_all_dropdowns, dedupe_html, save_all_dropdowns_in_one_html
+from snapshot_store import SnapshotStore
+from clean_document import CleanDocument
+from page_processor import expand_all_dropdowns, expand_all_dropdowns_as_deltas, deltas_to_snapshots, dedupe_html, save_all_dropdowns_in_one_html
 
 @dataclass
 class JobProfile:
@@ -40,16 +42,47 @@ class JobProfile:
     disabilityStatus: str = None
     race: str = None
 
-def extract_clean_html(driver) -> str:
-    print('📄 Extracting page HTML with dropdown expansion...')
-    html_snapshots, dropdown_names = expand_all_dropdowns(driver)
-    print(f'   📊 Collected {len(html_snapshots)} HTML snapshot(s) ({len(dropdown_names)} dropdown(s) expanded)')
+def build_clean_document(html_snapshots: List[str], dropdown_names: List[str]) -> CleanDocument:
     merged_soup = save_all_dropdowns_in_one_html(html_snapshots, dropdown_names)
     merged_dedupe_soup = dedupe_html(merged_soup)
-    clean_html = str(merged_dedupe_soup)
+    return CleanDocument(soup=merged_dedupe_soup)
+
+def build_clean_html(html_snapshots: List[str], dropdown_names: List[str]) -> str:
+    return str(build_clean_document(html_snapshots, dropdown_names))
+
+def extract_clean_document(driver, use_deltas: bool = False, store: SnapshotStore = None) -> CleanDocument:
+    print('📄 Extracting page HTML with dropdown expansion...')
+    if use_deltas:
+        base_html, deltas = expand_all_dropdowns_as_deltas(driver)
+        html_snapshots, dropdown_names = deltas_to_snapshots(base_html, deltas)
+        print(f'   📊 Collected base HTML + {len(deltas)} dropdown delta(s) ({sum(len(d) for d in deltas.values())} characters)')
+    else:
+        html_snapshots, dropdown_names = expand_all_dropdowns(driver)
+        print(f'   📊 Collected {len(html_snapshots)} HTML snapshot(s) ({len(dropdown_names)} dropdown(s) expanded)')
+    if store is not None:
+        page_hash = store.save(driver.current_url, html_snapshots, dropdown_names, mode='deltas' if use_deltas else 'snapshots')
+        print(f'   💾 Stored snapshots as {page_hash[:12]}')
+    document = build_clean_document(html_snapshots, dropdown_names)
+    print(f"✅ Extracted clean HTML tree ({len(document.get_structure()['sections'])} dropdown section(s))")
+    return document
+
+def extract_clean_html(driver, use_deltas: bool = False, store: SnapshotStore = None) -> str:
+    clean_html = str(extract_clean_document(driver, use_deltas, store))
     print(f'✅ Extracted {len(clean_html)} characters of HTML')
     return clean_html
 
+def replay_clean_document(url: str, store: SnapshotStore, page_hash: str = None) -> CleanDocument:
+    print(f'📼 Replaying stored snapshots for {url}...')
+    html_snapshots, dropdown_names = store.load(url, page_hash)
+    document = build_clean_document(html_snapshots, dropdown_names)
+    print(f'✅ Replayed {len(html_snapshots)} snapshot(s) into a clean HTML tree')
+    return document
+
+def replay_clean_html(url: str, store: SnapshotStore, page_hash: str = None) -> str:
+    clean_html = str(replay_clean_document(url, store, page_hash))
+    print(f'✅ Replayed into {len(clean_html)} characters of HTML')
+    return clean_html
+
 def get_profile_as_dict(profile: JobProfile) -> Dict[str, Any]:
     return {
         'firstName': profile.firstName,
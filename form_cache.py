@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import copy
+import atexit
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from form_schema import extract_form_schema, clean_text, MIN_SCHEMA_CONTROLS
+
+PROFILE_DEPENDENT_KEYS = ('suggestedValue',)
+
+def form_structure_key(base_html: str, sections: Dict[str, Any] = None, schema: List[Dict[str, Any]] = None) -> str:
+    sections = sections or {}
+    if schema is None:
+        schema = extract_form_schema(base_html, sections)
+    normalized = []
+    for entry in schema:
+        entry = {k: v for k, v in entry.items() if k != 'section'}
+        if 'label' in entry:
+            entry['label'] = clean_text(entry['label']).lower()
+        options = entry.get('options')
+        if isinstance(options, str) and options.startswith('@'):
+            entry['options'] = sorted(sections[options[1:]]['options'])
+        normalized.append(entry)
+    if len(schema) < MIN_SCHEMA_CONTROLS:
+        normalized.append({'base_html': hashlib.sha256(clean_text(str(base_html)).encode('utf-8')).hexdigest()})
+    canonical = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def strip_profile_answers(fields: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{k: v for k, v in field.items() if k not in PROFILE_DEPENDENT_KEYS} for field in fields]
+
+class FormStructureCache:
+    def __init__(self, path: str = None, ttl: float = 7 * 24 * 3600, max_entries: int = 200, flush_every: int = 20):
+        self.path = Path(path) if path else Path.cwd() / 'cache' / 'form_structures.json'
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.accesses: Dict[str, Dict[str, float]] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        atexit.register(self.flush)
+
+    def load(self) -> Dict[str, Any]:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except:
+            return {}
+
+    def save(self, entries: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(entries), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+    def apply_accesses(self, entries: Dict[str, Any]) -> None:
+        for key, access in self.accesses.items():
+            entry = entries.get(key)
+            if entry is not None:
+                entry['last_access'] = max(entry['last_access'], access['last_access'])
+                entry['hits'] = entry.get('hits', 0) + access['hits']
+        self.accesses = {}
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self.lock:
+            entries = self.load()
+            entry = entries.get(key)
+            now = time.time()
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if now - entry['created'] > self.ttl:
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            access = self.accesses.setdefault(key, {'last_access': now, 'hits': 0})
+            access['last_access'] = now
+            access['hits'] += 1
+            self.stats['hits'] += 1
+            if sum(a['hits'] for a in self.accesses.values()) >= self.flush_every:
+                self.apply_accesses(entries)
+                self.save(entries)
+            return copy.deepcopy(entry['fields'])
+
+    def put(self, key: str, fields: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            entries = self.load()
+            self.apply_accesses(entries)
+            now = time.time()
+            entries[key] = {'created': now, 'last_access': now, 'hits': 0, 'fields': strip_profile_answers(fields)}
+            expired = [k for k, e in entries.items() if now - e['created'] > self.ttl]
+            for k in expired:
+                del entries[k]
+            while len(entries) > self.max_entries:
+                oldest = min(entries, key=lambda k: entries[k]['last_access'])
+                del entries[oldest]
+                self.stats['evictions'] += 1
+            self.save(entries)
+
+    def flush(self) -> None:
+        with self.lock:
+            if not self.accesses:
+                return
+            entries = self.load()
+            self.apply_accesses(entries)
+            if entries:
+                self.save(entries)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.accesses = {}
+            self.save({})
+
+    def hit_rate(self) -> float:
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
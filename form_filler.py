@@ -1,54 +1,250 @@
+import os
 import time
 import re
 from pathlib import Path
-from typing import Dict, Any, List
+from urllib.parse import urlparse
+from typing import Dict, Any, List, Iterable, Callable, Optional
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
-import httpx
+from selenium.common.exceptions import StaleElementReferenceException
+from waits import wait_for_listbox_closed, get_options_signature, wait_for_options_stable, FILTER_SETTLE
+from ai_client import iterate_in_background
+from page_processor import restore_probed_state
+from download_cache import get_download_cache
 
+FILL_STRATEGIES = ('fast', 'chunked', 'humanized')
+FALLBACK_FILL_STRATEGY = 'humanized'
 
-def find_element_by_any_selector(driver, field: Dict):
-    selectors = [
-        (By.ID, field.get('id')),
-        (By.NAME, field.get('name')),
-        (By.CSS_SELECTOR, field.get('selector')),
-        (By.XPATH, field.get('xpath'))
-    ]
+def resolve_fill_strategy(strategy: Optional[str]) -> str:
+    normalized = (strategy or FALLBACK_FILL_STRATEGY).strip().lower()
+    if normalized not in FILL_STRATEGIES:
+        print(f"⚠️  Unknown fill strategy {strategy!r} (expected one of {', '.join(FILL_STRATEGIES)}), using {FALLBACK_FILL_STRATEGY}")
+        return FALLBACK_FILL_STRATEGY
+    return normalized
+
+DEFAULT_FILL_STRATEGY = resolve_fill_strategy(os.getenv('FILL_STRATEGY'))
+SITE_FILL_STRATEGIES = {
+    'greenhouse.io': 'fast',
+}
+FILL_CHUNK_SIZE = 50
+FILL_TIMINGS: Dict[str, List[Dict[str, Any]]] = {}
+
+BATCH_FIELD_TYPES = {'text', 'email', 'tel', 'textarea', 'phone', 'checkbox', 'radio'}
+TEXT_FIELD_TYPES = {'text', 'email', 'tel', 'textarea', 'phone'}
+MATCHED_FIELD_TYPES = {'select', 'autocomplete'}
+STREAM_MATCH_BATCH_SIZE = 6
+
+SET_NATIVE_VALUE_JS = """
+var setNativeValue = function(el, value) {
+    el.focus();
+    if (el.isContentEditable) {
+        el.textContent = value;
+    } else {
+        var proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+    }
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.blur();
+    return el.isContentEditable ? el.textContent : el.value;
+};
+"""
+
+FAST_FILL_SCRIPT = SET_NATIVE_VALUE_JS + """
+return setNativeValue(arguments[0], arguments[1]);
+"""
+
+RESOLVE_ELEMENTS_SCRIPT = """
+var xpathFirst = function(expression, context) {
+    try {
+        return document.evaluate(expression, context || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) {
+        return null;
+    }
+};
+var byLabel = function(text) {
+    var labels = document.getElementsByTagName('label');
+    for (var i = 0; i < labels.length; i++) {
+        var own = '';
+        for (var c = labels[i].firstChild; c; c = c.nextSibling) {
+            if (c.nodeType === 3) { own = c.nodeValue; break; }
+        }
+        if (own.indexOf(text) === -1) continue;
+        var input = labels[i].querySelector('input') || xpathFirst('following::input[1]', labels[i]);
+        if (input) return input;
+    }
+    return null;
+};
+return arguments[0].map(function(item) {
+    if (item.id) {
+        var byId = document.getElementById(item.id);
+        if (byId) return {element: byId, by: 'id'};
+    }
+    if (item.name) {
+        var byName = document.getElementsByName(item.name);
+        if (byName.length) return {element: byName[0], by: 'name'};
+    }
+    if (item.selector) {
+        try {
+            var bySelector = document.querySelector(item.selector);
+            if (bySelector) return {element: bySelector, by: 'css'};
+        } catch (e) {}
+    }
+    if (item.xpath) {
+        var byXpath = xpathFirst(item.xpath);
+        if (byXpath) return {element: byXpath, by: 'xpath'};
+    }
+    if (item.label) {
+        var labelled = byLabel(item.label);
+        if (labelled) return {element: labelled, by: 'label'};
+    }
+    return {element: null, by: ''};
+});
+"""
+
+BATCH_FILL_SCRIPT = SET_NATIVE_VALUE_JS + """
+return arguments[0].map(function(item) {
+    try {
+        var el = item.element;
+        if (!el) return {ok: false, reason: 'not found'};
+        if (item.fieldType === 'radio') {
+            var radios = item.name ? document.getElementsByName(item.name) : [el];
+            var wanted = String(item.value).toLowerCase();
+            for (var i = 0; i < radios.length; i++) {
+                if (String(radios[i].value).toLowerCase().indexOf(wanted) !== -1) {
+                    if (!radios[i].checked) radios[i].click();
+                    return {ok: radios[i].checked, value: radios[i].value, reason: radios[i].checked ? '' : 'click ignored'};
+                }
+            }
+            return {ok: false, reason: 'no matching radio'};
+        }
+        if (item.fieldType === 'checkbox') {
+            if (item.value && !el.checked) el.click();
+            return {ok: el.checked === !!item.value, value: el.checked, reason: el.checked === !!item.value ? '' : 'click ignored'};
+        }
+        if (el.getAttribute('role') === 'combobox' || el.getAttribute('aria-haspopup') === 'listbox' || el.list) {
+            return {ok: false, reason: 'interactive'};
+        }
+        var readBack = setNativeValue(el, String(item.value));
+        return {ok: readBack === String(item.value), value: readBack, reason: readBack === String(item.value) ? '' : 'value rejected'};
+    } catch (e) {
+        return {ok: false, reason: String(e)};
+    }
+});
+"""
+
+def fill_strategy_for_url(url: str) -> str:
+    host = (urlparse(url or '').hostname or '').lower()
+    for site, strategy in SITE_FILL_STRATEGIES.items():
+        if host == site or host.endswith('.' + site):
+            return resolve_fill_strategy(strategy)
+    return DEFAULT_FILL_STRATEGY
+
+def record_fill(strategy: str, elapsed: float, chars: int) -> None:
+    FILL_TIMINGS.setdefault(strategy, []).append({'elapsed': elapsed, 'chars': chars})
+
+def get_fill_stats() -> Dict[str, Dict[str, float]]:
+    stats = {}
+    for strategy, records in FILL_TIMINGS.items():
+        elapsed = sorted(r['elapsed'] for r in records)
+        count = len(elapsed)
+        stats[strategy] = {
+            'count': count,
+            'chars': sum(r['chars'] for r in records),
+            'mean': sum(elapsed) / count,
+            'p50': elapsed[count // 2],
+            'max': elapsed[-1],
+        }
+    return stats
+
+def print_fill_stats() -> None:
+    for strategy, s in sorted(get_fill_stats().items()):
+        print(f"   ⌨️  {strategy}: n={s['count']} chars={s['chars']} mean={s['mean']:.3f}s "
+              f"p50={s['p50']:.3f}s max={s['max']:.3f}s")
+
+def reset_fill_stats() -> None:
+    FILL_TIMINGS.clear()
+
+
+def field_key(field: Dict) -> str:
+    return field.get('selector') or field.get('id') or field.get('name') or field.get('label', '')
+
+def resolve_field_elements(driver, fields: List[Dict]) -> (List[Dict], Dict[str, Any]):
+    payload = [{k: field.get(k) for k in ('id', 'name', 'selector', 'xpath', 'label')} for field in fields]
+    started = time.perf_counter()
+    try:
+        results = driver.execute_script(RESOLVE_ELEMENTS_SCRIPT, payload) or []
+    except Exception as e:
+        print(f'    ⚠️  Element resolution failed: {e}')
+        results = []
+    if len(results) != len(fields):
+        results = [{'element': None, 'by': ''} for _ in fields]
     
-    for by, value in selectors:
-        if value:
-            try:
-                elements = driver.find_elements(by, value)
-                if elements:
-                    return elements[0]
-            except:
-                continue
+    resolved = []
+    handles = {}
+    counts = {}
+    for field, result in zip(fields, results):
+        field = dict(field)
+        if result.get('element') is not None:
+            field['element'] = result['element']
+            field['resolvedBy'] = result['by']
+            handles[field_key(field)] = result['element']
+            counts[result['by']] = counts.get(result['by'], 0) + 1
+        else:
+            field['unresolved'] = True
+        resolved.append(field)
     
-    label = field.get('label', '')
-    if label:
-        try:
-            xpath = f"//label[contains(text(), '{label}')]/following::input[1] | //label[contains(text(), '{label}')]//input"
-            elements = driver.find_elements(By.XPATH, xpath)
-            if elements:
-                return elements[0]
-        except:
-            pass
-        
-        return None
+    unresolved = [f.get('label') or field_key(f) for f in resolved if f.get('unresolved')]
+    if len(fields) > 1:
+        print(f"  🎯 Resolved {len(handles)}/{len(fields)} element(s) in one script ({(time.perf_counter() - started) * 1000:.0f} ms)"
+              + (': ' + ', '.join(f'{n} by {by}' for by, n in counts.items()) if counts else ''))
+        if unresolved:
+            print(f"  ⚠️  {len(unresolved)} unresolvable field(s): {', '.join(unresolved)}")
+    return resolved, handles
 
-def fill_text_field(element, value: str):
+def reset_resolution(field: Dict) -> Dict:
+    return {k: v for k, v in field.items() if k not in ('element', 'resolvedBy', 'unresolved')}
+
+def find_element_by_any_selector(driver, field: Dict):
+    resolved, _ = resolve_field_elements(driver, [field])
+    return resolved[0].get('element')
+
+def type_humanized(element, value: str):
     element.clear()
     time.sleep(0.1)
     
     element.click()
     time.sleep(0.1)
     
-    for char in str(value):
+    for char in value:
         element.send_keys(char)
         time.sleep(0.05)
 
+def type_chunked(element, value: str):
+    element.clear()
+    element.click()
+    for start in range(0, len(value), FILL_CHUNK_SIZE):
+        element.send_keys(value[start:start + FILL_CHUNK_SIZE])
+
+def set_value_fast(element, value: str) -> bool:
+    return element.parent.execute_script(FAST_FILL_SCRIPT, element, value) == value
+
+def fill_text_field(element, value: str, strategy: str = None) -> float:
+    value = str(value)
+    strategy = resolve_fill_strategy(strategy or DEFAULT_FILL_STRATEGY)
+    started = time.perf_counter()
+    if strategy == 'fast' and not set_value_fast(element, value):
+        strategy = 'chunked'
+    if strategy == 'chunked':
+        type_chunked(element, value)
+    elif strategy == 'humanized':
+        type_humanized(element, value)
+    elapsed = time.perf_counter() - started
+    record_fill(strategy, elapsed, len(value))
+    return elapsed
+
 def fill_select_field(element, value: str, options: list):
     try:
         select = Select(element)
@@ -181,6 +377,7 @@ def fill_autocomplete_dropdown(driver, element, value: str, options: list):
         
         time.sleep(0.5)
         
+        before = get_options_signature(driver)
         search_term = str(value).strip()[:30]
         
         for i, char in enumerate(search_term):
@@ -190,7 +387,7 @@ def fill_autocomplete_dropdown(driver, element, value: str, options: list):
             except:
                 break
         
-        time.sleep(1.2)
+        wait_for_options_stable(driver, timeout=1.2, previous=before, settle=FILTER_SETTLE)
         
         option_selectors = [
             '//div[@role="option"]',
@@ -228,11 +425,9 @@ def fill_autocomplete_dropdown(driver, element, value: str, options: list):
                     except:
                         ActionChains(driver).move_to_element(first_option).click().perform()
                 
-                time.sleep(0.5)
-                
                 try:
                     element.send_keys(Keys.ESCAPE)
-                    time.sleep(0.2)
+                    wait_for_listbox_closed(driver, timeout=0.5)
                 except:
                     pass
                 
@@ -258,23 +453,10 @@ def fill_autocomplete_dropdown(driver, element, value: str, options: list):
             pass
         return False
 
-def download_file(url: str, filename: str) -> str:
-    temp_dir = Path.cwd() / 'temp'
-    temp_dir.mkdir(exist_ok=True)
-    
-    if '.' not in filename:
-        filename = filename + '.pdf'
-    
-    temp_path = temp_dir / filename
-    
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url, follow_redirects=True)
-        response.raise_for_status()
-        temp_path.write_bytes(response.content)
-    
-    return str(temp_path.absolute())
+def download_file(url: str) -> str:
+    return get_download_cache().get_path(url)
 
-def fill_field(driver, field: Dict, value: Any):
+def fill_field(driver, field: Dict, value: Any, strategy: Optional[str] = None):
     label = field.get('label', 'Unknown')
     field_type = field.get('fieldType', 'text')
     
@@ -285,7 +467,7 @@ def fill_field(driver, field: Dict, value: Any):
     print(f'  📝 Filling: {label} = {value}')
     
     try:
-        element = find_element_by_any_selector(driver, field)
+        element = field.get('element') if 'element' in field or field.get('unresolved') else find_element_by_any_selector(driver, field)
         if not element:
             print(f'    ❌ Element not found')
             return False
@@ -303,8 +485,8 @@ def fill_field(driver, field: Dict, value: Any):
             if field_type == 'tel':
                 value = re.sub(r'^\+\d{1,3}[-\s]?', '', str(value))
             
-            fill_text_field(element, value)
-            print(f'    ✅ Filled text field')
+            elapsed = fill_text_field(element, value, strategy or fill_strategy_for_url(driver.current_url))
+            print(f'    ✅ Filled text field ({elapsed * 1000:.0f} ms)')
             
         elif field_type == 'select' or field_type == 'autocomplete' or (field_type == 'text' and (is_autocomplete or has_popup)):
             options = field.get('options', [])
@@ -423,7 +605,7 @@ def fill_field(driver, field: Dict, value: Any):
             
         elif field_type == 'file':
             if isinstance(value, str) and value.startswith('http'):
-                file_path = download_file(value, 'resume.pdf')
+                file_path = download_file(value)
                 element.send_keys(file_path)
                 time.sleep(3)
                 print(f'    ✅ Uploaded file')
@@ -435,23 +617,163 @@ def fill_field(driver, field: Dict, value: Any):
         time.sleep(0.2)
         return True
         
+    except StaleElementReferenceException:
+        if field.get('reresolved'):
+            print(f'    ❌ Element went stale again')
+            return False
+        refreshed, _ = resolve_field_elements(driver, [reset_resolution(field)])
+        if refreshed[0].get('unresolved'):
+            print(f'    ❌ Element went stale and could not be found again')
+            return False
+        print(f"    🔄 Element went stale, re-resolved by {refreshed[0]['resolvedBy']}")
+        return fill_field(driver, dict(refreshed[0], reresolved=True), value, strategy)
+        
     except Exception as e:
         print(f'    ❌ Error: {e}')
         return False
 
-def fill_form(driver, fields: List[Dict], field_values: Dict[str, Any]):
-    driver.refresh()
-    time.sleep(2)
+def batch_value(field: Dict, value: Any) -> Any:
+    field_type = field.get('fieldType', 'text')
+    if field_type == 'checkbox':
+        return value is True or str(value).lower() in ['yes', 'true', '1', 'acknowledge']
+    if field_type == 'tel':
+        return re.sub(r'^\+\d{1,3}[-\s]?', '', str(value))
+    return str(value)
+
+def is_batchable(field: Dict, strategy: str) -> bool:
+    field_type = field.get('fieldType', 'text')
+    if field_type not in BATCH_FIELD_TYPES or field.get('isAutocomplete'):
+        return False
+    return strategy == 'fast' or field_type not in TEXT_FIELD_TYPES
+
+def fill_fields_batch(driver, items: List[tuple]) -> List[Dict]:
+    payload = [{
+        'element': field.get('element'),
+        'name': field.get('name'),
+        'fieldType': field.get('fieldType', 'text'),
+        'value': batch_value(field, value),
+    } for field, value in items]
+    started = time.perf_counter()
+    try:
+        results = driver.execute_script(BATCH_FILL_SCRIPT, payload) or []
+    except Exception as e:
+        print(f'    ⚠️  Batch fill failed: {e}')
+        results = []
+    if len(results) != len(items):
+        results = [{'ok': False, 'reason': 'batch failed'} for _ in items]
+    record_fill('batch', time.perf_counter() - started, sum(len(str(p['value'])) for p in payload))
+    return results
+
+def fill_fields(driver, items: List[tuple], strategy: str) -> int:
+    if not items:
+        return 0
+    resolved, _ = resolve_field_elements(driver, [field for field, _ in items])
+    items = [(field, value) for field, (_, value) in zip(resolved, items)]
+    
+    batched = [(field, value) for field, value in items if not field.get('unresolved') and is_batchable(field, strategy)]
+    sequential = [(field, value) for field, value in items if field.get('unresolved') or not is_batchable(field, strategy)]
+    filled_count = 0
+    
+    if batched:
+        started = time.perf_counter()
+        results = fill_fields_batch(driver, batched)
+        for (field, value), result in zip(batched, results):
+            label = field.get('label', 'Unknown')
+            if result.get('ok'):
+                filled_count += 1
+                print(f"  ⚡ Filled: {label} = {result.get('value')}")
+            else:
+                print(f"  ↪️  {label}: {result.get('reason')}, filling interactively")
+                sequential.append((field, value))
+        if len(batched) > 1:
+            print(f'    ⚡ Batch-filled {filled_count}/{len(batched)} simple field(s) in one script ({(time.perf_counter() - started) * 1000:.0f} ms)')
+    
+    changed_since_resolve = bool(batched)
+    for idx, (field, value) in enumerate(sequential):
+        if field.get('unresolved') and changed_since_resolve:
+            waiting = [i for i in range(idx, len(sequential)) if sequential[i][0].get('unresolved')]
+            retried, _ = resolve_field_elements(driver, [reset_resolution(sequential[i][0]) for i in waiting])
+            for i, retried_field in zip(waiting, retried):
+                sequential[i] = (retried_field, sequential[i][1])
+            changed_since_resolve = False
+            field = sequential[idx][0]
+        if field.get('unresolved'):
+            print(f"  ⏭️  Skipping: {field.get('label', 'Unknown')} (element not found)")
+            continue
+        if fill_field(driver, field, value, strategy):
+            filled_count += 1
+            changed_since_resolve = True
+    return filled_count
+
+def prepare_form(driver, refresh: bool = False):
+    if refresh:
+        driver.refresh()
+        time.sleep(2)
+        return
+    state = restore_probed_state(driver)
+    if state['reset_inputs'] or state['listbox_open']:
+        print(f"🧹 Restored {state['reset_inputs']} probed input(s)" + (', a listbox is still open' if state['listbox_open'] else ''))
+
+def fill_form(driver, fields: List[Dict], field_values: Dict[str, Any], refresh: bool = False, strategy: Optional[str] = None):
+    prepare_form(driver, refresh)
+    
+    strategy = resolve_fill_strategy(strategy or fill_strategy_for_url(driver.current_url))
+    print(f'\n📝 Filling {len(fields)} form fields ({strategy} typing)...\n')
+    items = [(field, field_values.get(field.get('label', ''))) for field in fields]
+    items = [(field, value) for field, value in items if value is not None and value != '']
+    filled_count = fill_fields(driver, items, strategy)
+    
+    print(f'\n✅ Successfully filled {filled_count}/{len(fields)} fields')
+    return filled_count
+
+def needs_option_match(field: Dict) -> bool:
+    return bool(field.get('options')) and field.get('fieldType') in MATCHED_FIELD_TYPES
+
+def map_field_stream(field_stream: Iterable[Dict], map_values: Callable[[List[Dict]], Dict[str, Any]], batch_size: int = STREAM_MATCH_BATCH_SIZE):
+    pending = []
+    
+    def flush():
+        values = map_values(pending)
+        for buffered in pending:
+            yield buffered, values
+        pending.clear()
+    
+    for field in field_stream:
+        if needs_option_match(field):
+            pending.append(field)
+            if len(pending) >= batch_size:
+                yield from flush()
+            continue
+        yield field, map_values([field])
+    if pending:
+        yield from flush()
+
+def fill_form_streaming(driver, field_stream: Iterable[Dict], map_values: Callable[[List[Dict]], Dict[str, Any]], started: float = None, strategy: Optional[str] = None, refresh: bool = False):
+    started = started or time.perf_counter()
+    field_stream = iterate_in_background(field_stream)
+    prepare_form(driver, refresh)
     
-    print(f'\n📝 Filling {len(fields)} form fields...\n')
+    strategy = resolve_fill_strategy(strategy or fill_strategy_for_url(driver.current_url))
+    print(f'\n📝 Filling form fields as they are identified ({strategy} typing)...\n')
+    fields = []
+    field_values = {}
     filled_count = 0
-    for field in fields:
+    first_filled = None
+    for field, values in map_field_stream(field_stream, map_values):
+        fields.append(field)
+        field_values.update(values)
         label = field.get('label', '')
-        value = field_values.get(label)
+        value = values.get(label)
         
         if value is not None and value != '':
-            if fill_field(driver, field, value):
+            if fill_fields(driver, [(field, value)], strategy):
                 filled_count += 1
+                if first_filled is None:
+                    first_filled = time.perf_counter() - started
+                    print(f'    ⚡ First field filled after {first_filled:.2f}s')
     
+    total = time.perf_counter() - started
     print(f'\n✅ Successfully filled {filled_count}/{len(fields)} fields')
-    return filled_count
\ No newline at end of file
+    if first_filled is not None:
+        print(f'⏱️  Time to first filled field: {first_filled:.2f}s, total: {total:.2f}s')
+    return {'fields': fields, 'field_values': field_values, 'filled_count': filled_count, 'first_filled': first_filled, 'total': total}
@@ -0,0 +1,177 @@
+import json
+from typing import Dict, List, Any
+from bs4 import BeautifulSoup, Tag
+
+MIN_SCHEMA_CONTROLS = 3
+MAX_INLINE_OPTIONS = 60
+SKIPPED_INPUT_TYPES = {'hidden', 'submit', 'button', 'reset', 'image'}
+CONTROL_SELECTOR = 'input, select, textarea, [role="combobox"], [role="listbox"], [contenteditable="true"]'
+SECTION_HEADINGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'legend']
+DEFAULT_SHARD_SIZE = 25
+
+def clean_text(text: str) -> str:
+    return ' '.join((text or '').split())
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+def index_labels(soup) -> (Dict[str, str], Dict[str, Tag]):
+    labels_for = {}
+    by_id = {}
+    for tag in soup.find_all(True):
+        tag_id = tag.get('id')
+        if tag_id and tag_id not in by_id:
+            by_id[tag_id] = tag
+        if tag.name == 'label' and tag.get('for') and tag['for'] not in labels_for:
+            labels_for[tag['for']] = clean_text(tag.get_text(' '))
+    return labels_for, by_id
+
+def resolve_label(control: Tag, labels_for: Dict[str, str], by_id: Dict[str, Tag]) -> str:
+    control_id = control.get('id')
+    if control_id and labels_for.get(control_id):
+        return labels_for[control_id]
+    labelledby = control.get('aria-labelledby')
+    if labelledby:
+        parts = [clean_text(by_id[ref].get_text(' ')) for ref in labelledby.split() if ref in by_id]
+        text = ' '.join(p for p in parts if p)
+        if text:
+            return text
+    if control.get('aria-label'):
+        return clean_text(control['aria-label'])
+    wrapping = control.find_parent('label')
+    if wrapping is not None:
+        return clean_text(wrapping.get_text(' '))
+    return ''
+
+def resolve_group_label(control: Tag, by_id: Dict[str, Tag]) -> str:
+    for parent in control.parents:
+        if not isinstance(parent, Tag):
+            continue
+        if parent.name == 'fieldset':
+            legend = parent.find('legend')
+            if legend is not None:
+                return clean_text(legend.get_text(' '))
+        if parent.get('role') in ('group', 'radiogroup'):
+            if parent.get('aria-labelledby'):
+                parts = [clean_text(by_id[ref].get_text(' ')) for ref in parent['aria-labelledby'].split() if ref in by_id]
+                if any(parts):
+                    return ' '.join(p for p in parts if p)
+            if parent.get('aria-label'):
+                return clean_text(parent['aria-label'])
+    return ''
+
+def is_required(control: Tag, label: str) -> bool:
+    return (
+        control.has_attr('required')
+        or str(control.get('aria-required', '')).lower() == 'true'
+        or label.rstrip().endswith('*')
+    )
+
+def index_sections(soup) -> Dict[int, Tag]:
+    headings = {}
+    current = None
+    for node in soup.descendants:
+        if not isinstance(node, Tag):
+            continue
+        headings[id(node)] = current
+        if node.name in SECTION_HEADINGS:
+            current = node
+    return headings
+
+def resolve_section(control: Tag, headings: Dict[int, Tag]) -> str:
+    heading = headings.get(id(control))
+    return clean_text(heading.get_text(' '))[:80] if heading is not None else ''
+
+def extract_form_schema(base_html, sections: Dict[str, Any] = None, include_section: bool = False) -> List[Dict[str, Any]]:
+    sections = sections or {}
+    soup = base_html if isinstance(base_html, Tag) else BeautifulSoup(base_html, 'html.parser')
+    labels_for, by_id = index_labels(soup)
+    headings = index_sections(soup) if include_section else {}
+    schema = []
+    for control in soup.select(CONTROL_SELECTOR):
+        control_type = (control.get('type') or '').lower()
+        if control.name == 'input' and control_type in SKIPPED_INPUT_TYPES:
+            continue
+        control_id = control.get('id')
+        control_name = control.get('name')
+        if not (control_id or control_name):
+            continue
+        label = resolve_label(control, labels_for, by_id)
+        entry = {'tag': control.name}
+        if control_id:
+            entry['id'] = control_id
+        if control_name:
+            entry['name'] = control_name
+        if control_type:
+            entry['type'] = control_type
+        if control.get('role'):
+            entry['role'] = control['role']
+        if label.rstrip(' *'):
+            entry['label'] = label.rstrip(' *')
+        if control_type in ('radio', 'checkbox'):
+            group = resolve_group_label(control, by_id)
+            if group and group != label:
+                entry['group'] = group
+            if control.get('value'):
+                entry['value'] = control['value']
+        if is_required(control, label):
+            entry['required'] = True
+        if control.get('placeholder'):
+            entry['placeholder'] = control['placeholder']
+        if control_id and sections.get(control_id, {}).get('options'):
+            entry['options'] = f'@{control_id}'
+        elif control.name == 'select':
+            options = [clean_text(o.get_text()) for o in control.find_all('option') if o.get('value', o.get_text()).strip() != '']
+            options = [o for o in options if o]
+            if options:
+                entry['options'] = options[:MAX_INLINE_OPTIONS]
+        if include_section:
+            entry['section'] = resolve_section(control, headings)
+        schema.append(entry)
+    return schema
+
+def group_schema_entries(schema: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    groups = []
+    for entry in schema:
+        if groups:
+            previous = groups[-1][-1]
+            same_section = entry.get('section') == previous.get('section')
+            same_choice = entry.get('type') in ('radio', 'checkbox') and entry.get('name') and entry.get('name') == previous.get('name')
+            if same_section or same_choice:
+                groups[-1].append(entry)
+                continue
+        groups.append([entry])
+    return groups
+
+def split_group(group: List[Dict[str, Any]], shard_size: int) -> List[List[Dict[str, Any]]]:
+    pieces = []
+    for entry in group:
+        previous = pieces[-1][-1] if pieces else None
+        same_choice = previous is not None and entry.get('type') in ('radio', 'checkbox') and entry.get('name') and entry.get('name') == previous.get('name')
+        if pieces and (same_choice or len(pieces[-1]) < shard_size):
+            pieces[-1].append(entry)
+        else:
+            pieces.append([entry])
+    return pieces
+
+def chunk_schema(schema: List[Dict[str, Any]], shard_size: int = DEFAULT_SHARD_SIZE) -> List[List[Dict[str, Any]]]:
+    chunks = []
+    for group in group_schema_entries(schema):
+        for piece in split_group(group, shard_size):
+            if chunks and len(chunks[-1]) + len(piece) <= shard_size:
+                chunks[-1].extend(piece)
+            else:
+                chunks.append(list(piece))
+    return chunks
+
+def schema_to_prompt(schema: List[Dict[str, Any]]) -> str:
+    return '\n'.join(json.dumps({k: v for k, v in entry.items() if k != 'section'}, ensure_ascii=False, separators=(',', ':')) for entry in schema)
+
+def build_form_context(base_html: str, sections: Dict[str, Any] = None, min_controls: int = MIN_SCHEMA_CONTROLS, schema: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    if schema is None:
+        schema = extract_form_schema(base_html, sections)
+    raw_tokens = estimate_tokens(base_html)
+    if len(schema) < min_controls:
+        return {'mode': 'html', 'content': base_html, 'schema': schema, 'raw_tokens': raw_tokens, 'tokens': raw_tokens}
+    content = schema_to_prompt(schema)
+    return {'mode': 'schema', 'content': content, 'schema': schema, 'raw_tokens': raw_tokens, 'tokens': estimate_tokens(content)}
@@ -0,0 +1,180 @@
+from typing import Dict, Any, List, Union
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
+from form_schema import CONTROL_SELECTOR, SKIPPED_INPUT_TYPES, MAX_INLINE_OPTIONS, extract_form_schema
+from page_processor import install_delta_observer, reset_delta, collect_delta, click_dropdown
+from snapshot_parser import parse_snapshot
+from clean_document import CleanDocument, extract_section_options
+from waits import wait_for_dropdown_open, wait_for_listbox_closed
+
+STATE_KEYS = ('filled', 'valid', 'visible')
+
+READ_CONTROL_STATE_SCRIPT = """
+var selector = arguments[0], skipped = arguments[1], maxOptions = arguments[2];
+var clean = function(text) { return (text || '').replace(/\\s+/g, ' ').trim(); };
+var textOf = function(ids) {
+    return clean((ids || '').split(/\\s+/).map(function(ref) {
+        var el = ref ? document.getElementById(ref) : null;
+        return el ? el.textContent : '';
+    }).join(' '));
+};
+var labelFor = function(el) {
+    if (el.labels && el.labels.length) return clean(el.labels[0].textContent);
+    var text = textOf(el.getAttribute('aria-labelledby'));
+    if (text) return text;
+    if (el.getAttribute('aria-label')) return clean(el.getAttribute('aria-label'));
+    var wrapping = el.closest('label');
+    return wrapping ? clean(wrapping.textContent) : '';
+};
+var groupFor = function(el) {
+    for (var p = el.parentElement; p; p = p.parentElement) {
+        if (p.tagName === 'FIELDSET') {
+            var legend = p.querySelector('legend');
+            if (legend) return clean(legend.textContent);
+        }
+        var role = p.getAttribute('role');
+        if (role === 'group' || role === 'radiogroup') {
+            var text = textOf(p.getAttribute('aria-labelledby')) || clean(p.getAttribute('aria-label'));
+            if (text) return text;
+        }
+    }
+    return '';
+};
+var chosenText = function(el) {
+    for (var p = el.parentElement, depth = 0; p && depth < 5; p = p.parentElement, depth++) {
+        var chosen = p.querySelectorAll('[class*="single-value"], [class*="multi-value__label"]');
+        if (chosen.length) return Array.prototype.map.call(chosen, function(c) { return clean(c.textContent); }).join(', ');
+    }
+    return '';
+};
+var states = [];
+var controls = document.querySelectorAll(selector);
+for (var i = 0; i < controls.length; i++) {
+    var el = controls[i];
+    var tag = el.tagName.toLowerCase();
+    var type = (el.getAttribute('type') || '').toLowerCase();
+    if (tag === 'input' && skipped.indexOf(type) !== -1) continue;
+    if (!(el.id || el.getAttribute('name'))) continue;
+    var label = labelFor(el);
+    var entry = {tag: tag};
+    if (el.id) entry.id = el.id;
+    if (el.getAttribute('name')) entry.name = el.getAttribute('name');
+    if (type) entry.type = type;
+    if (el.getAttribute('role')) entry.role = el.getAttribute('role');
+    if (label.replace(/[\\s*]+$/, '')) entry.label = label.replace(/[\\s*]+$/, '');
+    if (type === 'radio' || type === 'checkbox') {
+        var group = groupFor(el);
+        if (group && group !== label) entry.group = group;
+        if (el.getAttribute('value')) entry.value = el.getAttribute('value');
+    }
+    if (el.required || el.getAttribute('aria-required') === 'true' || /\\*\\s*$/.test(label)) entry.required = true;
+    if (el.getAttribute('placeholder')) entry.placeholder = el.getAttribute('placeholder');
+    var filled;
+    if (type === 'radio' || type === 'checkbox') {
+        filled = el.checked;
+    } else if (type === 'file') {
+        filled = !!(el.files && el.files.length);
+    } else if (tag === 'select') {
+        filled = el.selectedIndex !== -1 && el.value !== '';
+        var options = Array.prototype.filter.call(el.options, function(o) { return o.value !== ''; })
+            .map(function(o) { return clean(o.label || o.text); }).filter(function(t) { return t; });
+        if (options.length) entry.options = options.slice(0, maxOptions);
+    } else if (el.getAttribute('role') === 'combobox') {
+        filled = !!(chosenText(el) || clean(el.value));
+    } else if (el.isContentEditable) {
+        filled = !!clean(el.textContent);
+    } else {
+        filled = !!clean(el.value);
+    }
+    entry.filled = filled;
+    entry.valid = (el.validity ? el.validity.valid : true) && el.getAttribute('aria-invalid') !== 'true';
+    entry.visible = type === 'file' || el.getClientRects().length > 0;
+    states.push(entry);
+}
+return states;
+"""
+
+def read_control_states(driver: WebDriver) -> List[Dict[str, Any]]:
+    return driver.execute_script(READ_CONTROL_STATE_SCRIPT, CONTROL_SELECTOR, sorted(SKIPPED_INPUT_TYPES), MAX_INLINE_OPTIONS) or []
+
+def control_key(entry: Dict[str, Any]) -> str:
+    if entry.get('type') in ('radio', 'checkbox') and entry.get('name'):
+        return entry['name']
+    return entry.get('id') or entry.get('name') or ''
+
+def first_pass_schema(html: Union[str, CleanDocument]) -> List[Dict[str, Any]]:
+    document = html if isinstance(html, CleanDocument) else CleanDocument(html=html)
+    structure = document.get_structure()
+    return extract_form_schema(structure['base'], structure['sections'])
+
+def schema_keys(schema: List[Dict[str, Any]]) -> set:
+    return {key for entry in schema for key in (entry.get('id'), entry.get('name')) if key}
+
+def find_remaining_controls(states: List[Dict[str, Any]], schema: List[Dict[str, Any]], fields: List[Dict[str, Any]], filled_labels: List[str]) -> List[Dict[str, Any]]:
+    known = schema_keys(schema)
+    attempted = set()
+    for field in fields:
+        if field.get('label') in filled_labels:
+            attempted.update(k for k in (field.get('id'), field.get('name')) if k)
+
+    groups = {}
+    for entry in states:
+        key = control_key(entry)
+        if key:
+            groups.setdefault(key, []).append(entry)
+
+    remaining = []
+    for key, entries in groups.items():
+        if not any(e['visible'] for e in entries):
+            continue
+        filled = any(e['filled'] for e in entries)
+        required = any(e.get('required') for e in entries)
+        invalid = not all(e['valid'] for e in entries)
+        is_new = not any(k in known for e in entries for k in (e.get('id'), e.get('name')) if k)
+        was_attempted = any(k in attempted for e in entries for k in (e.get('id'), e.get('name')) if k)
+
+        if filled and not (required and invalid):
+            continue
+        if not (is_new or required or was_attempted or invalid):
+            continue
+        for entry in entries:
+            pending = {k: v for k, v in entry.items() if k not in STATE_KEYS}
+            pending['reason'] = 'new' if is_new else ('invalid' if filled else 'empty')
+            remaining.append(pending)
+    return remaining
+
+def harvest_pending_options(driver: WebDriver, pending: List[Dict[str, Any]]) -> Dict[str, Any]:
+    sections = {}
+    lazy = [e for e in pending if e.get('role') == 'combobox' and e.get('id') and not e.get('options')]
+    if not lazy:
+        return sections
+    install_delta_observer(driver)
+    for entry in lazy:
+        try:
+            element = driver.find_element('id', entry['id'])
+        except:
+            continue
+        reset_delta(driver)
+        if not click_dropdown(driver, {'element': element, 'type': 'custom'}):
+            continue
+        wait_for_dropdown_open(driver, timeout=1.7)
+        delta = collect_delta(driver, element)
+        try:
+            ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+            wait_for_listbox_closed(driver, timeout=0.5)
+        except:
+            pass
+        options = extract_section_options(parse_snapshot(f'<div>{delta}</div>')) if delta else []
+        if options:
+            sections[entry['id']] = {'element': None, 'options': options}
+            entry['options'] = f"@{entry['id']}"
+    return sections
+
+def collect_remaining_controls(driver: WebDriver, html: Union[str, CleanDocument], fields: List[Dict[str, Any]], filled_labels: List[str]) -> (List[Dict[str, Any]], Dict[str, Any]):
+    states = read_control_states(driver)
+    pending = find_remaining_controls(states, first_pass_schema(html), fields, filled_labels)
+    new_count = sum(1 for e in pending if e['reason'] == 'new')
+    print(f'   🔎 Read {len(states)} control(s) in one pass: {len(pending)} still need a value ({new_count} appeared after the first pass)')
+    sections = harvest_pending_options(driver, pending)
+    return pending, sections
@@ -0,0 +1,91 @@
+import re
+import json
+from typing import Any, Dict, List, Iterable, Iterator
+
+TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+class JSONArrayStreamParser:
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.in_comment = False
+        self.pending_slash = False
+        self.buffer = []
+        self.parsed = 0
+        self.errors = 0
+
+    def parse_object(self, text: str) -> Any:
+        try:
+            return json.loads(text)
+        except:
+            pass
+        try:
+            return json.loads(TRAILING_COMMA.sub(r'\1', text))
+        except:
+            self.errors += 1
+            return None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        completed = []
+        for char in chunk:
+            if self.finished:
+                break
+            if not self.started:
+                if char == '[':
+                    self.started = True
+                continue
+            if self.depth == 0:
+                if char == '{':
+                    self.depth = 1
+                    self.buffer = ['{']
+                elif char == ']':
+                    self.finished = True
+                continue
+            if self.in_comment:
+                if char == '\n':
+                    self.in_comment = False
+                    self.buffer.append(char)
+                continue
+            if self.in_string:
+                self.buffer.append(char)
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            if self.pending_slash:
+                self.pending_slash = False
+                if char == '/':
+                    self.in_comment = True
+                    continue
+                self.buffer.append('/')
+            if char == '/':
+                self.pending_slash = True
+                continue
+            self.buffer.append(char)
+            if char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    value = self.parse_object(''.join(self.buffer))
+                    self.buffer = []
+                    if isinstance(value, dict):
+                        self.parsed += 1
+                        completed.append(value)
+        return completed
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    parser = JSONArrayStreamParser()
+    for chunk in chunks:
+        for value in parser.feed(chunk):
+            yield value
+        if parser.finished:
+            break
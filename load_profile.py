@@ -0,0 +1,139 @@
+import json
+from urllib.parse import urlparse
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Set
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webdriver import WebDriver
+
+RESOURCE_TYPE_EXTENSIONS = {
+    'Image': ['png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'],
+    'Font': ['woff', 'woff2', 'ttf', 'otf', 'eot'],
+    'Media': ['mp4', 'webm', 'mov', 'm3u8', 'mp3', 'wav', 'ogg'],
+}
+
+def extension_patterns(extension: str) -> List[str]:
+    return [f'*.{extension}', f'*.{extension}\\?*']
+
+TRACKER_PATTERNS = [
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*doubleclick.net*',
+    '*connect.facebook.net*',
+    '*hotjar.com*',
+    '*segment.io*',
+    '*cdn.segment.com*',
+    '*intercom.io*',
+    '*intercomcdn.com*',
+    '*js.driftt.com*',
+    '*static.zdassets.com*',
+    '*js.hs-scripts.com*',
+    '*js.hs-analytics.net*',
+    '*snap.licdn.com*',
+    '*bat.bing.com*',
+    '*clarity.ms*',
+    '*fullstory.com*',
+    '*optimizely.com*',
+]
+
+ESTIMATED_RESOURCE_BYTES = {
+    'Image': 40_000,
+    'Font': 30_000,
+    'Media': 500_000,
+    'Script': 60_000,
+    'XHR': 2_000,
+    'Fetch': 2_000,
+    'Other': 5_000,
+}
+
+HEADLESS_ARGS = [
+    '--headless=new',
+    '--disable-gpu',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--mute-audio',
+    '--disable-extensions',
+    '--autoplay-policy=user-gesture-required',
+    '--window-size=1366,768',
+]
+
+SEEN_ORIGINS: Dict[int, Set[str]] = {}
+
+def url_origin(url: str) -> str:
+    parsed = urlparse(url or '')
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        return ''
+    return f'{parsed.scheme}://{parsed.netloc}'
+
+def read_performance_log(driver: WebDriver) -> List[Dict[str, Any]]:
+    messages = []
+    origins = SEEN_ORIGINS.setdefault(id(driver), set())
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry['message'])['message']
+        except:
+            continue
+        params = message.get('params', {})
+        if message.get('method') == 'Network.requestWillBeSent' and params.get('type') == 'Document':
+            origin = url_origin(params.get('request', {}).get('url'))
+            if origin:
+                origins.add(origin)
+        messages.append(message)
+    return messages
+
+def pop_seen_origins(driver: WebDriver) -> Set[str]:
+    read_performance_log(driver)
+    return SEEN_ORIGINS.pop(id(driver), set())
+
+@dataclass
+class LoadProfile:
+    resource_types: List[str] = field(default_factory=lambda: ['Image', 'Font', 'Media'])
+    url_patterns: List[str] = field(default_factory=lambda: list(TRACKER_PATTERNS))
+    headless: bool = False
+    estimated_bytes: Dict[str, int] = field(default_factory=lambda: dict(ESTIMATED_RESOURCE_BYTES))
+
+    def blocked_urls(self) -> List[str]:
+        patterns = []
+        for resource_type in self.resource_types:
+            for extension in RESOURCE_TYPE_EXTENSIONS.get(resource_type, []):
+                patterns.extend(extension_patterns(extension))
+        patterns.extend(self.url_patterns)
+        return patterns
+
+def apply_load_profile_options(chrome_options: Options, profile: LoadProfile) -> Options:
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    if profile.headless:
+        for arg in HEADLESS_ARGS:
+            chrome_options.add_argument(arg)
+    return chrome_options
+
+def apply_load_profile(driver: WebDriver, profile: LoadProfile) -> None:
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': profile.blocked_urls()})
+
+def collect_load_report(driver: WebDriver, profile: LoadProfile) -> Dict[str, Any]:
+    request_types = {}
+    report = {'requests': 0, 'bytes': 0, 'blocked_requests': 0, 'blocked_by_type': {}, 'estimated_bytes_saved': 0}
+    try:
+        messages = read_performance_log(driver)
+    except:
+        return report
+    for message in messages:
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.requestWillBeSent':
+            request_types[params.get('requestId')] = params.get('type', 'Other')
+            report['requests'] += 1
+        elif method == 'Network.loadingFinished':
+            report['bytes'] += int(params.get('encodedDataLength', 0))
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            resource_type = params.get('type') or request_types.get(params.get('requestId'), 'Other')
+            report['blocked_requests'] += 1
+            report['blocked_by_type'][resource_type] = report['blocked_by_type'].get(resource_type, 0) + 1
+            report['estimated_bytes_saved'] += profile.estimated_bytes.get(resource_type, profile.estimated_bytes.get('Other', 0))
+    return report
+
+def print_load_report(report: Dict[str, Any]) -> None:
+    by_type = ', '.join(f'{t}: {c}' for t, c in sorted(report['blocked_by_type'].items())) or 'none'
+    print(f"   🚫 Blocked {report['blocked_requests']}/{report['requests']} request(s) ({by_type}), "
+          f"{report['bytes'] / 1024:.0f} KB transferred "
+          f"(estimated ~{report['estimated_bytes_saved'] / 1024:.0f} KB avoided at typical per-type sizes)")
@@ -0,0 +1,365 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, FrozenSet, Any
+import numpy as np
+
+CONFIDENCE_THRESHOLD = 0.75
+
+DEGREE_SYNONYMS = {
+    'degree:high_school': ['high school', 'high school diploma', 'ged', 'secondary school', 'hs diploma'],
+    'degree:associate': ['associate', 'associates', 'associate degree', 'associates degree', 'aa', 'as', 'aas'],
+    'degree:bachelor': ['bachelor', 'bachelors', 'bachelors degree', 'bachelor degree', 'bachelor of science', 'bachelor of arts',
+                        'bachelor of engineering', 'bs', 'b s', 'bsc', 'ba', 'b a', 'be', 'btech', 'b tech', 'undergraduate', 'undergraduate degree'],
+    'degree:master': ['master', 'masters', 'masters degree', 'master degree', 'master of science', 'master of arts',
+                      'master of engineering', 'ms', 'm s', 'msc', 'ma', 'm a', 'meng', 'mba', 'mtech', 'graduate degree'],
+    'degree:doctorate': ['phd', 'ph d', 'doctorate', 'doctoral', 'doctoral degree', 'doctor of philosophy', 'dphil', 'md', 'jd'],
+}
+
+COUNTRY_SYNONYMS = {
+    'country:us': ['united states', 'united states of america', 'usa', 'us', 'u s', 'u s a', 'america', 'the united states'],
+    'country:gb': ['united kingdom', 'uk', 'u k', 'great britain', 'britain', 'england', 'scotland', 'wales', 'northern ireland', 'gb'],
+    'country:ae': ['united arab emirates', 'uae', 'u a e', 'emirates'],
+    'country:ca': ['canada'],
+    'country:de': ['germany', 'deutschland'],
+    'country:nl': ['netherlands', 'the netherlands', 'holland'],
+    'country:kr': ['south korea', 'korea', 'republic of korea', 'korea republic of'],
+    'country:ru': ['russia', 'russian federation'],
+    'country:cz': ['czech republic', 'czechia'],
+    'country:ie': ['ireland', 'republic of ireland'],
+    'country:in': ['india', 'bharat'],
+    'country:cn': ['china', 'peoples republic of china', 'prc'],
+    'country:tw': ['taiwan', 'republic of china'],
+    'country:mx': ['mexico'],
+    'country:br': ['brazil', 'brasil'],
+    'country:ch': ['switzerland', 'swiss confederation'],
+    'country:ci': ['ivory coast', 'cote divoire', 'côte divoire'],
+    'country:vn': ['vietnam', 'viet nam'],
+    'country:ir': ['iran', 'islamic republic of iran'],
+    'country:sy': ['syria', 'syrian arab republic'],
+    'country:la': ['laos', 'lao peoples democratic republic'],
+    'country:bo': ['bolivia', 'plurinational state of bolivia'],
+    'country:ve': ['venezuela', 'bolivarian republic of venezuela'],
+    'country:tz': ['tanzania', 'united republic of tanzania'],
+    'country:md': ['moldova', 'republic of moldova'],
+    'country:mk': ['north macedonia', 'macedonia'],
+    'country:sz': ['eswatini', 'swaziland'],
+    'country:mm': ['myanmar', 'burma'],
+}
+
+US_STATES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California', 'CO': 'Colorado',
+    'CT': 'Connecticut', 'DE': 'Delaware', 'DC': 'District of Columbia', 'FL': 'Florida', 'GA': 'Georgia',
+    'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland', 'MA': 'Massachusetts',
+    'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi', 'MO': 'Missouri', 'MT': 'Montana',
+    'NE': 'Nebraska', 'NV': 'Nevada', 'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico',
+    'NY': 'New York', 'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina', 'SD': 'South Dakota',
+    'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington',
+    'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming', 'PR': 'Puerto Rico',
+}
+
+STATE_SYNONYMS = {f'state:{code.lower()}': [code.lower(), name.lower()] for code, name in US_STATES.items()}
+
+EEO_SYNONYMS = {
+    'eeo:decline': ['decline to self identify', 'decline to answer', 'decline', 'i decline', 'i dont wish to answer',
+                    'i do not wish to answer', 'prefer not to say', 'prefer not to answer', 'i prefer not to say',
+                    'i prefer not to answer', 'choose not to disclose', 'i choose not to disclose', 'not specified',
+                    'do not wish to disclose', 'i dont want to answer'],
+    'eeo:not_veteran': ['not a veteran', 'i am not a veteran', 'i am not a protected veteran', 'not a protected veteran',
+                        'non veteran', 'no military service'],
+    'eeo:veteran': ['veteran', 'protected veteran', 'i am a veteran', 'i identify as one or more of the classifications of protected veteran'],
+    'eeo:no_disability': ['no disability', 'no i dont have a disability', 'no i do not have a disability',
+                          'i dont have a disability', 'i do not have a disability', 'not disabled'],
+    'eeo:disability': ['yes i have a disability', 'i have a disability', 'disabled',
+                       'yes i have a disability or have had one in the past'],
+    'eeo:white': ['white', 'caucasian', 'white not hispanic or latino'],
+    'eeo:black': ['black', 'african american', 'black or african american', 'black or african american not hispanic or latino'],
+    'eeo:hispanic': ['hispanic', 'latino', 'latina', 'latinx', 'hispanic or latino'],
+    'eeo:asian': ['asian', 'asian american', 'asian not hispanic or latino'],
+    'eeo:native': ['american indian', 'alaska native', 'american indian or alaska native', 'native american'],
+    'eeo:pacific': ['native hawaiian', 'pacific islander', 'native hawaiian or other pacific islander'],
+    'eeo:multiracial': ['two or more races', 'multiracial', 'mixed race', 'two or more races not hispanic or latino'],
+}
+
+YES_NO_SYNONYMS = {
+    'answer:yes': ['yes', 'y', 'true', '1', 'yeah', 'yep', 'affirmative', 'i am', 'i do', 'i will', 'i can', 'correct'],
+    'answer:no': ['no', 'n', 'false', '0', 'nope', 'negative', 'i am not', 'i do not', 'i dont', 'i will not', 'i cannot', 'none'],
+}
+
+SYNONYM_DOMAINS = {
+    'degree': DEGREE_SYNONYMS,
+    'country': COUNTRY_SYNONYMS,
+    'state': STATE_SYNONYMS,
+    'eeo': EEO_SYNONYMS,
+    'answer': YES_NO_SYNONYMS,
+}
+
+IMPLIED_CONCEPTS = {
+    'eeo:not_veteran': 'answer:no',
+    'eeo:no_disability': 'answer:no',
+    'eeo:veteran': 'answer:yes',
+    'eeo:disability': 'answer:yes',
+}
+
+ABBREVIATIONS = {
+    'univ': 'university',
+    'uni': 'university',
+    'inst': 'institute',
+    'coll': 'college',
+    'intl': 'international',
+    'natl': 'national',
+    'dept': 'department',
+}
+
+def normalize(text: str) -> str:
+    text = str(text).lower().replace("'", '').replace('’', '')
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in re.sub(r'[^\w]+', ' ', text).split())
+
+def build_phrase_index() -> Dict[str, Dict[str, FrozenSet[str]]]:
+    index = {}
+    for domain, table in SYNONYM_DOMAINS.items():
+        phrases = {}
+        for concept, aliases in table.items():
+            for alias in aliases:
+                key = normalize(alias)
+                phrases[key] = phrases.get(key, frozenset()) | {concept}
+        index[domain] = phrases
+    return index
+
+PHRASE_INDEX = build_phrase_index()
+
+def build_phrase_starts() -> Dict[str, Dict[str, int]]:
+    starts = {}
+    for domain, phrases in PHRASE_INDEX.items():
+        longest = {}
+        for phrase in phrases:
+            tokens = phrase.split()
+            longest[tokens[0]] = max(longest.get(tokens[0], 0), len(tokens))
+        starts[domain] = longest
+    return starts
+
+PHRASE_STARTS = build_phrase_starts()
+
+@lru_cache(maxsize=32)
+def merged_phrase_starts(domains: Tuple[str, ...]) -> Dict[str, int]:
+    merged = {}
+    for domain in domains:
+        for token, size in PHRASE_STARTS[domain].items():
+            merged[token] = max(merged.get(token, 0), size)
+    return merged
+
+def domains_for_label(field_label: str) -> Tuple[str, ...]:
+    label = normalize(field_label)
+    if 'country' in label or 'nationality' in label or 'citizenship' in label:
+        return ('country', 'answer')
+    if re.search(r'\b(state|province|region)\b', label):
+        return ('state', 'country', 'answer')
+    if re.search(r'\b(degree|education|qualification)\b', label):
+        return ('degree', 'answer')
+    return ('degree', 'eeo', 'answer', 'country')
+
+@lru_cache(maxsize=4096)
+def concepts_for(text: str, domains: Tuple[str, ...]) -> FrozenSet[str]:
+    found = set()
+    for domain in domains:
+        found |= PHRASE_INDEX[domain].get(text, frozenset())
+    if not found:
+        starts = merged_phrase_starts(domains)
+        tokens = text.split()
+        pos = 0
+        while pos < len(tokens):
+            longest = starts.get(tokens[pos], 0)
+            step = 1
+            for size in range(min(len(tokens) - pos, longest), 0, -1):
+                phrase = ' '.join(tokens[pos:pos + size])
+                hits = set()
+                for domain in domains:
+                    hits |= PHRASE_INDEX[domain].get(phrase, frozenset())
+                if size == 1 and len(phrase) <= 2:
+                    hits = {c for c in hits if pos == 0 and c.startswith('answer:')}
+                if hits:
+                    found |= hits
+                    step = size
+                    break
+            pos += step
+    if 'answer' in domains:
+        found |= {IMPLIED_CONCEPTS[c] for c in found if c in IMPLIED_CONCEPTS}
+    return frozenset(found)
+
+ROW_SEPARATOR = '\x00'
+ASCII_WORD_TABLE = bytes(c if chr(c).isalnum() or c in (0, 95) or c >= 128 else 32 for c in range(256))
+
+def char_ngrams(text: str, n: int = 3) -> FrozenSet[str]:
+    padded = f' {text} '
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+def as_codes(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+def pack_trigrams(chars: np.ndarray, bits: int, dtype) -> np.ndarray:
+    chars = chars.astype(dtype)
+    return (chars[:-2] << dtype(2 * bits)) | (chars[1:-1] << dtype(bits)) | chars[2:]
+
+def sorted_unique(keys: np.ndarray) -> np.ndarray:
+    keys = np.sort(keys)
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = keys[1:] != keys[:-1]
+    return keys[keep]
+
+def normalized_tokens(options: Tuple[str, ...]) -> List[str]:
+    try:
+        text = ROW_SEPARATOR.join(options)
+    except TypeError:
+        text = None
+    if text is None or text.count(ROW_SEPARATOR) != len(options) - 1:
+        text = ROW_SEPARATOR.join(str(option).replace(ROW_SEPARATOR, ' ') for option in options)
+    text = text.lower().replace("'", '').replace('’', '')
+    if not text.isascii():
+        chars = as_codes(text)
+        for code in np.unique(chars[chars >= 128]).tolist():
+            if not chr(code).isalnum():
+                text = text.replace(chr(code), ' ')
+    return text.encode('utf-8').translate(ASCII_WORD_TABLE).decode('utf-8').replace(ROW_SEPARATOR, f' {ROW_SEPARATOR} ').split()
+
+def rows_for(ids: np.ndarray, rows: np.ndarray, wanted: np.ndarray, size: int) -> np.ndarray:
+    bounds = zip(np.searchsorted(ids, wanted, 'left').tolist(), np.searchsorted(ids, wanted, 'right').tolist())
+    found = [rows[lo:hi] for lo, hi in bounds]
+    return np.bincount(np.concatenate(found) if found else np.zeros(0, dtype=np.int64), minlength=size)
+
+def incidence(ids: np.ndarray, rows: np.ndarray, id_bits: int, row_bits: int, size: int) -> Dict[str, np.ndarray]:
+    dtype = np.uint32 if id_bits + row_bits <= 32 else np.uint64
+    pairs = sorted_unique((ids.astype(dtype) << dtype(row_bits)) | rows.astype(dtype))
+    pair_rows = (pairs & dtype((1 << row_bits) - 1)).astype(np.int64)
+    return {'ids': pairs >> dtype(row_bits), 'rows': pair_rows, 'counts': np.bincount(pair_rows, minlength=size)}
+
+@lru_cache(maxsize=256)
+def index_options(options: Tuple[str, ...]) -> Dict[str, Any]:
+    size = len(options)
+    row_bits = max(size, 1).bit_length()
+    tokens = normalized_tokens(options)
+    vocab = dict.fromkeys(tokens)
+    if not ABBREVIATIONS.keys().isdisjoint(vocab):
+        tokens = [ABBREVIATIONS.get(token, token) for token in tokens]
+        vocab = dict.fromkeys(tokens)
+    padded = f" {' '.join(tokens)} "
+    chars = as_codes(padded)
+    separators = chars == 0
+    row_ends = np.append(np.flatnonzero(separators), len(padded))
+    row_starts = np.concatenate(([0], row_ends[:-1] + 1))
+    char_rows = np.repeat(np.arange(size, dtype=np.uint32), row_ends - row_starts + 1)[:len(chars)]
+
+    alphabet = None
+    top = int(chars.max()) if len(chars) else 0
+    bits = 7 if top < 128 else 16 if top < 65536 else 21
+    if 3 * bits + row_bits > 64:
+        alphabet = np.unique(chars)
+        bits = len(alphabet).bit_length()
+    gram_chars = np.searchsorted(alphabet, chars) if alphabet is not None else chars
+    valid = ~(separators[:-2] | separators[1:-1] | separators[2:])
+    grams = incidence(pack_trigrams(gram_chars, bits, np.uint64)[valid], char_rows[:-2][valid], 3 * bits, row_bits, size)
+
+    vocab = dict(zip(vocab, range(len(vocab))))
+    ids = np.fromiter(map(vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    markers = ids == vocab.get(ROW_SEPARATOR, -1)
+    words = incidence(ids[~markers], np.cumsum(markers)[~markers], len(vocab).bit_length(), row_bits, size)
+
+    texts = padded.split(ROW_SEPARATOR)
+    by_text = dict(zip(texts, range(size)))
+    if len(by_text) != size:
+        by_text = {}
+        for row, text in enumerate(texts):
+            by_text.setdefault(text, []).append(row)
+
+    return {
+        'texts': texts,
+        'by_text': by_text,
+        'bits': bits,
+        'alphabet': alphabet,
+        'lengths': np.maximum(row_ends - row_starts - 2, 0),
+        'grams': grams,
+        'vocab': vocab,
+        'words': words,
+    }
+
+def rows_with_grams(index: Dict[str, Any], value: str, size: int) -> np.ndarray:
+    grams = index['grams']
+    chars = as_codes(f' {value} ')
+    known = chars < (1 << index['bits'])
+    if index['alphabet'] is not None:
+        positions = np.minimum(np.searchsorted(index['alphabet'], chars), len(index['alphabet']) - 1)
+        known = index['alphabet'][positions] == chars
+        chars = positions
+    wanted = pack_trigrams(chars, index['bits'], np.uint64)[known[:-2] & known[1:-1] & known[2:]]
+    return rows_for(grams['ids'], grams['rows'], sorted_unique(wanted.astype(grams['ids'].dtype)), size)
+
+def rows_with_tokens(index: Dict[str, Any], tokens, size: int) -> np.ndarray:
+    words = index['words']
+    wanted = np.array([index['vocab'][token] for token in tokens if token in index['vocab']], dtype=words['ids'].dtype)
+    return rows_for(words['ids'], words['rows'], wanted, size)
+
+def rows_equal_to(index: Dict[str, Any], text: str) -> List[int]:
+    rows = index['by_text'].get(f' {text} ', [])
+    return [rows] if isinstance(rows, int) else rows
+
+def row_text(index: Dict[str, Any], row: int) -> str:
+    return index['texts'][row].strip(' ')
+
+@lru_cache(maxsize=256)
+def concept_tokens(concepts: FrozenSet[str], domains: Tuple[str, ...]) -> Tuple[str, ...]:
+    related = set(concepts) | {c for c, implied in IMPLIED_CONCEPTS.items() if implied in concepts}
+    tokens = set()
+    for domain in domains:
+        for phrase, phrase_concepts in PHRASE_INDEX[domain].items():
+            if phrase_concepts & related:
+                tokens.update(phrase.split())
+    return tuple(sorted(tokens))
+
+def score_array(profile_value: str, options: List[str], field_label: str = '') -> np.ndarray:
+    if not options:
+        return np.zeros(0)
+    domains = domains_for_label(field_label)
+    value = normalize(profile_value)
+    index = index_options(tuple(options))
+    size = len(options)
+    lengths = index['lengths']
+
+    gram_score = 2 * rows_with_grams(index, value, size) / (len(char_ngrams(value)) + index['grams']['counts'])
+    words = value.split()
+    value_tokens = set(words)
+    token_hits = rows_with_tokens(index, value_tokens, size)
+    token_union = len(value_tokens) + index['words']['counts'] - token_hits
+    token_score = np.divide(token_hits, token_union, out=np.zeros(size), where=token_union > 0)
+    fuzzy = 0.6 * gram_score + 0.4 * token_score
+
+    scores = fuzzy * 0.9
+    if value:
+        spans = {' '.join(words[i:j]) for i in range(len(words)) for j in range(i + 1, len(words) + 1)}
+        contained = [row for span in spans for row in rows_equal_to(index, span)]
+        contained += [row for row in np.flatnonzero(token_hits == len(value_tokens)).tolist() if f' {value} ' in index['texts'][row]]
+        contained = np.array(contained, dtype=np.int64)
+        scores[contained] = 0.75 + 0.2 * np.minimum(lengths[contained], len(value)) / np.maximum(lengths[contained], len(value))
+
+    value_concepts = concepts_for(value, domains)
+    if value_concepts:
+        candidates = np.flatnonzero(rows_with_tokens(index, concept_tokens(value_concepts, domains), size)).tolist()
+        shared = [row for row in candidates if concepts_for(row_text(index, row), domains) & value_concepts]
+        scores[shared] = 0.8 + 0.19 * fuzzy[shared]
+
+    scores[rows_equal_to(index, value)] = 1.0
+    scores[lengths == 0] = 0.0
+    return scores
+
+def score_options(profile_value: str, options: List[str], field_label: str = '') -> List[Tuple[str, float]]:
+    return list(zip(options, score_array(profile_value, options, field_label).tolist()))
+
+def best_option(profile_value: str, options: List[str], field_label: str = '') -> Tuple[Optional[str], float]:
+    if not profile_value or not options:
+        return None, 0.0
+    scores = score_array(profile_value, options, field_label)
+    best = int(np.argmax(scores))
+    if scores[best] <= 0.0:
+        return None, 0.0
+    return options[best], float(scores[best])
@@ -1,7 +1,8 @@
 import re
 import time
+import html
 import hashlib
-from typing import List
+from typing import List, Dict
 from pathlib import Path
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -14,6 +15,10 @@ from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from snapshot_parser import parse_snapshot
+from snapshot_store import SnapshotStore
+from load_profile import LoadProfile, collect_load_report, print_load_report
+from waits import wait_for_ready_state, wait_for_network_idle, wait_for_dropdown_open, wait_for_listbox_closed, get_options_signature, wait_for_options_stable, FILTER_SETTLE
 
 def has_meaningful_content(tag):
     if tag.name == 'input':
@@ -24,20 +29,46 @@ def has_meaningful_content(tag):
         options = tag.find_all('option')
         return any(opt.get('value', '').strip() not in ('', 'placeholder') for opt in options)
     else:
-        return tag.decode_contents().strip() != ''
+        return any(isinstance(child, Tag) or child.output_ready().strip() != '' for child in tag.contents)
+
+def compute_content_hashes(tags) -> dict:
+    content_hashes = {}
+    outer_hashes = {}
+    for tag in reversed(tags):
+        digest = hashlib.md5()
+        text = []
+        for child in tag.contents:
+            if isinstance(child, Tag):
+                if text:
+                    encoded = ''.join(text).encode('utf-8')
+                    digest.update(b'T%d:' % len(encoded) + encoded)
+                    text = []
+                digest.update(b'E' + outer_hashes[id(child)])
+            else:
+                text.append(child.output_ready())
+        if text:
+            encoded = ''.join(text).encode('utf-8')
+            digest.update(b'T%d:' % len(encoded) + encoded)
+        content_hash = digest.digest()
+        attrs = sorted((k, ' '.join(v) if isinstance(v, list) else v) for k, v in tag.attrs.items())
+        opening = repr((tag.name, attrs)).encode('utf-8')
+        content_hashes[id(tag)] = content_hash
+        outer_hashes[id(tag)] = hashlib.md5(b'%d:' % len(opening) + opening + content_hash).digest()
+    return content_hashes
 
 def dedupe_html(soup):
     seen = {}
-    for tag in soup.find_all(True, recursive=True):
-        if not hasattr(tag, 'name') or tag.name is None:
+    tags = soup.find_all(True, recursive=True)
+    content_hashes = compute_content_hashes(tags)
+    for tag in tags:
+        if tag.decomposed or not tag.name:
             continue
 
         classes = tag.get('class', [])
         if classes is None:
             classes = []
 
-        content_hash = hashlib.md5(tag.decode_contents().encode('utf-8')).hexdigest()
-        key = (tag.name, tuple(classes), tag.get('id'), content_hash)
+        key = (tag.name, tuple(classes), tag.get('id'), content_hashes[id(tag)])
 
         if key not in seen:
             seen[key] = tag
@@ -59,17 +90,67 @@ def merge_html_file(input_file, output_file):
         f.write(str(merged_soup))
 
 def wait_for_page_load(driver: WebDriver, timeout: int = 10) -> None:
-    try:
-        WebDriverWait(driver, timeout).until(
-            lambda d: d.execute_script('return document.readyState') == 'complete'
-        )
-        time.sleep(2)
-    except TimeoutException:
-        pass
+    if wait_for_ready_state(driver, timeout):
+        wait_for_network_idle(driver, timeout=2.0)
 
 def get_full_html(driver: WebDriver) -> str:
     return driver.page_source
 
+DELTA_OBSERVER_SCRIPT = """
+if (!window.__ffDelta) {
+    window.__ffDelta = {added: []};
+    var start = function() {
+        new MutationObserver(function(mutations) {
+            for (var i = 0; i < mutations.length; i++) {
+                var nodes = mutations[i].addedNodes;
+                for (var j = 0; j < nodes.length; j++) {
+                    if (nodes[j].nodeType === 1) window.__ffDelta.added.push(nodes[j]);
+                }
+            }
+        }).observe(document.documentElement, {childList: true, subtree: true});
+    };
+    if (document.documentElement) start();
+    else document.addEventListener('DOMContentLoaded', start);
+}
+"""
+
+COLLECT_DELTA_SCRIPT = """
+var trigger = arguments[0];
+var delta = window.__ffDelta || {added: []};
+var nodes = delta.added.filter(function(n) { return n.isConnected; });
+delta.added = [];
+if (trigger) {
+    var refs = ((trigger.getAttribute('aria-controls') || '') + ' ' + (trigger.getAttribute('aria-owns') || '')).split(/\\s+/);
+    for (var i = 0; i < refs.length; i++) {
+        var el = refs[i] ? document.getElementById(refs[i]) : null;
+        if (el) nodes.push(el);
+    }
+}
+var set = new Set(nodes);
+var roots = [];
+for (var k = 0; k < nodes.length; k++) {
+    var n = nodes[k], covered = false;
+    for (var p = n.parentElement; p; p = p.parentElement) {
+        if (set.has(p)) { covered = true; break; }
+    }
+    if (!covered && roots.indexOf(n) === -1) roots.push(n);
+}
+return roots.map(function(n) { return n.outerHTML; }).join('');
+"""
+
+def install_delta_observer(driver: WebDriver) -> None:
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': DELTA_OBSERVER_SCRIPT})
+    except:
+        pass
+    driver.execute_script(DELTA_OBSERVER_SCRIPT)
+
+def reset_delta(driver: WebDriver) -> None:
+    driver.execute_script("if (window.__ffDelta) window.__ffDelta.added = [];")
+
+def collect_delta(driver: WebDriver, element=None) -> str:
+    return driver.execute_script(COLLECT_DELTA_SCRIPT, element) or ''
+
 def get_element_unique_id(element) -> str:
     try:
         eid = element.get_attribute('id')
@@ -89,85 +170,215 @@ def get_element_unique_id(element) -> str:
     except:
         return f"unknown_{id(element)}"
 
+DROPDOWN_GROUPS = [
+    ('select', 'select'),
+    ('custom', '[role="combobox"], [aria-haspopup="listbox"], [role="listbox"]'),
+    ('search', 'input[type="search"], input[autocomplete], input[list], input[class*="search"], input[class*="autocomplete"], input[class*="combobox"]'),
+]
+
+DISCOVER_DROPDOWNS_SCRIPT = """
+var groups = arguments[0];
+var uidOf = function(el, rect) {
+    if (el.id) return 'id:' + el.id;
+    var name = el.getAttribute('name');
+    if (name) return 'name:' + name;
+    var attrs = ['data-testid', 'data-id', 'data-name'];
+    for (var i = 0; i < attrs.length; i++) {
+        var val = el.getAttribute(attrs[i]);
+        if (val) return attrs[i] + ':' + val;
+    }
+    return 'tag:' + el.tagName.toLowerCase() + '_loc:' + Math.round(rect.left + window.scrollX) + ',' +
+        Math.round(rect.top + window.scrollY) + '_size:' + rect.width + ',' + rect.height;
+};
+var isVisible = function(el, rect) {
+    if (rect.width <= 0 || rect.height <= 0) return false;
+    if (el.checkVisibility) return el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true});
+    var style = window.getComputedStyle(el);
+    return style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0';
+};
+var results = [];
+for (var g = 0; g < groups.length; g++) {
+    var nodes = document.querySelectorAll(groups[g][1]);
+    for (var n = 0; n < nodes.length; n++) {
+        var el = nodes[n];
+        var rect = el.getBoundingClientRect();
+        results.push({
+            element: el,
+            type: groups[g][0],
+            uid: uidOf(el, rect),
+            visible: isVisible(el, rect),
+            enabled: !el.matches(':disabled'),
+            native: el.tagName === 'SELECT' || !!el.list,
+            rect: {x: rect.left + window.scrollX, y: rect.top + window.scrollY, width: rect.width, height: rect.height}
+        });
+    }
+}
+return results;
+"""
+
+def discover_dropdown_candidates(driver: WebDriver) -> List[dict]:
+    return driver.execute_script(DISCOVER_DROPDOWNS_SCRIPT, DROPDOWN_GROUPS) or []
+
 def find_all_dropdowns(driver: WebDriver) -> List[dict]:
     dropdowns = []
     seen_ids = set()
-    selects = driver.find_elements(By.TAG_NAME, 'select')
-    for s in selects:
-        try:
-            if s.is_displayed() and s.is_enabled():
-                uid = get_element_unique_id(s)
-                if uid not in seen_ids:
-                    seen_ids.add(uid)
-                    dropdowns.append({'element': s, 'type': 'select', 'name': uid})
-        except: continue
-    custom = driver.find_elements(By.CSS_SELECTOR, '[role="combobox"], [aria-haspopup="listbox"], [role="listbox"]')
-    for c in custom:
-        try:
-            if c.is_displayed() and c.is_enabled():
-                uid = get_element_unique_id(c)
-                if uid not in seen_ids:
-                    seen_ids.add(uid)
-                    dropdowns.append({'element': c, 'type': 'custom', 'name': uid})
-        except: continue
-    search_fields = driver.find_elements(By.CSS_SELECTOR,
-        'input[type="search"], input[autocomplete], input[list], input[class*="search"], input[class*="autocomplete"], input[class*="combobox"]')
-    for f in search_fields:
-        try:
-            if f.is_displayed() and f.is_enabled():
-                uid = get_element_unique_id(f)
-                if uid not in seen_ids:
-                    seen_ids.add(uid)
-                    dropdowns.append({'element': f, 'type': 'search', 'name': uid})
-        except: continue
+    for candidate in discover_dropdown_candidates(driver):
+        if not (candidate['visible'] and candidate['enabled']):
+            continue
+        uid = candidate['uid']
+        if uid not in seen_ids:
+            seen_ids.add(uid)
+            dropdowns.append({'element': candidate['element'], 'type': candidate['type'], 'name': uid, 'rect': candidate['rect'], 'native': candidate['native']})
     return dropdowns
 
+HARVEST_NATIVE_OPTIONS_SCRIPT = """
+return arguments[0].map(function(el) {
+    var options = [];
+    if (el.tagName === 'SELECT') {
+        options = Array.prototype.filter.call(el.options, function(o) { return o.value !== ''; })
+            .map(function(o) { return (o.label || o.text || '').trim(); });
+    } else if (el.list) {
+        options = Array.prototype.map.call(el.list.options, function(o) { return (o.value || o.textContent || '').trim(); });
+    }
+    return options.filter(function(t) { return t && t.length < 200; });
+});
+"""
+
+def harvest_native_options(driver: WebDriver, dropdowns: List[dict]) -> Dict[str, List[str]]:
+    if not dropdowns:
+        return {}
+    harvested = driver.execute_script(HARVEST_NATIVE_OPTIONS_SCRIPT, [dd['element'] for dd in dropdowns]) or []
+    return {dd['name']: options for dd, options in zip(dropdowns, harvested) if options}
+
+def options_to_fragment(options: List[str]) -> str:
+    items = ''.join(f'<div role="option">{html.escape(option)}</div>' for option in options)
+    return f'<div role="listbox">{items}</div>'
+
+def partition_dropdowns(dropdowns: List[dict]) -> (List[dict], List[dict]):
+    native = []
+    lazy = []
+    seen = set()
+    for dd in dropdowns:
+        if dd['name'] in seen:
+            continue
+        seen.add(dd['name'])
+        (native if dd.get('native') else lazy).append(dd)
+    return native, lazy
+
+MARK_PROBED_SCRIPT = """
+var el = arguments[0];
+window.__ffProbed = window.__ffProbed || [];
+for (var i = 0; i < window.__ffProbed.length; i++) {
+    if (window.__ffProbed[i].el === el) return;
+}
+window.__ffProbed.push({el: el, value: el.value || ''});
+"""
+
+RESTORE_PROBED_SCRIPT = """
+var probed = window.__ffProbed || [];
+window.__ffProbed = [];
+var reset = 0;
+for (var i = 0; i < probed.length; i++) {
+    var el = probed[i].el;
+    if (!el.isConnected || el.value === probed[i].value) continue;
+    var proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, probed[i].value);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    reset++;
+}
+var active = document.activeElement;
+if (active && active !== document.body) {
+    active.dispatchEvent(new KeyboardEvent('keydown', {key: 'Escape', code: 'Escape', keyCode: 27, bubbles: true}));
+    active.blur();
+}
+return reset;
+"""
+
 def click_dropdown(driver: WebDriver, dropdown_info: dict) -> bool:
     el = dropdown_info['element']
     try:
-        driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", el)
-        time.sleep(0.2)
+        driver.execute_script("arguments[0].scrollIntoView({behavior: 'auto', block: 'center'});", el)
+        if dropdown_info['type'] == 'search':
+            driver.execute_script(MARK_PROBED_SCRIPT, el)
         try:
             el.click()
             if dropdown_info['type'] == 'search':
+                before = get_options_signature(driver)
                 el.send_keys('a')
-                time.sleep(0.5)
+                wait_for_options_stable(driver, timeout=0.8, previous=before, settle=FILTER_SETTLE)
                 el.clear()
             return True
         except:
             driver.execute_script("arguments[0].click();", el)
             if dropdown_info['type'] == 'search':
+                before = get_options_signature(driver)
                 driver.execute_script("arguments[0].value='a'; arguments[0].dispatchEvent(new Event('input'));", el)
-                time.sleep(0.5)
+                wait_for_options_stable(driver, timeout=0.8, previous=before, settle=FILTER_SETTLE)
                 driver.execute_script("arguments[0].value='';", el)
             return True
     except:
         return False
 
+def restore_probed_state(driver: WebDriver) -> Dict[str, int]:
+    reset = driver.execute_script(RESTORE_PROBED_SCRIPT) or 0
+    closed = wait_for_listbox_closed(driver, timeout=0.3)
+    if not closed:
+        try:
+            ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+            closed = wait_for_listbox_closed(driver, timeout=0.5)
+        except:
+            pass
+    return {'reset_inputs': reset, 'listbox_open': 0 if closed else 1}
+
 def expand_all_dropdowns(driver: WebDriver) -> (List[str], List[str]):
-    dropdowns = find_all_dropdowns(driver)
+    native, lazy = partition_dropdowns(find_all_dropdowns(driver))
     html_snapshots = []
     dropdown_names = []
     html_snapshots.append(get_full_html(driver))
     dropdown_names.append("Base HTML")
-    processed = set()
-    for dd in dropdowns:
+    for uid, options in harvest_native_options(driver, native).items():
+        html_snapshots.append(f"<body>{options_to_fragment(options)}</body>")
+        dropdown_names.append(uid)
+    for dd in lazy:
         uid = dd['name']
-        if uid in processed:
-            continue
-        processed.add(uid)
         if click_dropdown(driver, dd):
-            time.sleep(1.7)
+            wait_for_dropdown_open(driver, timeout=1.7)
             html_snapshots.append(get_full_html(driver))
             dropdown_names.append(uid)
             try:
                 ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-                time.sleep(0.5)
+                wait_for_listbox_closed(driver, timeout=0.5)
             except:
                 pass
     return html_snapshots, dropdown_names
 
-def save_all_dropdowns_in_one_html(html_snapshots: list, dropdown_names: list, output_path: str = "all_dropdowns.html"):
+def expand_all_dropdowns_as_deltas(driver: WebDriver) -> (str, Dict[str, str]):
+    install_delta_observer(driver)
+    native, lazy = partition_dropdowns(find_all_dropdowns(driver))
+    base_html = get_full_html(driver)
+    deltas = {uid: options_to_fragment(options) for uid, options in harvest_native_options(driver, native).items()}
+    for dd in lazy:
+        uid = dd['name']
+        reset_delta(driver)
+        if click_dropdown(driver, dd):
+            wait_for_dropdown_open(driver, timeout=1.7)
+            delta = collect_delta(driver, dd['element'])
+            if delta:
+                deltas[uid] = delta
+            try:
+                ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+                wait_for_listbox_closed(driver, timeout=0.5)
+            except:
+                pass
+    return base_html, deltas
+
+def deltas_to_snapshots(base_html: str, deltas: Dict[str, str]) -> (List[str], List[str]):
+    html_snapshots = [base_html] + [f"<body>{delta}</body>" for delta in deltas.values()]
+    dropdown_names = ["Base HTML"] + list(deltas.keys())
+    return html_snapshots, dropdown_names
+
+def save_all_dropdowns_in_one_html(html_snapshots: list, dropdown_names: list, output_path: str = "all_dropdowns.html", parser: str = None):
     base_soup = BeautifulSoup("<html><head><meta charset='utf-8'></head><body></body></html>", "html.parser")
     body = base_soup.find('body')
     for idx, html in enumerate(html_snapshots):
@@ -175,22 +386,24 @@ def save_all_dropdowns_in_one_html(html_snapshots: list, dropdown_names: list, o
         section_tag = base_soup.new_tag("section")
         section_tag.string = name
         body.append(section_tag)
-        snapshot_soup = BeautifulSoup(html, 'html.parser')
+        snapshot_soup = parse_snapshot(html, parser)
         snapshot_body = snapshot_soup.find('body') or snapshot_soup
-        for tag_name in ['script', 'style', 'noscript', 'iframe', 'img', 'meta', 'link', 'head', 'path', 'svg']:
-            for tag in snapshot_body.find_all(tag_name):
-                tag.decompose()
-        for tag in snapshot_body.find_all(True):
-            for attr in list(tag.attrs):
-                if attr not in ['id','name','type','value','for','aria-label','aria-labelledby','aria-required','role','placeholder','style']:
-                    del tag[attr]
         body.append(snapshot_body)
     return base_soup
 
-def process_page(driver: WebDriver, url: str, output_path: str = "all_dropdowns.html"):
+def process_page(driver: WebDriver, url: str, output_path: str = "all_dropdowns.html", use_deltas: bool = False, store: SnapshotStore = None, load_profile: LoadProfile = None):
     driver.get(url)
     wait_for_page_load(driver)
-    html_snapshots, dropdown_names = expand_all_dropdowns(driver)
+    if load_profile is not None:
+        print_load_report(collect_load_report(driver, load_profile))
+    if use_deltas:
+        install_delta_observer(driver)
+        base_html, deltas = expand_all_dropdowns_as_deltas(driver)
+        html_snapshots, dropdown_names = deltas_to_snapshots(base_html, deltas)
+    else:
+        html_snapshots, dropdown_names = expand_all_dropdowns(driver)
+    if store is not None:
+        store.save(url, html_snapshots, dropdown_names, mode='deltas' if use_deltas else 'snapshots')
     soup = save_all_dropdowns_in_one_html(html_snapshots, dropdown_names, output_path)
     merged_soup = dedupe_html(soup)
     with open('pp_result.html', 'w', encoding='utf-8') as f:
@@ -0,0 +1,66 @@
+import re
+import importlib.util
+from typing import Optional, List
+from bs4 import BeautifulSoup
+
+DROP_TAGS = frozenset(['script', 'style', 'noscript', 'iframe', 'img', 'meta', 'link', 'head', 'path', 'svg'])
+KEEP_ATTRS = frozenset(['id', 'name', 'type', 'value', 'for', 'aria-label', 'aria-labelledby', 'aria-required', 'role', 'placeholder', 'style'])
+
+PARSER_BACKENDS = [
+    ('html.parser', None),
+    ('lxml', 'lxml'),
+]
+
+IMPLICIT_TAGS = {name: re.compile(rf'<{name}[\s/>]', re.I) for name in ('body', 'html')}
+
+def available_parsers() -> List[str]:
+    return [name for name, module in PARSER_BACKENDS if module is None or importlib.util.find_spec(module)]
+
+def resolve_parser(preferred: Optional[str] = None) -> str:
+    available = available_parsers()
+    if preferred in available:
+        return preferred
+    return available[0]
+
+class StrippingSoup(BeautifulSoup):
+    def __init__(self, markup: str, features: str, drop_tags=DROP_TAGS, keep_attrs=KEEP_ATTRS):
+        self.drop_tags = drop_tags
+        self.keep_attrs = keep_attrs
+        self.drop_stack = []
+        self.body_seen = False
+        super().__init__(markup, features)
+        if self.builder.NAME == 'lxml':
+            for name, pattern in IMPLICIT_TAGS.items():
+                implicit = self.find(name)
+                if implicit is not None and not pattern.search(markup):
+                    implicit.unwrap()
+
+    def handle_starttag(self, name, namespace, nsprefix, attrs, *args, **kwargs):
+        if self.drop_stack or name in self.drop_tags:
+            self.endData()
+            if not self.builder.can_be_empty_element(name):
+                self.drop_stack.append(name)
+            return None
+        if name == 'body' and not self.body_seen:
+            self.body_seen = True
+        else:
+            attrs = {k: v for k, v in attrs.items() if k in self.keep_attrs}
+        return super().handle_starttag(name, namespace, nsprefix, attrs, *args, **kwargs)
+
+    def handle_endtag(self, name, nsprefix=None):
+        if self.drop_stack:
+            if name in self.drop_stack:
+                while self.drop_stack.pop() != name:
+                    pass
+                return
+            if not self.open_tag_counter.get(name):
+                return
+            self.drop_stack = []
+        super().handle_endtag(name, nsprefix)
+
+    def handle_data(self, data):
+        if not self.drop_stack:
+            super().handle_data(data)
+
+def parse_snapshot(html: str, parser: Optional[str] = None) -> BeautifulSoup:
+    return StrippingSoup(html, resolve_parser(parser))
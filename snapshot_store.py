@@ -0,0 +1,90 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+class SnapshotStore:
+    def __init__(self, root: str = None):
+        self.root = Path(root) if root else Path.cwd() / 'snapshot_store'
+        self.objects_dir = self.root / 'objects'
+        self.pages_dir = self.root / 'pages'
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f'{digest}.gz'
+
+    def url_dir(self, url: str) -> Path:
+        return self.pages_dir / self.hash_text(url)[:16]
+
+    def write_atomic(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def put_blob(self, text: str) -> str:
+        digest = self.hash_text(text)
+        path = self.object_path(digest)
+        if not path.exists():
+            self.write_atomic(path, gzip.compress(text.encode('utf-8')))
+        return digest
+
+    def get_blob(self, digest: str) -> str:
+        return gzip.decompress(self.object_path(digest).read_bytes()).decode('utf-8')
+
+    def save(self, url: str, html_snapshots: List[str], dropdown_names: List[str], mode: str = 'snapshots') -> str:
+        digests = [self.put_blob(html) for html in html_snapshots]
+        page_hash = digests[0] if digests else self.hash_text('')
+        manifest = {
+            'url': url,
+            'page_hash': page_hash,
+            'created': time.time(),
+            'mode': mode,
+            'dropdown_names': list(dropdown_names),
+            'snapshots': digests,
+        }
+        self.write_atomic(self.url_dir(url) / f'{page_hash}.json', json.dumps(manifest, indent=2).encode('utf-8'))
+        return page_hash
+
+    def list_pages(self, url: str = None) -> List[Dict[str, Any]]:
+        dirs = [self.url_dir(url)] if url else (sorted(self.pages_dir.iterdir()) if self.pages_dir.exists() else [])
+        manifests = []
+        for directory in dirs:
+            if not directory.exists():
+                continue
+            for path in directory.glob('*.json'):
+                manifests.append(json.loads(path.read_text(encoding='utf-8')))
+        return sorted(manifests, key=lambda m: m['created'], reverse=True)
+
+    def resolve_page_hash(self, url: str, page_hash: str) -> Path:
+        directory = self.url_dir(url)
+        path = directory / f'{page_hash}.json'
+        if path.exists():
+            return path
+        matches = sorted(directory.glob(f'{page_hash}*.json')) if directory.exists() and page_hash.isalnum() else []
+        if not matches:
+            raise FileNotFoundError(f'No stored snapshots for {url} with page hash {page_hash}')
+        if len(matches) > 1:
+            candidates = ', '.join(match.stem for match in matches)
+            raise ValueError(f'Page hash prefix {page_hash} is ambiguous for {url}: {candidates}')
+        return matches[0]
+
+    def load_manifest(self, url: str, page_hash: Optional[str] = None) -> Dict[str, Any]:
+        if page_hash:
+            path = self.resolve_page_hash(url, page_hash)
+            return json.loads(path.read_text(encoding='utf-8'))
+        pages = self.list_pages(url)
+        if not pages:
+            raise FileNotFoundError(f'No stored snapshots for {url}')
+        return pages[0]
+
+    def load(self, url: str, page_hash: Optional[str] = None) -> (List[str], List[str]):
+        manifest = self.load_manifest(url, page_hash)
+        html_snapshots = [self.get_blob(digest) for digest in manifest['snapshots']]
+        return html_snapshots, manifest['dropdown_names']
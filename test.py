@@ -1,14 +1,18 @@
 import time
 from pathlib import Path
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from form_analyzer import JobProfile, extract_clean_html, get_profile_as_dict
-from ai_service import identify_form_fields, map_fields_to_profile, fill_remaining_fields
-from form_filler import fill_form
+from form_analyzer import JobProfile, extract_clean_document, get_profile_as_dict
+from ai_service import identify_form_fields, identify_form_fields_stream, map_fields_to_profile, fill_remaining_fields, print_classification_stats
+from form_filler import fill_form, fill_form_streaming, print_fill_stats
+from form_state import collect_remaining_controls
+from download_cache import prefetch_profile_files
+from browser_pool import BrowserPool
+from waits import print_wait_stats
 from dotenv import load_dotenv
 
 load_dotenv()
 
+STREAM_FIELDS = True
+
 test_profile = JobProfile(
     firstName='John',
     lastName='Doe',
@@ -47,67 +51,91 @@ def test():
     print('🚀 AI Form Filler - Starting...\n')
     print('=' * 60 + '\n')
     
-    chrome_options = Options()
-    chrome_options.add_argument('--start-maximized')
-    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    profile_dict = get_profile_as_dict(test_profile)
+    prefetch_profile_files(profile_dict)
     
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.set_window_size(1366, 768)
+    pool = BrowserPool(size=1)
     
     try:
-        test_url = 'https://job-boards.greenhouse.io/fixify/jobs/4985488008'
-        test_url = 'https://job-boards.greenhouse.io/renttherunway/jobs/7395001'
-        test_url = 'https://job-boards.greenhouse.io/twilio/jobs/7394811'
-        print(f'📍 Navigating to: {test_url}\n')
-        driver.get(test_url)
-        
-        print('⏳ Waiting for page to load...')
-        print('✅ Page loaded\n')
-        
-        print('=' * 60)
-        profile_dict = get_profile_as_dict(test_profile)
-        html = extract_clean_html(driver)
-        
-        print('=' * 60)
-        fields = identify_form_fields(html, profile_dict, use_cache=False)
-        print()
-        
-        print('=' * 60)
-        field_values = map_fields_to_profile(fields, profile_dict)
-        print()
-        
-        print('=' * 60)
-        filled_count = fill_form(driver, fields, field_values)
-        print()
-        
-        print('=' * 60)
-        print('🤖 Checking for remaining empty fields...')
-        time.sleep(2)
-        
-        html_after = extract_clean_html(driver)
-        filled_labels = list(field_values.keys())
-        remaining_values = fill_remaining_fields(html_after, filled_labels, profile_dict)
-        
-        if remaining_values:
-            print(f'\n📝 Filling {len(remaining_values)} remaining fields...\n')
-            fill_form(driver, fields, remaining_values)
-        else:
-            print('✅ No remaining fields to fill')
-        print()
-        
-        print('=' * 60)
-        print('🎉 Form filling complete!')
-        print('👀 Review the form before submitting...')
-        print('=' * 60)
-        input('\nPress Enter to close browser...')
-        
+        with pool.lease() as driver:
+            test_url = 'https://job-boards.greenhouse.io/fixify/jobs/4985488008'
+            test_url = 'https://job-boards.greenhouse.io/renttherunway/jobs/7395001'
+            test_url = 'https://job-boards.greenhouse.io/twilio/jobs/7394811'
+            print(f'📍 Navigating to: {test_url}\n')
+            driver.get(test_url)
+            
+            print('⏳ Waiting for page to load...')
+            print('✅ Page loaded\n')
+            
+            print('=' * 60)
+            html = extract_clean_document(driver)
+            
+            if STREAM_FIELDS:
+                print('=' * 60)
+                result = fill_form_streaming(
+                    driver,
+                    identify_form_fields_stream(html, profile_dict, use_cache=False),
+                    lambda batch: map_fields_to_profile(batch, profile_dict, verbose=False),
+                )
+                fields = result['fields']
+                field_values = result['field_values']
+                filled_count = result['filled_count']
+                print()
+            else:
+                print('=' * 60)
+                fields = identify_form_fields(html, profile_dict, use_cache=False)
+                print()
+                
+                print('=' * 60)
+                field_values = map_fields_to_profile(fields, profile_dict)
+                print()
+                
+                print('=' * 60)
+                filled_count = fill_form(driver, fields, field_values)
+                print()
+            
+            print('=' * 60)
+            print('🤖 Checking for remaining empty fields...')
+            time.sleep(2)
+            
+            filled_labels = list(field_values.keys())
+            pending, sections = collect_remaining_controls(driver, html, fields, filled_labels)
+            remaining_fields, remaining_values = fill_remaining_fields(pending, sections, profile_dict)
+            
+            if remaining_values:
+                print(f'\n📝 Filling {len(remaining_values)} remaining fields...\n')
+                fill_form(driver, remaining_fields, remaining_values)
+            else:
+                print('✅ No remaining fields to fill')
+            print()
+            
+            print('=' * 60)
+            print('⏱️  Wait timings:')
+            print_wait_stats()
+            print()
+            
+            print('=' * 60)
+            print('⌨️  Fill timings:')
+            print_fill_stats()
+            print()
+            
+            print('=' * 60)
+            print('🧮 Rule-based classification:')
+            print_classification_stats()
+            print()
+            
+            print('=' * 60)
+            print('🎉 Form filling complete!')
+            print('👀 Review the form before submitting...')
+            print('=' * 60)
+            input('\nPress Enter to close browser...')
+            
     except Exception as e:
         print(f'\n❌ Error: {e}')
         import traceback
         traceback.print_exc()
     finally:
-        driver.quit()
+        pool.close()
         print('\n✅ Browser closed.')
 
 if __name__ == '__main__':
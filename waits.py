@@ -0,0 +1,160 @@
+import time
+from typing import Callable, Dict, List, Any
+from selenium.webdriver.remote.webdriver import WebDriver
+
+WAIT_TIMINGS: Dict[str, List[Dict[str, Any]]] = {}
+FILTER_SETTLE = 0.15
+
+OPTIONS_VISIBLE_SCRIPT = """
+var nodes = document.querySelectorAll('[role="listbox"], [role="option"]');
+for (var i = 0; i < nodes.length; i++) {
+    var r = nodes[i].getBoundingClientRect();
+    if (r.width > 0 && r.height > 0) return true;
+}
+return false;
+"""
+
+OPTIONS_SIGNATURE_JS = """
+var signature = function() {
+    var opts = document.querySelectorAll('[role="option"]');
+    var text = '';
+    for (var i = 0; i < opts.length; i++) text += (opts[i].textContent || '') + '|';
+    return opts.length + ':' + text;
+};
+"""
+
+OPTIONS_SIGNATURE_SCRIPT = OPTIONS_SIGNATURE_JS + "return signature();"
+
+OPTIONS_STABLE_SCRIPT = OPTIONS_SIGNATURE_JS + """
+var previous = arguments[0];
+var settle = arguments[1];
+var done = arguments[arguments.length - 1];
+var first = signature();
+requestAnimationFrame(function() {
+    requestAnimationFrame(function() {
+        setTimeout(function() {
+            var second = signature();
+            done(first === second && first !== '0:' && first !== previous);
+        }, settle);
+    });
+});
+"""
+
+LISTBOX_CLOSED_SCRIPT = """
+var nodes = document.querySelectorAll('[role="listbox"], [role="option"]');
+for (var i = 0; i < nodes.length; i++) {
+    var r = nodes[i].getBoundingClientRect();
+    if (r.width > 0 && r.height > 0) return false;
+}
+return true;
+"""
+
+NETWORK_TRACKER_SCRIPT = """
+if (!window.__ffNet) {
+    window.__ffNet = {pending: 0};
+    var origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function() {
+            window.__ffNet.pending++;
+            return origFetch.apply(this, arguments).finally(function() { window.__ffNet.pending--; });
+        };
+    }
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        window.__ffNet.pending++;
+        this.addEventListener('loadend', function() { window.__ffNet.pending--; });
+        return origSend.apply(this, arguments);
+    };
+}
+return [performance.getEntriesByType('resource').length, window.__ffNet.pending];
+"""
+
+def record_wait(name: str, elapsed: float, met: bool, timeout: float) -> None:
+    WAIT_TIMINGS.setdefault(name, []).append({'elapsed': elapsed, 'met': met, 'timeout': timeout})
+
+def get_wait_stats() -> Dict[str, Dict[str, float]]:
+    stats = {}
+    for name, records in WAIT_TIMINGS.items():
+        elapsed = sorted(r['elapsed'] for r in records)
+        count = len(elapsed)
+        stats[name] = {
+            'count': count,
+            'timeouts': sum(1 for r in records if not r['met']),
+            'mean': sum(elapsed) / count,
+            'p50': elapsed[count // 2],
+            'p95': elapsed[min(count - 1, int(count * 0.95))],
+            'max': elapsed[-1],
+        }
+    return stats
+
+def print_wait_stats() -> None:
+    for name, s in sorted(get_wait_stats().items()):
+        print(f"   ⏱️  {name}: n={s['count']} mean={s['mean']:.3f}s p50={s['p50']:.3f}s "
+              f"p95={s['p95']:.3f}s max={s['max']:.3f}s timeouts={s['timeouts']}")
+
+def reset_wait_stats() -> None:
+    WAIT_TIMINGS.clear()
+
+def timed_wait(name: str, condition: Callable[[], bool], timeout: float, poll: float = 0.05) -> bool:
+    start = time.perf_counter()
+    deadline = start + timeout
+    met = False
+    while True:
+        try:
+            met = bool(condition())
+        except:
+            met = False
+        if met or time.perf_counter() >= deadline:
+            break
+        time.sleep(poll)
+    record_wait(name, time.perf_counter() - start, met, timeout)
+    return met
+
+def wait_for_ready_state(driver: WebDriver, timeout: float = 10, state: str = 'complete') -> bool:
+    return timed_wait(
+        f'ready_state:{state}',
+        lambda: driver.execute_script('return document.readyState') == state,
+        timeout,
+    )
+
+def wait_for_ready_state_change(driver: WebDriver, previous: str, timeout: float = 10) -> bool:
+    return timed_wait(
+        'ready_state_change',
+        lambda: driver.execute_script('return document.readyState') != previous,
+        timeout,
+    )
+
+def wait_for_options(driver: WebDriver, timeout: float = 2.0) -> bool:
+    return timed_wait('options_visible', lambda: driver.execute_script(OPTIONS_VISIBLE_SCRIPT), timeout)
+
+def get_options_signature(driver: WebDriver) -> str:
+    try:
+        return driver.execute_script(OPTIONS_SIGNATURE_SCRIPT)
+    except:
+        return None
+
+def wait_for_options_stable(driver: WebDriver, timeout: float = 1.0, previous: str = None, settle: float = 0.0) -> bool:
+    name = 'options_stable' if previous is None else 'options_changed'
+    return timed_wait(name, lambda: driver.execute_async_script(OPTIONS_STABLE_SCRIPT, previous, int(settle * 1000)), timeout, poll=0)
+
+def wait_for_listbox_closed(driver: WebDriver, timeout: float = 0.5) -> bool:
+    return timed_wait('listbox_closed', lambda: driver.execute_script(LISTBOX_CLOSED_SCRIPT), timeout)
+
+def wait_for_network_idle(driver: WebDriver, timeout: float = 5.0, idle_time: float = 0.3) -> bool:
+    last = {'state': None, 'since': time.perf_counter()}
+
+    def idle() -> bool:
+        entries, pending = driver.execute_script(NETWORK_TRACKER_SCRIPT)
+        now = time.perf_counter()
+        if pending or (entries, pending) != last['state']:
+            last['state'] = (entries, pending)
+            last['since'] = now
+            return False
+        return now - last['since'] >= idle_time
+
+    return timed_wait('network_idle', idle, timeout)
+
+def wait_for_dropdown_open(driver: WebDriver, timeout: float = 2.0) -> bool:
+    if not wait_for_options(driver, timeout):
+        return False
+    return wait_for_options_stable(driver, timeout=min(timeout, 1.0))